@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the game graph.
+
+Runs every bundled scenario end-to-end against the deterministic fake LLM (with a
+simulated latency) and reports, per scenario: per-node overhead (node time minus
+time spent in the model), state validation and checkpoint serialization time per
+step, bytes written per checkpoint, and memory growth per turn.
+
+    python benchmarks/run_benchmarks.py run --out benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py run --out current.json
+    python benchmarks/run_benchmarks.py compare current.json benchmarks/baseline.json
+
+The adjudication command instead pauses each game before every adjudication and
+judges the same argument with both adjudication modes (sequential calls and the
+single panel round), reporting latency, calls, estimated tokens and how often the
+two modes agree on method and outcome:
+
+    python benchmarks/run_benchmarks.py adjudication --out adjudication.json
+
+The serialization command compares checkpoint serializers (the default JsonPlus
+msgpack and the compact binary form, plain, zstd-compressed and compressed with the
+scenario dictionary) on the states of one game per scenario, reporting bytes per
+step, encode and decode time per step, and bytes a checkpointer writes per step:
+
+    python benchmarks/run_benchmarks.py serialization --out serialization.json
+"""
+
+import sys
+import os
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import statistics
+from collections import defaultdict
+from threading import Lock
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+# Benchmarks never talk to a real model
+os.environ["MATRIX_AI_LLM_BACKEND"] = "fake"
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import get_buffer_string
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from matrix_ai import GameState, GameSettings, create_adjudication_graph
+from matrix_ai.farm import load_matrix_game
+from matrix_ai.fake_llm import FAKE_LATENCY_ENV, fake_llm_stats, reset_fake_llm_stats
+from matrix_ai.llm import clear_llm_pool
+from matrix_ai.main_game_graph import create_main_game_graph
+from matrix_ai.serialization import CompactSerializer
+
+# Metrics compared against the baseline (all lower-is-better), with the absolute
+# change below which a difference is treated as noise
+COMPARED_METRICS = {
+    "framework_overhead_ms": 5.0,
+    "node_overhead_ms": 5.0,
+    "validation_ms_per_step": 0.2,
+    "serialization_ms_per_step": 0.2,
+    "checkpoint_bytes": 1024,
+    "checkpoint_write_bytes_per_step": 1024,
+    "memory_kb_per_turn": 64,
+}
+
+# --- INSTRUMENTATION ---
+# framework_overhead_ms is the run's wall time outside any leaf node (graph scheduling,
+# channel updates, state copies) minus the time this script spends measuring.
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time per graph node, from the callbacks LangGraph emits around each node run"""
+
+    def __init__(self):
+        self._started = {}
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def _finish(self, run_id):
+        started = self._started.pop(run_id, None)
+        if started:
+            node, start = started
+            self.seconds[node] += time.perf_counter() - start
+            self.calls[node] += 1
+
+
+class UsageCounter(BaseCallbackHandler):
+    """Model calls and estimated tokens (~4 characters each) of prompts and completions"""
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self):
+        self._lock = Lock()
+        self.calls = 0
+        self.chars = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.chars += sum(len(get_buffer_string(batch)) for batch in messages)
+
+    def on_llm_end(self, response, **kwargs):
+        with self._lock:
+            self.chars += sum(len(generation.text) for generations in response.generations for generation in generations)
+
+    @property
+    def tokens(self):
+        return self.chars // self.CHARS_PER_TOKEN
+
+
+def _config(thread_id, callbacks=None):
+    return {
+        "configurable": {"thread_id": thread_id},
+        "recursion_limit": 600,
+        "callbacks": callbacks or []
+    }
+
+# --- BENCHMARK ---
+
+def benchmark_scenario(scenario_path, turns, seed):
+    """Run one scenario twice (timing pass, then memory pass) and collect its metrics"""
+    overrides = {"game_length": turns} if turns else {}
+    game_definition = load_matrix_game(str(scenario_path), overrides)
+    settings = GameSettings(seed=seed)
+    graph = create_main_game_graph()
+    subgraphs = {name for name, _ in graph.get_subgraphs()}
+    serializer = JsonPlusSerializer()
+
+    # Timing pass
+    reset_fake_llm_stats()
+    timer = NodeTimer()
+    validation_seconds = serialization_seconds = 0.0
+    checkpoint_bytes = steps = 0
+    state = None
+
+    started = time.perf_counter()
+    initial_state = GameState.from_matrix_game_setup(game_definition, settings)
+    for values in graph.stream(initial_state, config=_config("timing", [timer]), stream_mode="values"):
+        state = values if isinstance(values, GameState) else GameState.model_validate(values)
+
+        t0 = time.perf_counter()
+        GameState.model_validate_json(state.model_dump_json())
+        t1 = time.perf_counter()
+        _, payload = serializer.dumps_typed(state)
+        t2 = time.perf_counter()
+
+        validation_seconds += t1 - t0
+        serialization_seconds += t2 - t1
+        checkpoint_bytes = len(payload)
+        steps += 1
+    wall_seconds = time.perf_counter() - started
+
+    llm = fake_llm_stats()
+    nodes = {}
+    for node in sorted(timer.seconds):
+        llm_seconds = llm.get(node, {}).get("busy_seconds", 0.0)
+        nodes[node] = {
+            "calls": timer.calls[node],
+            "total_ms": round(timer.seconds[node] * 1000, 3),
+            "llm_ms": round(llm_seconds * 1000, 3),
+            "overhead_ms": round((timer.seconds[node] - llm_seconds) * 1000, 3),
+        }
+    leaf_seconds = sum(seconds for node, seconds in timer.seconds.items() if node not in subgraphs)
+
+    # Checkpoint pass: bytes an in-memory checkpointer stores per checkpoint (it only
+    # re-serializes the channels a step wrote, so this tracks how much each step changes)
+    saver = MemorySaver()
+    checkpointed_graph = create_main_game_graph(checkpointer=saver)
+    checkpointed_graph.invoke(GameState.from_matrix_game_setup(game_definition, settings), config=_config("checkpoints"))
+    checkpoints = [entry for namespaces in saver.storage.values() for namespace in namespaces.values() for entry in namespace.values()]
+    written_bytes = sum(len(payload) for _, payload in saver.blobs.values()) + sum(len(checkpoint[1]) for checkpoint, _, _ in checkpoints)
+
+    # Memory pass (tracemalloc distorts timings, so it gets its own run)
+    turn_memory = {}
+    tracemalloc.start()
+    initial_state = GameState.from_matrix_game_setup(game_definition, settings)
+    for values in graph.stream(initial_state, config=_config("memory"), stream_mode="values"):
+        turn = values.current_turn if isinstance(values, GameState) else values["current_turn"]
+        turn_memory[turn] = tracemalloc.get_traced_memory()[0]
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    memory = [turn_memory[turn] for turn in sorted(turn_memory)]
+    memory_per_turn = (memory[-1] - memory[0]) / (len(memory) - 1) if len(memory) > 1 else 0.0
+
+    return {
+        "turns": state.current_turn,
+        "steps": steps,
+        "wall_seconds": round(wall_seconds, 3),
+        "llm_calls": sum(stats["calls"] for stats in llm.values()),
+        "llm_seconds": round(sum(stats["seconds"] for stats in llm.values()), 3),
+        "framework_overhead_ms": round((wall_seconds - leaf_seconds - validation_seconds - serialization_seconds) * 1000, 3),
+        "node_overhead_ms": round(sum(nodes[node]["overhead_ms"] for node in nodes if node not in subgraphs), 3),
+        "validation_ms_per_step": round(validation_seconds * 1000 / steps, 4),
+        "serialization_ms_per_step": round(serialization_seconds * 1000 / steps, 4),
+        "checkpoint_bytes": checkpoint_bytes,
+        "checkpoint_write_bytes_per_step": round(written_bytes / len(checkpoints)),
+        "memory_kb_per_turn": round(memory_per_turn / 1024, 1),
+        "peak_memory_kb": round(peak_bytes / 1024, 1),
+        "nodes": nodes,
+    }
+
+
+def run_command(args):
+    os.environ[FAKE_LATENCY_ENV] = str(args.latency)
+    clear_llm_pool()
+
+    scenario_paths = sorted((ROOT / "scenarios").glob("*.json"))
+    if args.scenario:
+        scenario_paths = [p for p in scenario_paths if p.stem in args.scenario]
+
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency": args.latency,
+            "turns": args.turns,
+            "seed": args.seed,
+        },
+        "scenarios": {}
+    }
+
+    for path in scenario_paths:
+        print(f"⏱️  {path.stem}...", end=" ", flush=True)
+        metrics = benchmark_scenario(path, args.turns, args.seed)
+        results["scenarios"][path.stem] = metrics
+        print(f"{metrics['wall_seconds']}s wall, {metrics['framework_overhead_ms']}ms framework overhead, "
+              f"{metrics['validation_ms_per_step']}ms validation/step, {metrics['serialization_ms_per_step']}ms serialization/step, "
+              f"{metrics['checkpoint_write_bytes_per_step']}B written/checkpoint, "
+              f"{metrics['memory_kb_per_turn']}KB/turn")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.out}")
+
+# --- ADJUDICATION MODES ---
+
+ADJUDICATION_MODES = ("sequential", "panel")
+
+
+def _adjudicate(adjudication_graph, state, mode):
+    """Adjudicate a copy of a paused game's current argument in the given mode"""
+    mode_state = state.model_copy(deep=True)
+    mode_state.settings.adjudication_mode = mode
+    usage = UsageCounter()
+
+    started = time.perf_counter()
+    output = adjudication_graph.invoke(mode_state, config={"callbacks": [usage]})
+    seconds = time.perf_counter() - started
+
+    # Subgraphs output every field but the static ones
+    result = mode_state.model_copy(update=dict(output))
+    argument = result.current_actor_state.argument
+    return {
+        "seconds": seconds,
+        "calls": usage.calls,
+        "tokens": usage.tokens,
+        "method": argument.adjudication_method.value if argument.adjudication_method else None,
+        "probability": argument.final_probability,
+        "is_successful": argument.is_successful,
+        "cons": len(argument.cons),
+    }
+
+
+def benchmark_adjudication_modes(scenario_path, turns, seed):
+    """Judge every argument of one game with each adjudication mode and compare the results"""
+    overrides = {"game_length": turns} if turns else {}
+    game_definition = load_matrix_game(str(scenario_path), overrides)
+    graph = create_main_game_graph(checkpointer=MemorySaver())
+    adjudication_graph = create_adjudication_graph()
+
+    # The game itself proceeds with its normal adjudication; each pause only measures both modes
+    config = _config("adjudication")
+    initial_state = GameState.from_matrix_game_setup(game_definition, GameSettings(seed=seed))
+    graph.invoke(initial_state, config=config, interrupt_before=["adjudication"])
+
+    arguments = []
+    while graph.get_state(config).next:
+        state = GameState.model_validate(graph.get_state(config).values)
+        arguments.append({mode: _adjudicate(adjudication_graph, state, mode) for mode in ADJUDICATION_MODES})
+        graph.invoke(None, config=config, interrupt_before=["adjudication"])
+
+    metrics = {"arguments": len(arguments)}
+    for mode in ADJUDICATION_MODES:
+        runs = [argument[mode] for argument in arguments]
+        metrics[mode] = {
+            "mean_ms": round(statistics.mean(run["seconds"] for run in runs) * 1000, 3) if runs else 0.0,
+            "calls_per_argument": round(statistics.mean(run["calls"] for run in runs), 3) if runs else 0.0,
+            "tokens_per_argument": round(statistics.mean(run["tokens"] for run in runs), 1) if runs else 0.0,
+            "cons_per_argument": round(statistics.mean(run["cons"] for run in runs), 2) if runs else 0.0,
+            "auto_success_rate": round(sum(run["method"] == "Auto Success" for run in runs) / len(runs), 3) if runs else 0.0,
+        }
+
+    # Outcome agreement between the modes on the same arguments (and the same draws)
+    estimated = [
+        abs(argument["sequential"]["probability"] - argument["panel"]["probability"])
+        for argument in arguments
+        if argument["sequential"]["probability"] is not None and argument["panel"]["probability"] is not None
+    ]
+    metrics["agreement"] = {
+        "method": round(sum(a["sequential"]["method"] == a["panel"]["method"] for a in arguments) / len(arguments), 3) if arguments else None,
+        "outcome": round(sum(a["sequential"]["is_successful"] == a["panel"]["is_successful"] for a in arguments) / len(arguments), 3) if arguments else None,
+        "mean_probability_difference": round(statistics.mean(estimated), 3) if estimated else None,
+    }
+    return metrics
+
+
+def adjudication_command(args):
+    os.environ[FAKE_LATENCY_ENV] = str(args.latency)
+    clear_llm_pool()
+
+    scenario_paths = sorted((ROOT / "scenarios").glob("*.json"))
+    if args.scenario:
+        scenario_paths = [p for p in scenario_paths if p.stem in args.scenario]
+
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(),
+            "latency": args.latency,
+            "turns": args.turns,
+            "seed": args.seed,
+        },
+        "scenarios": {}
+    }
+
+    for path in scenario_paths:
+        print(f"⚖️  {path.stem}...", end=" ", flush=True)
+        metrics = benchmark_adjudication_modes(path, args.turns, args.seed)
+        results["scenarios"][path.stem] = metrics
+        sequential, panel, agreement = metrics["sequential"], metrics["panel"], metrics["agreement"]
+        print(f"{metrics['arguments']} arguments | sequential {sequential['mean_ms']}ms, {sequential['calls_per_argument']} calls, "
+              f"{sequential['tokens_per_argument']} tokens | panel {panel['mean_ms']}ms, {panel['calls_per_argument']} calls, "
+              f"{panel['tokens_per_argument']} tokens | agreement: method {agreement['method']}, outcome {agreement['outcome']}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.out}")
+
+# --- SERIALIZERS ---
+
+def _serializers(game_definition):
+    return {
+        "jsonplus": JsonPlusSerializer(),
+        "compact": CompactSerializer(compression="none"),
+        "compact+zstd": CompactSerializer(),
+        "compact+zstd+dict": CompactSerializer(game_definition),
+    }
+
+
+def _written_bytes_per_checkpoint(saver):
+    checkpoints = [entry for namespaces in saver.storage.values() for namespace in namespaces.values() for entry in namespace.values()]
+    written_bytes = sum(len(payload) for _, payload in saver.blobs.values()) + sum(len(checkpoint[1]) for checkpoint, _, _ in checkpoints)
+    return round(written_bytes / len(checkpoints))
+
+
+def benchmark_serializers(scenario_path, turns, seed):
+    """Encode and decode every step's state of one game with each serializer, then checkpoint the game with each"""
+    overrides = {"game_length": turns} if turns else {}
+    game_definition = load_matrix_game(str(scenario_path), overrides)
+    settings = GameSettings(seed=seed)
+    graph = create_main_game_graph()
+
+    states = []
+    for values in graph.stream(GameState.from_matrix_game_setup(game_definition, settings), config=_config("states"), stream_mode="values"):
+        states.append(values if isinstance(values, GameState) else GameState.model_validate(values))
+
+    metrics = {"steps": len(states)}
+    for name, serializer in _serializers(game_definition).items():
+        encode_seconds = decode_seconds = 0.0
+        total_bytes = 0
+        round_trip = True
+        for state in states:
+            t0 = time.perf_counter()
+            typed = serializer.dumps_typed(state)
+            t1 = time.perf_counter()
+            restored = serializer.loads_typed(typed)
+            t2 = time.perf_counter()
+
+            encode_seconds += t1 - t0
+            decode_seconds += t2 - t1
+            total_bytes += len(typed[1])
+            round_trip = round_trip and restored.model_dump_json() == state.model_dump_json()
+
+        saver = MemorySaver(serde=serializer)
+        create_main_game_graph(checkpointer=saver).invoke(GameState.from_matrix_game_setup(game_definition, settings), config=_config(name))
+
+        metrics[name] = {
+            "bytes_per_step": round(total_bytes / len(states)),
+            "encode_ms_per_step": round(encode_seconds * 1000 / len(states), 4),
+            "decode_ms_per_step": round(decode_seconds * 1000 / len(states), 4),
+            "checkpoint_write_bytes_per_step": _written_bytes_per_checkpoint(saver),
+            "round_trip": round_trip,
+        }
+    return metrics
+
+
+def serialization_command(args):
+    os.environ[FAKE_LATENCY_ENV] = "0"
+    clear_llm_pool()
+
+    scenario_paths = sorted((ROOT / "scenarios").glob("*.json"))
+    if args.scenario:
+        scenario_paths = [p for p in scenario_paths if p.stem in args.scenario]
+
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "turns": args.turns,
+            "seed": args.seed,
+        },
+        "scenarios": {}
+    }
+
+    for path in scenario_paths:
+        print(f"📦 {path.stem}...", flush=True)
+        metrics = benchmark_serializers(path, args.turns, args.seed)
+        results["scenarios"][path.stem] = metrics
+        for name, serializer in metrics.items():
+            if name == "steps":
+                continue
+            marker = "✅" if serializer["round_trip"] else "❌"
+            print(f"   {marker} {name:<18} {serializer['bytes_per_step']:>8}B/step {serializer['encode_ms_per_step']:>8}ms encode "
+                  f"{serializer['decode_ms_per_step']:>8}ms decode {serializer['checkpoint_write_bytes_per_step']:>8}B written/checkpoint")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.out}")
+
+# --- COMPARISON ---
+
+def compare_command(args):
+    with open(args.current) as f:
+        current = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for scenario, metrics in current["scenarios"].items():
+        base = baseline["scenarios"].get(scenario)
+        if base is None:
+            print(f"➖ {scenario}: not in baseline")
+            continue
+        for metric, noise_floor in COMPARED_METRICS.items():
+            if metric not in base:
+                continue
+            new, old = metrics[metric], base[metric]
+            change = (new - old) / old if old else 0.0
+            regressed = new - old > noise_floor and change > args.tolerance
+            marker = "❌" if regressed else "✅"
+            print(f"{marker} {scenario:<28} {metric:<28} {old:>12} -> {new:<12} ({change:+.1%})")
+            if regressed:
+                regressions.append((scenario, metric))
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the game graph")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmark suite")
+    run_parser.add_argument("--scenario", action="append", help="Only run this scenario (repeatable)")
+    run_parser.add_argument("--turns", type=int, default=3, help="Cap the game length of each scenario (0 = scenario default)")
+    run_parser.add_argument("--latency", type=float, default=0.01, help="Simulated model latency in seconds")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed for each game's random stream")
+    run_parser.add_argument("--out", help="Write results as JSON (e.g. a new baseline)")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare results against a baseline")
+    compare_parser.add_argument("current", help="Results JSON to check")
+    compare_parser.add_argument("baseline", help="Baseline results JSON")
+    compare_parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative increase per metric")
+
+    adjudication_parser = subparsers.add_parser("adjudication", help="Compare the sequential and panel adjudication modes")
+    adjudication_parser.add_argument("--scenario", action="append", help="Only run this scenario (repeatable)")
+    adjudication_parser.add_argument("--turns", type=int, default=3, help="Cap the game length of each scenario (0 = scenario default)")
+    adjudication_parser.add_argument("--latency", type=float, default=0.05, help="Simulated model latency in seconds")
+    adjudication_parser.add_argument("--seed", type=int, default=0, help="Seed for each game's random stream")
+    adjudication_parser.add_argument("--out", help="Write results as JSON")
+
+    serialization_parser = subparsers.add_parser("serialization", help="Compare checkpoint serializers")
+    serialization_parser.add_argument("--scenario", action="append", help="Only run this scenario (repeatable)")
+    serialization_parser.add_argument("--turns", type=int, default=3, help="Cap the game length of each scenario (0 = scenario default)")
+    serialization_parser.add_argument("--seed", type=int, default=0, help="Seed for each game's random stream")
+    serialization_parser.add_argument("--out", help="Write results as JSON")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run_command(args)
+    elif args.command == "adjudication":
+        adjudication_command(args)
+    elif args.command == "serialization":
+        serialization_command(args)
+    else:
+        compare_command(args)
+
+
+if __name__ == "__main__":
+    main()
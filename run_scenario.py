@@ -6,6 +6,8 @@ CLI script to run matrix wargame scenarios from the scenarios folder.
 import sys
 import os
 import json
+import argparse
+import multiprocessing
 from pathlib import Path
 
 # Add src to path so we can import matrix_ai
@@ -15,11 +17,27 @@ from matrix_ai import (
     run_matrix_game,
     stream_matrix_game,
     MatrixGame,
-    GameState
+    GameState,
+    GameSettings
 )
 from matrix_ai.main_game_graph import create_main_game_graph
+from matrix_ai.sweep import SweepSpec, parse_values, run_sweep
+from matrix_ai.scenario_compiler import compile_scenario, load_scenario_file
+from matrix_ai.routing import load_routing_table
+from matrix_ai.streaming import FieldStreamer
+from matrix_ai.server import run_server
+from matrix_ai.farm import GameJob
+from matrix_ai.job_queue import JobQueue, run_worker
 import uuid
 
+# How streamed long-form fields are introduced in the CLI output
+STREAMED_FIELD_LABELS = {
+    "action_description": "💭 Proposal",
+    "adjudication_narrative": "📖 Narrative",
+    "game_outcome_summary": "🏆 Outcome",
+    "narrative_conclusion": "📜 Conclusion",
+}
+
 def load_scenario(scenario_name):
     """Load a scenario from the scenarios folder."""
     scenarios_dir = Path(__file__).parent / "scenarios"
@@ -32,11 +50,7 @@ def load_scenario(scenario_name):
         return None
     
     try:
-        with open(scenario_file, 'r') as f:
-            scenario_data = json.load(f)
-        
-        scenario = MatrixGame.model_validate(scenario_data)
-        return scenario
+        return load_scenario_file(str(scenario_file))
     except Exception as e:
         print(f"❌ Error loading scenario: {e}")
         return None
@@ -71,7 +85,7 @@ def list_scenarios():
         except Exception as e:
             print(f"❌ Error reading {scenario_file.stem}: {e}")
 
-def run_scenario_streaming(scenario):
+def run_scenario_streaming(scenario, seed=None, routing=None):
     """Run a scenario with streaming output."""
     print(f"\n🎮 Running: {scenario.name}")
     print(f"📖 {scenario.description}")
@@ -81,7 +95,8 @@ def run_scenario_streaming(scenario):
     try:
         print("\n🔧 Initializing game...")
         graph = create_main_game_graph()
-        initial_state = GameState.from_matrix_game_setup(scenario)
+        initial_state = GameState.from_matrix_game_setup(scenario, GameSettings(seed=seed, routing=routing or []))
+        print(f"🎲 Seed: {initial_state.settings.seed}")
         
         config = {
             "thread_id": str(uuid.uuid4()),
@@ -95,7 +110,26 @@ def run_scenario_streaming(scenario):
         turn_count = 0
         current_actor = ""
         
-        for state_update in graph.stream(initial_state, config=config, stream_mode="values"):
+        streamer = FieldStreamer()
+        text_open = False
+
+        # "messages" carries the model tokens of the long-form fields, rendered as they arrive;
+        # subgraphs are included because deliberation and narrative nodes live in subgraphs
+        for namespace, mode, payload in graph.stream(initial_state, config=config, stream_mode=["values", "messages"], subgraphs=True):
+            if mode == "messages":
+                for delta in streamer.feed(*payload):
+                    if delta.is_first:
+                        print(f"\n   {STREAMED_FIELD_LABELS.get(delta.field, delta.field)}: ", end="")
+                    print(delta.text, end="", flush=True)
+                    text_open = True
+                continue
+            if namespace:
+                continue
+            if text_open:
+                print()
+                text_open = False
+
+            state_update = payload
             update_count += 1
             
             # Reconstruct GameState from streaming response
@@ -155,13 +189,162 @@ def run_scenario_streaming(scenario):
         import traceback
         traceback.print_exc()
 
+def run_sweep_command(argv):
+    """Run a parameter sweep over a scenario, e.g. --param game_length=4..12 --param temperature=0.3..0.9:0.3"""
+    parser = argparse.ArgumentParser(prog="run_scenario.py sweep", description="Run a parameter sweep over a scenario")
+    parser.add_argument("scenario", help="Scenario name from the scenarios folder")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUES",
+                        help="Parameter to sweep, e.g. game_length=4..12, temperature=0.3..0.9:0.3, panel_size=1,3,5")
+    parser.add_argument("--design", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=10, help="Number of points for a random design")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per design point")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pairing", choices=["independent", "common", "antithetic"], default="common",
+                        help="Seeding across runs: independent seeds, common random numbers, or antithetic pairs")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum number of concurrent games")
+    parser.add_argument("--cache", default=None, help="SQLite file for the shared LLM response cache")
+    parser.add_argument("--out", default="sweep_results.csv", help="CSV file for the results table")
+    parser.add_argument("--log-out", default=None, help="Parquet (.parquet) or Arrow IPC (.arrow) file for per-argument records")
+    parser.add_argument("--routing", default=None, help="JSON model routing table applied to every run (e.g. routing.json)")
+    args = parser.parse_args(argv)
+    
+    scenario_file = Path(__file__).parent / "scenarios" / f"{args.scenario}.json"
+    if not scenario_file.exists():
+        print(f"❌ Scenario '{args.scenario}' not found.")
+        return
+    
+    parameters = {}
+    for param in args.param:
+        name, _, values = param.partition("=")
+        parameters[name.strip()] = parse_values(values)
+    
+    spec = SweepSpec(
+        scenario_path=str(scenario_file),
+        parameters=parameters,
+        design=args.design,
+        samples=args.samples,
+        repeats=args.repeats,
+        seed=args.seed,
+        pairing=args.pairing,
+        settings={"routing": [rule.model_dump() for rule in load_routing_table(args.routing)]} if args.routing else {}
+    )
+    
+    print(f"\n🧪 Sweeping {args.scenario} over {', '.join(parameters) or 'no parameters'}")
+    
+    def report(point, result):
+        status = "✅" if result.status == "completed" else f"❌ {result.error}"
+        print(f"   {status} {point} ({result.duration_seconds:.1f}s)")
+    
+    rows = run_sweep(spec, max_workers=args.workers, cache_path=args.cache, output_path=args.out, log_path=args.log_out, on_result=report)
+    print(f"\n📊 {len(rows)} runs written to {args.out}")
+
+def compile_scenarios(scenario_names):
+    """Precompile scenarios (all of them if none are named) into cached artifacts."""
+    scenarios_dir = Path(__file__).parent / "scenarios"
+    scenario_files = [scenarios_dir / f"{name}.json" for name in scenario_names] or sorted(scenarios_dir.glob("*.json"))
+    
+    for scenario_file in scenario_files:
+        try:
+            artifact = compile_scenario(str(scenario_file))
+            print(f"✅ {scenario_file.stem} -> {artifact.name}")
+        except Exception as e:
+            print(f"❌ {scenario_file.stem}: {e}")
+
+def run_queue_command(argv):
+    """Parse queue arguments: add jobs, run workers, or show queue stats."""
+    parser = argparse.ArgumentParser(prog="run_scenario.py queue", description="Durable SQLite job queue for long-running games")
+    parser.add_argument("--db", default="games_queue.db", help="SQLite file holding the queue")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    
+    add_parser = subparsers.add_parser("add", help="Queue games of a scenario")
+    add_parser.add_argument("scenario", help="Scenario name from the scenarios folder")
+    add_parser.add_argument("--count", type=int, default=1, help="Number of games to queue")
+    add_parser.add_argument("--seed", type=int, default=None, help="Seed of the first game (incremented per game)")
+    add_parser.add_argument("--max-attempts", type=int, default=3, help="Attempts per game before it is marked failed")
+    add_parser.add_argument("--routing", default=None, help="JSON model routing table (e.g. routing.json)")
+    
+    work_parser = subparsers.add_parser("work", help="Run queue workers")
+    work_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    work_parser.add_argument("--checkpoints", default="games_checkpoints.db", help="SQLite file for game checkpoints")
+    work_parser.add_argument("--worker-id", default=None, help="Stable worker id, so a restarted worker resumes its own games at once")
+    work_parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    work_parser.add_argument("--keep-checkpoints", action="store_true", help="Keep checkpoints of completed games")
+    work_parser.add_argument("--compact-checkpoints", action="store_true", help="Write checkpoints as compressed compact binary (needs the compact extra)")
+    
+    subparsers.add_parser("stats", help="Show queue depth and throughput")
+    args = parser.parse_args(argv)
+    
+    queue = JobQueue(args.db)
+    if args.action == "add":
+        scenario_file = Path(__file__).parent / "scenarios" / f"{args.scenario}.json"
+        if not scenario_file.exists():
+            print(f"❌ Scenario '{args.scenario}' not found.")
+            return
+        settings = {"routing": [rule.model_dump() for rule in load_routing_table(args.routing)]} if args.routing else {}
+        for i in range(args.count):
+            seed = args.seed + i if args.seed is not None else None
+            job_id = queue.enqueue(GameJob(scenario_path=str(scenario_file), seed=seed, settings=settings), max_attempts=args.max_attempts)
+            print(f"📥 {job_id}")
+    elif args.action == "work":
+        queue.close()
+        worker_args = dict(queue_path=args.db, checkpoint_path=args.checkpoints, stop_when_empty=args.drain, keep_checkpoints=args.keep_checkpoints, compact_checkpoints=args.compact_checkpoints)
+        print(f"👷 Starting {args.workers} worker(s) on {args.db}")
+        if args.workers == 1:
+            run_worker(worker_id=args.worker_id, **worker_args)
+        else:
+            processes = [
+                multiprocessing.Process(target=run_worker, kwargs={**worker_args, "worker_id": f"{args.worker_id}-{i}" if args.worker_id else None})
+                for i in range(args.workers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        print(f"📊 {JobQueue(args.db).stats()}")
+    else:
+        for name, value in queue.stats().items():
+            print(f"   {name}: {value}")
+
+def run_serve_command(argv):
+    """Parse serve arguments and run the multi-game HTTP server."""
+    parser = argparse.ArgumentParser(prog="run_scenario.py serve", description="Serve games over HTTP, streaming progress as server-sent events")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--max-games", type=int, default=4, help="Games running at the same time")
+    parser.add_argument("--max-queued", type=int, default=16, help="Games waiting for a slot; further requests are refused with 503")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Model requests per second across all games (default: unlimited)")
+    parser.add_argument("--routing", default=None, help="JSON model routing table applied to every game (e.g. routing.json)")
+    parser.add_argument("--session-ttl", type=float, default=3600.0, help="Seconds a finished game's results are kept")
+    parser.add_argument("--max-finished", type=int, default=64, help="Finished games kept at most; the oldest are forgotten first")
+    args = parser.parse_args(argv)
+
+    base_settings = {}
+    if args.routing:
+        base_settings["routing"] = [rule.model_dump() for rule in load_routing_table(args.routing)]
+
+    print(f"🌐 Serving games on http://{args.host}:{args.port} ({args.max_games} at a time, {args.max_queued} queued)")
+    run_server(
+        args.host,
+        args.port,
+        max_games=args.max_games,
+        max_queued=args.max_queued,
+        requests_per_second=args.rate_limit,
+        base_settings=base_settings,
+        session_ttl_seconds=args.session_ttl,
+        max_finished_sessions=args.max_finished
+    )
+
 def main():
     """Main CLI function."""
     if len(sys.argv) < 2:
         print("🎯 Matrix Wargame Scenario Runner")
         print("\nUsage:")
         print("  python run_scenario.py list              # List available scenarios")
-        print("  python run_scenario.py <scenario-name>   # Run a scenario")
+        print("  python run_scenario.py <scenario-name> [--seed N]   # Run a scenario")
+        print("  python run_scenario.py sweep <scenario-name> --param NAME=VALUES ...   # Run a parameter sweep")
+        print("  python run_scenario.py compile [scenario-name ...]   # Precompile scenarios")
+        print("  python run_scenario.py queue {add,work,stats} ...   # Durable job queue for long games")
+        print("  python run_scenario.py serve [--port N] [--max-games N]   # Serve games over HTTP with SSE progress")
         print("\nExample:")
         print("  python run_scenario.py diplomatic-crisis")
         return
@@ -170,10 +353,25 @@ def main():
     
     if command == "list":
         list_scenarios()
+    elif command == "sweep":
+        run_sweep_command(sys.argv[2:])
+    elif command == "compile":
+        compile_scenarios(sys.argv[2:])
+    elif command == "queue":
+        run_queue_command(sys.argv[2:])
+    elif command == "serve":
+        run_serve_command(sys.argv[2:])
     else:
-        scenario = load_scenario(command)
+        parser = argparse.ArgumentParser(prog="run_scenario.py", description="Run a scenario")
+        parser.add_argument("scenario", help="Scenario name from the scenarios folder")
+        parser.add_argument("--seed", type=int, default=None, help="Seed for the game's random stream (replays a previous run)")
+        parser.add_argument("--routing", default=None, help="JSON model routing table (e.g. routing.json)")
+        args = parser.parse_args(sys.argv[1:])
+        
+        scenario = load_scenario(args.scenario)
         if scenario:
-            run_scenario_streaming(scenario)
+            routing = load_routing_table(args.routing) if args.routing else None
+            run_scenario_streaming(scenario, seed=args.seed, routing=routing)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -4,6 +4,7 @@ __version__ = "0.1.0"
 
 from .schemas import (
     GameState,
+    GameSettings,
     MatrixGame,
     Actor,
     ForceUnit,
@@ -14,15 +15,18 @@ from .schemas import (
     EndGameAssessmentResponse,
     ObjectiveAssessment,
     ForceUpdate,
+    WorldState,
 )
 
 from .adjudication import create_adjudication_graph
 from .argumentation import create_argumentation_graph
 from .scenario_update import create_scenario_update_graph
 from .main_game_graph import create_main_game_graph, run_matrix_game, stream_matrix_game
+from .farm import GameJob, GameResult, run_game_farm, iter_game_farm
 
 __all__ = [
     "GameState",
+    "GameSettings",
     "MatrixGame", 
     "Actor",
     "ForceUnit",
@@ -33,10 +37,15 @@ __all__ = [
     "EndGameAssessmentResponse", 
     "ObjectiveAssessment",
     "ForceUpdate",
+    "WorldState",
     "create_adjudication_graph",
     "create_argumentation_graph",
     "create_scenario_update_graph",
     "create_main_game_graph",
     "run_matrix_game",
     "stream_matrix_game",
+    "GameJob",
+    "GameResult",
+    "run_game_farm",
+    "iter_game_farm",
 ] 
\ No newline at end of file
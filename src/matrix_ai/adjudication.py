@@ -1,7 +1,5 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, START, END
-import random
 import statistics
 import uuid
 from datetime import datetime
@@ -9,8 +7,15 @@ from datetime import datetime
 from .schemas import (
     GameState, ArgumentStatus, AdjudicationMethod, LogEntry, LogEntryType, 
     CriticResponse, AdjudicationMethodResponse, EstProbabilityResponse,
-    SecretArgumentTriggerResponse, GamePhase
+    PanelAdjudicationResponse, SecretArgumentTriggerResponse, GamePhase, ArgumentVariant,
+    StateUpdate, SubgraphOutput
 )
+from .llm import get_node_llm
+from .call_policy import call_llm, call_llm_batch, mark_degraded, LLMCallError
+from .rng import draw_uniform
+from .log_store import append_log_entry
+from .method_classifier import extract_features, classify, record_decision
+from .markers import dedupe_texts
 
 # --- PROMPTS ---
 
@@ -128,9 +133,43 @@ Execution Obstacles (Cons): {cons}
 Estimate the probability of successful execution (0.0 to 1.0) based on the likelihood of completing this action and provide your reasoning.""")
 ])
 
+PANEL_ADJUDICATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a member of an adjudication panel in a matrix wargame. Each panelist independently reviews a proposed action and gives a full assessment of whether the actor will SUCCESSFULLY EXECUTE it.
+
+Provide three things:
+1. Counter-arguments (cons): realistic obstacles that could prevent successful execution of the action, such as:
+   - Insufficient resources, authority, or capabilities of the actor
+   - Technical/practical barriers or limitations preventing execution
+   - Opposition or interference from other actors that could block execution
+   - External obstacles, timing issues, or unfavorable conditions
+   - Missing prerequisites, access, or support needed for execution
+   - Any revealed secret arguments that would interfere with execution
+2. Your vote for the adjudication method:
+   - AUTO_SUCCESS: the actor is very likely to successfully execute the action with minimal execution obstacles
+   - ESTIMATIVE_PROBABILITY: there are meaningful execution obstacles or uncertainties about successful completion
+3. The probability of successful execution (0.0 to 1.0), with your reasoning.
+
+DO NOT focus on whether the action is strategically wise or what its long-term consequences might be. Focus ONLY on the likelihood that the action will be successfully COMPLETED as proposed. Simple actions like "making a public statement" should succeed automatically unless there are specific execution barriers (e.g., lack of communication channels, censorship, technical failures, etc.).
+
+Game Context:
+{game_context}
+
+Current Actor: {actor_name}
+Actor Objectives: {actor_objectives}
+Actor Capabilities: {actor_forces}
+
+Triggered Secret Arguments: {triggered_secrets}"""),
+    ("human", """Argument to Adjudicate:
+Action: {action_description}
+Execution Reasons (Pros): {pros}
+Known Execution Obstacles (Cons): {cons}
+
+Provide your cons, your adjudication method vote and your probability of successful execution.""")
+])
+
 # --- NODE FUNCTIONS ---
 
-def check_secret_triggers(state: GameState) -> GameState:
+def check_secret_triggers(state: GameState) -> StateUpdate:
     """Node to check if the proposed action triggers any secret arguments from any actor"""
     
     current_actor_state = state.current_actor_state
@@ -138,11 +177,11 @@ def check_secret_triggers(state: GameState) -> GameState:
     
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for secret trigger check")
-        return state
+        return {}
     
     if not current_actor:
         print("Warning: No current actor definition found for secret trigger check")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
     
@@ -160,24 +199,23 @@ def check_secret_triggers(state: GameState) -> GameState:
     
     if not all_pending_secrets:
         # No pending secrets, continue without triggering
-        return state
+        return {}
     
     # Prepare context
     game_context = f"""
-Game: {state.game_definition.name}
-Background: {state.game_definition.background_briefing}
+{state.game_definition.fragments().game_header}
 Current Turn: {state.current_turn}
 Current Game State: {state.game_state_summary}
 """
     
     # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.3)
+    llm = get_node_llm(state, "check_secret_triggers", temperature=0.3)
     
     # Create secret trigger chain
     trigger_chain = SECRET_TRIGGER_CHECK_PROMPT | llm.with_structured_output(SecretArgumentTriggerResponse)
     
     try:
-        trigger_response = trigger_chain.invoke({
+        trigger_response = call_llm(state, "check_secret_triggers", trigger_chain, {
             "game_context": game_context,
             "actor_name": current_actor.actor_name,
             "action_description": current_argument.action_description,
@@ -208,16 +246,17 @@ Current Game State: {state.game_state_summary}
                             content=f"Secret argument triggered by {current_actor.actor_name}'s proposed action: {secret_arg.action_description}",
                             summary=f"Secret argument revealed: {secret_arg.proposing_actor_name}"
                         )
-                        state.game_log.append(trigger_log)
+                        append_log_entry(state, trigger_log)
                         break
         
-    except Exception as e:
+    except LLMCallError as e:
         print(f"Error checking secret triggers: {e}")
         # Continue without triggering secrets
+        mark_degraded(state, "check_secret_triggers")
     
-    return state
+    return state.delta("actor_states", "triggered_secrets_this_turn")
 
-def gather_critic_feedback(state: GameState) -> GameState:
+def gather_critic_feedback(state: GameState) -> StateUpdate:
     """Node to gather critic feedback on the argument"""
     
     # Don't set phase here - phases only change between subgraphs
@@ -228,18 +267,17 @@ def gather_critic_feedback(state: GameState) -> GameState:
     
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for critic feedback")
-        return state
+        return {}
     
     if not current_actor:
         print("Warning: No current actor definition found for critic feedback")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
     
     # Prepare context for critic
     game_context = f"""
-Game: {state.game_definition.name}
-Background: {state.game_definition.background_briefing}
+{state.game_definition.fragments().game_header}
 Current Turn: {state.current_turn}
 Game State Summary: {state.game_state_summary}
 """
@@ -249,14 +287,14 @@ Game State Summary: {state.game_state_summary}
     triggered_secrets_str = "\n".join(triggered_secrets) if triggered_secrets else "None"
     
     # Initialize LLM for critic
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.7)
+    llm = get_node_llm(state, "gather_critic_feedback", temperature=0.7)
     
     # Create critic chain
     critic_chain = CRITIC_PROMPT | llm.with_structured_output(CriticResponse)
     
     try:
         # Get critic response
-        critic_response = critic_chain.invoke({
+        critic_response = call_llm(state, "gather_critic_feedback", critic_chain, {
             "game_context": game_context,
             "actor_name": current_actor.actor_name,
             "actor_objectives": current_actor.objectives,
@@ -269,15 +307,16 @@ Game State Summary: {state.game_state_summary}
         current_argument.cons.extend(critic_response.cons)
         current_argument.status = ArgumentStatus.UNDER_REVIEW
         
-    except Exception as e:
+    except LLMCallError as e:
         print(f"Error in critic feedback: {e}")
         # Continue without critic feedback
+        mark_degraded(state, "gather_critic_feedback")
     
     # Don't set phase here - only at subgraph boundaries
     
-    return state
+    return state.delta(actor_states=[current_actor_state])
 
-def determine_adjudication_method(state: GameState) -> GameState:
+def determine_adjudication_method(state: GameState) -> StateUpdate:
     """Node to determine the adjudication method"""
     
     # Don't set phase here - it was already set by the previous node
@@ -285,13 +324,12 @@ def determine_adjudication_method(state: GameState) -> GameState:
     current_actor_state = state.current_actor_state
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for adjudication method determination")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
     
     game_context = f"""
-Game: {state.game_definition.name}
-Background: {state.game_definition.background_briefing}
+{state.game_definition.fragments().game_header}
 Current Turn: {state.current_turn}
 """
     
@@ -299,14 +337,28 @@ Current Turn: {state.current_turn}
     triggered_secrets = state.triggered_secrets_this_turn
     triggered_secrets_str = "\n".join(triggered_secrets) if triggered_secrets else "None"
     
+    # Let the heuristic classifier decide confident cases before asking the LLM
+    classifier_mode = state.settings.method_classifier
+    if classifier_mode != "off":
+        current_argument.method_features = extract_features(current_argument, state)
+        current_argument.heuristic_method = classify(state.settings.method_classifier_model, current_argument.method_features)
+        
+        if classifier_mode == "on":
+            record_decision(current_argument.heuristic_method)
+            if current_argument.heuristic_method is not None:
+                current_argument.adjudication_method = current_argument.heuristic_method
+                current_argument.method_source = "heuristic"
+                current_argument.status = ArgumentStatus.AWAITING_ADJUDICATION
+                return state.delta(actor_states=[current_actor_state])
+    
     # Initialize LLM for umpire
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.3)
+    llm = get_node_llm(state, "determine_adjudication_method", temperature=0.3)
     
     # Create adjudication method chain
     method_chain = ADJUDICATION_METHOD_PROMPT | llm.with_structured_output(AdjudicationMethodResponse)
     
     try:
-        method_response = method_chain.invoke({
+        method_response = call_llm(state, "determine_adjudication_method", method_chain, {
             "game_context": game_context,
             "action_description": current_argument.action_description,
             "pros": current_argument.pros,
@@ -315,23 +367,29 @@ Current Turn: {state.current_turn}
         })
         
         current_argument.adjudication_method = method_response.method
+        current_argument.method_source = "llm"
         current_argument.status = ArgumentStatus.AWAITING_ADJUDICATION
         
-    except Exception as e:
+        if classifier_mode == "shadow":
+            record_decision(current_argument.heuristic_method, method_response.method)
+        
+    except LLMCallError as e:
         print(f"Error determining adjudication method: {e}")
         # Default to estimative probability
+        mark_degraded(state, "determine_adjudication_method")
         current_argument.adjudication_method = AdjudicationMethod.ESTIMATIVE_PROBABILITY
+        current_argument.method_source = "fallback"
         current_argument.status = ArgumentStatus.AWAITING_ADJUDICATION
     
-    return state
+    return state.delta(actor_states=[current_actor_state])
 
-def handle_auto_success(state: GameState) -> GameState:
+def handle_auto_success(state: GameState) -> StateUpdate:
     """Node to handle auto success adjudication"""
     
     current_actor_state = state.current_actor_state
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for auto success handling")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
     
@@ -343,9 +401,9 @@ def handle_auto_success(state: GameState) -> GameState:
     # Set phase for what's coming next (state update subgraph)
     state.current_phase = GamePhase.STATE_UPDATE
     
-    return state
+    return state.delta("current_phase", actor_states=[current_actor_state])
 
-def estimate_probability(state: GameState) -> GameState:
+def estimate_probability(state: GameState) -> StateUpdate:
     """Node to gather probability estimates from AI panel"""
     
     current_actor = state.current_actor_definition
@@ -353,17 +411,16 @@ def estimate_probability(state: GameState) -> GameState:
     
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for probability estimation")
-        return state
+        return {}
     
     if not current_actor:
         print("Warning: No current actor definition found for probability estimation")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
     
     game_context = f"""
-Game: {state.game_definition.name}
-Background: {state.game_definition.background_briefing}
+{state.game_definition.fragments().game_header}
 Current Turn: {state.current_turn}
 Game State Summary: {state.game_state_summary}
 """
@@ -373,83 +430,183 @@ Game State Summary: {state.game_state_summary}
     triggered_secrets_str = "\n".join(triggered_secrets) if triggered_secrets else "None"
     
     # Initialize LLM for probability estimation
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.5)
+    llm = get_node_llm(state, "estimate_probability", temperature=0.5)
     
     # Create probability estimation chain
     prob_chain = PROBABILITY_ESTIMATION_PROMPT | llm.with_structured_output(EstProbabilityResponse)
     
     # Prepare batch inputs for multiple estimates (simulating AI panel)
-    num_estimates = 3
+    num_estimates = max(1, state.settings.probability_panel_size)
     batch_inputs = []
     for i in range(num_estimates):
         batch_inputs.append({
             "game_context": game_context,
             "actor_name": current_actor.actor_name,
-            "actor_forces": [f.unit_name for f in current_actor_state.current_forces],
+            "actor_forces": list(state.world.forces.get(current_actor_state.actor_name, {})),
             "action_description": current_argument.action_description,
             "pros": current_argument.pros,
             "cons": current_argument.cons,
             "triggered_secrets": triggered_secrets_str
         })
     
-    try:
-        # Use batch to get all estimates at once
-        estimates = prob_chain.batch(batch_inputs)
-        
-        # Process the batch results
-        for prob_response in estimates:
-            current_argument.probability_estimates.append(prob_response.success_probability)
-            
-    except Exception as e:
-        print(f"Error in batch probability estimation: {e}")
+    # Each panel member gets the full call policy; the panel shrinks to the members that answered
+    responses = call_llm_batch(state, "estimate_probability", prob_chain, batch_inputs)
+    estimates = [response for response in responses if not isinstance(response, LLMCallError)]
+    
+    if len(estimates) < len(responses):
+        print(f"Error in batch probability estimation: {len(responses) - len(estimates)} of {len(responses)} estimates failed")
+        mark_degraded(state, "estimate_probability")
+    
+    if not estimates:
         # Add default estimates
-        estimates = []
-        for i in range(num_estimates):
-            current_argument.probability_estimates.append(0.5)
-            estimates.append(EstProbabilityResponse(
-                success_probability=0.5,
-                reasoning="Default estimate due to estimation error"
-            ))
+        estimates = [
+            EstProbabilityResponse(success_probability=0.5, reasoning="Default estimate due to estimation error")
+            for _ in range(num_estimates)
+        ]
+    
+    for prob_response in estimates:
+        current_argument.probability_estimates.append(prob_response.success_probability)
     
     # Calculate median probability
     probabilities = [est.success_probability for est in estimates]
     current_argument.final_probability = statistics.median(probabilities)
     
-    return state
+    return state.delta(actor_states=[current_actor_state])
 
-def evaluate_success(state: GameState) -> GameState:
-    """Node to evaluate success based on estimated probability"""
+def panel_adjudication(state: GameState) -> StateUpdate:
+    """
+    Node to adjudicate an argument with a single round of panel calls (adjudication_mode='panel').
+
+    Replaces the critic, method and probability calls: each of probability_panel_size
+    panelists returns cons, a method vote and a probability in one structured response,
+    the panel runs as one batch, and the answers are aggregated locally (the union of
+    deduplicated cons, the majority method with ties going to estimative probability,
+    and the median probability). The method classifier is not consulted, since the
+    method vote costs no extra call here.
+    """
     
     current_actor_state = state.current_actor_state
+    current_actor = state.current_actor_definition
+    
     if not current_actor_state or not current_actor_state.argument:
-        print("Warning: No current actor state or argument found for success evaluation")
-        return state
+        print("Warning: No current actor state or argument found for panel adjudication")
+        return {}
+    
+    if not current_actor:
+        print("Warning: No current actor definition found for panel adjudication")
+        return {}
     
     current_argument = current_actor_state.argument
     
-    if current_argument.final_probability is None:
+    game_context = f"""
+{state.game_definition.fragments().game_header}
+Current Turn: {state.current_turn}
+Game State Summary: {state.game_state_summary}
+"""
+    
+    # Get triggered secrets info
+    triggered_secrets = state.triggered_secrets_this_turn
+    triggered_secrets_str = "\n".join(triggered_secrets) if triggered_secrets else "None"
+    
+    # Initialize LLM for the panel
+    llm = get_node_llm(state, "panel_adjudication", temperature=0.5)
+    
+    # Create panel chain
+    panel_chain = PANEL_ADJUDICATION_PROMPT | llm.with_structured_output(PanelAdjudicationResponse)
+    
+    num_panelists = max(1, state.settings.probability_panel_size)
+    panel_input = {
+        "game_context": game_context,
+        "actor_name": current_actor.actor_name,
+        "actor_objectives": current_actor.objectives,
+        "actor_forces": list(state.world.forces.get(current_actor_state.actor_name, {})),
+        "action_description": current_argument.action_description,
+        "pros": current_argument.pros,
+        "cons": current_argument.cons,
+        "triggered_secrets": triggered_secrets_str
+    }
+    
+    # Each panelist gets the full call policy; the panel shrinks to the panelists that answered
+    responses = call_llm_batch(state, "panel_adjudication", panel_chain, [panel_input] * num_panelists)
+    panel = [response for response in responses if not isinstance(response, LLMCallError)]
+    
+    if len(panel) < len(responses):
+        print(f"Error in panel adjudication: {len(responses) - len(panel)} of {len(responses)} panelists failed")
+        mark_degraded(state, "panel_adjudication")
+    
+    current_argument.status = ArgumentStatus.AWAITING_ADJUDICATION
+    
+    if not panel:
+        # Same defaults as the sequential path: no cons, estimative probability, even odds
+        current_argument.adjudication_method = AdjudicationMethod.ESTIMATIVE_PROBABILITY
+        current_argument.method_source = "fallback"
+        current_argument.probability_estimates.append(0.5)
         current_argument.final_probability = 0.5
+        return state.delta(actor_states=[current_actor_state])
     
-    # Use a threshold approach instead of dice rolling
-    threshold = random.random()
-    is_successful = threshold <= current_argument.final_probability
+    current_argument.cons = dedupe_texts(
+        current_argument.cons + [con for response in panel for con in response.cons],
+        state.settings.marker_similarity_threshold
+    )
     
-    # Update argument status
-    if is_successful:
-        current_argument.status = ArgumentStatus.ADJUDICATED_SUCCESS
+    # Majority vote; a tie means the panel is unsure, so the argument is estimated
+    auto_votes = sum(1 for response in panel if response.method == AdjudicationMethod.AUTO_SUCCESS)
+    if auto_votes * 2 > len(panel):
+        current_argument.adjudication_method = AdjudicationMethod.AUTO_SUCCESS
     else:
-        current_argument.status = ArgumentStatus.ADJUDICATED_FAILURE
+        current_argument.adjudication_method = AdjudicationMethod.ESTIMATIVE_PROBABILITY
+    current_argument.method_source = "panel"
+    
+    probabilities = [min(1.0, max(0.0, response.success_probability)) for response in panel]
+    current_argument.probability_estimates.extend(probabilities)
+    current_argument.final_probability = statistics.median(probabilities)
+    
+    return state.delta(actor_states=[current_actor_state])
+
+def apply_outcome(argument: ArgumentVariant, is_successful: bool) -> None:
+    """Record an estimative-probability outcome on an argument"""
+    argument.is_successful = is_successful
+    argument.status = ArgumentStatus.ADJUDICATED_SUCCESS if is_successful else ArgumentStatus.ADJUDICATED_FAILURE
+
+
+def evaluate_success(state: GameState) -> StateUpdate:
+    """Node to evaluate success based on estimated probability"""
+    
+    current_actor_state = state.current_actor_state
+    if not current_actor_state or not current_actor_state.argument:
+        print("Warning: No current actor state or argument found for success evaluation")
+        return {}
+    
+    current_argument = current_actor_state.argument
+    
+    if current_argument.final_probability is None:
+        current_argument.final_probability = 0.5
     
     current_argument.adjudication_method = AdjudicationMethod.ESTIMATIVE_PROBABILITY
-    current_argument.is_successful = is_successful
     
     # Set phase for what's coming next (state update subgraph)
     state.current_phase = GamePhase.STATE_UPDATE
     
-    return state
+    # In branching mode the outcome is left open; the branching engine forks the game here
+    if state.settings.branching:
+        return state.delta("current_phase", actor_states=[current_actor_state])
+    
+    # Use a threshold approach instead of dice rolling, drawn from the game's own random stream
+    threshold = draw_uniform(state, "success")
+    apply_outcome(current_argument, threshold <= current_argument.final_probability)
+    
+    return state.delta("current_phase", actor_states=[current_actor_state])
 
 # --- CONDITIONAL EDGES ---
 
+def route_adjudication_mode(state: GameState) -> str:
+    """Conditional edge choosing between the sequential calls and the single panel round"""
+    return "panel_adjudication" if state.settings.adjudication_mode == "panel" else "gather_critics"
+
+def should_panel_auto_succeed(state: GameState) -> str:
+    """Conditional edge after the panel: auto success, or a draw against the panel's median probability"""
+    return "auto_success" if should_auto_succeed(state) == "auto_success" else "evaluate_success"
+
 def should_auto_succeed(state: GameState) -> str:
     """Conditional edge to determine if argument should auto-succeed"""
     current_actor_state = state.current_actor_state
@@ -469,7 +626,7 @@ def create_adjudication_graph() -> StateGraph:
     """Create the adjudication workflow graph"""
     
     # Create the graph
-    workflow = StateGraph(GameState)
+    workflow = StateGraph(GameState, output_schema=SubgraphOutput)
     
     # Add nodes
     workflow.add_node("check_secret_triggers", check_secret_triggers)
@@ -478,10 +635,18 @@ def create_adjudication_graph() -> StateGraph:
     workflow.add_node("auto_success", handle_auto_success)
     workflow.add_node("estimate_probability", estimate_probability)
     workflow.add_node("evaluate_success", evaluate_success)
+    workflow.add_node("panel_adjudication", panel_adjudication)
     
     # Add edges
     workflow.add_edge(START, "check_secret_triggers")
-    workflow.add_edge("check_secret_triggers", "gather_critics")
+    workflow.add_conditional_edges(
+        "check_secret_triggers",
+        route_adjudication_mode,
+        {
+            "gather_critics": "gather_critics",
+            "panel_adjudication": "panel_adjudication"
+        }
+    )
     workflow.add_edge("gather_critics", "determine_method")
     workflow.add_conditional_edges(
         "determine_method",
@@ -491,6 +656,14 @@ def create_adjudication_graph() -> StateGraph:
             "estimate_probability": "estimate_probability"
         }
     )
+    workflow.add_conditional_edges(
+        "panel_adjudication",
+        should_panel_auto_succeed,
+        {
+            "auto_success": "auto_success",
+            "evaluate_success": "evaluate_success"
+        }
+    )
     workflow.add_edge("auto_success", END)
     workflow.add_edge("estimate_probability", "evaluate_success")
     workflow.add_edge("evaluate_success", END)
@@ -0,0 +1,185 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: pip install -e ".[analytics]"
+    np = None
+
+try:
+    import pyarrow.compute as pc
+except ImportError:  # Only needed for OutcomeArrays.from_table
+    pc = None
+
+# Vectorized outcome analytics over many adjudicated arguments from many runs.
+# Input is the flattened record format produced by matrix_ai.export (either a list
+# of record dicts or an Arrow table read back with read_game_logs).
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("numpy is required for analytics. Install it with: pip install -e \".[analytics]\"")
+
+
+def _pad_ragged(values: "np.ndarray", lengths: "np.ndarray") -> "np.ndarray":
+    """Turn flat values plus per-row lengths into a NaN-padded 2D array, without a Python loop"""
+    rows = len(lengths)
+    width = int(lengths.max()) if rows else 0
+    matrix = np.full((rows, width), np.nan)
+    if values.size:
+        starts = np.cumsum(lengths) - lengths
+        row_index = np.repeat(np.arange(rows), lengths)
+        col_index = np.arange(values.size) - np.repeat(starts, lengths)
+        matrix[row_index, col_index] = values
+    return matrix
+
+# --- ENSEMBLE ARRAYS ---
+
+@dataclass
+class OutcomeArrays:
+    """Column arrays for every adjudicated argument in an ensemble."""
+    run_ids: "np.ndarray"            # str, one per argument
+    actors: "np.ndarray"             # str, one per argument
+    turns: "np.ndarray"              # int
+    final_probability: "np.ndarray"  # float, NaN when not estimated (e.g. auto success)
+    success: "np.ndarray"            # float 1.0 / 0.0, NaN when not adjudicated
+    estimates: "np.ndarray"          # float (arguments x panel size), NaN padded
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "OutcomeArrays":
+        """Build arrays from flattened records, keeping only argument entries"""
+        _require_numpy()
+        records = [r for r in records if r.get("entry_type") == "Argument"]
+        estimates = [r.get("probability_estimates") or [] for r in records]
+
+        return cls(
+            run_ids=np.array([r["run_id"] for r in records], dtype=str),
+            actors=np.array([r["actor"] or "" for r in records], dtype=str),
+            turns=np.array([r["turn"] for r in records], dtype=int),
+            final_probability=np.array([r["final_probability"] for r in records], dtype=float),
+            success=np.array([r["is_successful"] for r in records], dtype=float),
+            estimates=_pad_ragged(
+                np.array([p for row in estimates for p in row], dtype=float),
+                np.array([len(row) for row in estimates], dtype=int)
+            ),
+        )
+
+    @classmethod
+    def from_table(cls, table: Any) -> "OutcomeArrays":
+        """Build arrays from an Arrow table of flattened records, using the column buffers directly"""
+        _require_numpy()
+        if pc is None:
+            raise ImportError("pyarrow is required to read Arrow tables. Install it with: pip install -e \".[analytics]\"")
+        table = table.filter(pc.equal(table["entry_type"], "Argument"))
+        estimates = table["probability_estimates"].combine_chunks()
+        lengths = pc.fill_null(pc.list_value_length(estimates), 0).to_numpy(zero_copy_only=False)
+
+        return cls(
+            run_ids=table["run_id"].to_numpy(zero_copy_only=False).astype(str),
+            actors=pc.fill_null(table["actor"], "").to_numpy(zero_copy_only=False).astype(str),
+            turns=table["turn"].to_numpy(zero_copy_only=False).astype(int),
+            final_probability=pc.cast(table["final_probability"], "double").to_numpy(zero_copy_only=False).astype(float),
+            success=pc.cast(table["is_successful"], "double").to_numpy(zero_copy_only=False).astype(float),
+            estimates=_pad_ragged(
+                pc.list_flatten(estimates).to_numpy(zero_copy_only=False).astype(float),
+                lengths.astype(int)
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.run_ids)
+
+# --- ANALYTICS ---
+
+def calibration_curve(arrays: OutcomeArrays, bins: int = 10) -> Dict[str, List[float]]:
+    """
+    Estimated probability vs. realized success rate, in equal-width probability bins.
+
+    Only arguments with both a final probability and an outcome are used. Also
+    returns the Brier score over the same arguments.
+    """
+    _require_numpy()
+    mask = ~np.isnan(arrays.final_probability) & ~np.isnan(arrays.success)
+    predicted = arrays.final_probability[mask]
+    observed = arrays.success[mask]
+
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    bin_index = np.clip(np.digitize(predicted, edges[1:-1]), 0, bins - 1)
+    counts = np.bincount(bin_index, minlength=bins)
+    predicted_sum = np.bincount(bin_index, weights=predicted, minlength=bins)
+    observed_sum = np.bincount(bin_index, weights=observed, minlength=bins)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_predicted = predicted_sum / counts
+        observed_rate = observed_sum / counts
+
+    return {
+        "bin_edges": edges.tolist(),
+        "mean_predicted": mean_predicted.tolist(),
+        "observed_rate": observed_rate.tolist(),
+        "counts": counts.tolist(),
+        "brier_score": float(np.mean((predicted - observed) ** 2)) if predicted.size else float("nan"),
+    }
+
+
+def panel_dispersion(arrays: OutcomeArrays) -> Dict[str, Any]:
+    """Spread of the probability panel per argument (std and range), plus ensemble summaries"""
+    _require_numpy()
+    estimates = arrays.estimates
+    panel_size = (~np.isnan(estimates)).sum(axis=1) if estimates.size else np.zeros(len(arrays), dtype=int)
+    has_panel = panel_size >= 2
+
+    std = np.full(len(arrays), np.nan)
+    spread = np.full(len(arrays), np.nan)
+    if has_panel.any():
+        with np.errstate(invalid="ignore"):
+            std[has_panel] = np.nanstd(estimates[has_panel], axis=1)
+            spread[has_panel] = np.nanmax(estimates[has_panel], axis=1) - np.nanmin(estimates[has_panel], axis=1)
+
+    return {
+        "std": std,
+        "range": spread,
+        "panels": int(has_panel.sum()),
+        "mean_std": float(np.nanmean(std)) if has_panel.any() else float("nan"),
+        "mean_range": float(np.nanmean(spread)) if has_panel.any() else float("nan"),
+        "p90_range": float(np.nanpercentile(spread, 90)) if has_panel.any() else float("nan"),
+    }
+
+
+def actor_success_rates(arrays: OutcomeArrays) -> Dict[str, Dict[str, float]]:
+    """
+    Per-actor success statistics across the ensemble.
+
+    For each actor: number of adjudicated arguments, successes, realized success rate,
+    and the success count expected from the final probabilities (auto successes count
+    as probability 1.0).
+    """
+    _require_numpy()
+    adjudicated = ~np.isnan(arrays.success)
+    actors, actor_index = np.unique(arrays.actors[adjudicated], return_inverse=True)
+    success = arrays.success[adjudicated]
+    expected = np.where(np.isnan(arrays.final_probability[adjudicated]), 1.0, arrays.final_probability[adjudicated])
+
+    counts = np.bincount(actor_index, minlength=len(actors))
+    successes = np.bincount(actor_index, weights=success, minlength=len(actors))
+    expected_successes = np.bincount(actor_index, weights=expected, minlength=len(actors))
+
+    return {
+        str(actor): {
+            "arguments": int(counts[i]),
+            "successes": int(successes[i]),
+            "success_rate": float(successes[i] / counts[i]),
+            "expected_successes": float(expected_successes[i]),
+        }
+        for i, actor in enumerate(actors)
+    }
+
+
+def run_success_rates(arrays: OutcomeArrays) -> Dict[str, float]:
+    """Realized success rate per run, for spotting outlier runs across the ensemble"""
+    _require_numpy()
+    adjudicated = ~np.isnan(arrays.success)
+    runs, run_index = np.unique(arrays.run_ids[adjudicated], return_inverse=True)
+    counts = np.bincount(run_index, minlength=len(runs))
+    successes = np.bincount(run_index, weights=arrays.success[adjudicated], minlength=len(runs))
+    return {str(run): float(successes[i] / counts[i]) for i, run in enumerate(runs)}
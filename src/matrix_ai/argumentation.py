@@ -1,4 +1,3 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langgraph.graph import StateGraph, START, END
 import uuid
@@ -6,10 +5,15 @@ from datetime import datetime
 from typing import List, Tuple
 
 from .schemas import (
-    GameState, ActorState, ArgumentStatus, StandardArgument, SecretArgument,
+    GameState, ActorState, Actor, ArgumentStatus, StandardArgument, SecretArgument,
     ArgumentResponse, SecretArgumentValidationResponse, BigProjectCheckResponse,
-    LogEntry, LogEntryType, GamePhase
+    LogEntry, LogEntryType, GamePhase, StateUpdate, SubgraphOutput
 )
+from .llm import get_node_llm
+from .call_policy import call_llm, mark_degraded, LLMCallError
+from .speculation import submit_speculation, take_speculative_argument
+from .log_store import append_log_entry, iter_game_log
+from .world import format_units, render_relationships
 
 # --- PROMPTS ---
 
@@ -120,16 +124,11 @@ def update_conversation_history(state: GameState, actor_state: ActorState) -> No
     # Get current actor name
     actor_name = actor_state.actor_name
     
-    # Find the last argument by this actor
-    last_actor_argument_index = -1
-    for i, log in enumerate(state.game_log):
-        if (log.entry_type == LogEntryType.ARGUMENT and 
-            hasattr(log.content, 'proposing_actor_name') and 
-            log.content.proposing_actor_name == actor_name):
-            last_actor_argument_index = i
+    # Find the last argument by this actor (absolute game log position, from the log index)
+    last_actor_argument_index = state.actor_last_argument.get(actor_name, -1)
     
     # Check if this is the very first move of the game
-    if last_actor_argument_index == -1 and not any(log for log in state.game_log if log.entry_type == LogEntryType.ARGUMENT):
+    if last_actor_argument_index == -1 and not state.actor_last_argument:
         # First move of the game
         actor_state.conversation_history.append(("human", f"""Turn 1 begins. You have the first move.
 
@@ -140,24 +139,14 @@ Your Current Forces: {_format_forces(state, actor_name)}
 What action do you want to take?"""))
         return
     
-    # Collect all argument logs after this actor's last action
+    # Collect all argument logs after this actor's last action (or all of them, if it hasn't acted yet)
     others_actions = []
-    if last_actor_argument_index >= 0:
-        # Get logs after the actor's last action
-        for log in state.game_log[last_actor_argument_index + 1:]:
-            if (log.entry_type == LogEntryType.ARGUMENT and 
-                hasattr(log.content, 'proposing_actor_name') and
-                hasattr(log.content, 'adjudication_narrative') and 
-                log.content.adjudication_narrative):
-                others_actions.append(f"- {log.content.proposing_actor_name}: {log.content.adjudication_narrative}")
-    else:
-        # This actor hasn't acted yet, get all argument logs
-        for log in state.game_log:
-            if (log.entry_type == LogEntryType.ARGUMENT and 
-                hasattr(log.content, 'proposing_actor_name') and
-                hasattr(log.content, 'adjudication_narrative') and 
-                log.content.adjudication_narrative):
-                others_actions.append(f"- {log.content.proposing_actor_name}: {log.content.adjudication_narrative}")
+    for log in iter_game_log(state, last_actor_argument_index + 1):
+        if (log.entry_type == LogEntryType.ARGUMENT and 
+            hasattr(log.content, 'proposing_actor_name') and
+            hasattr(log.content, 'adjudication_narrative') and 
+            log.content.adjudication_narrative):
+            others_actions.append(f"- {log.content.proposing_actor_name}: {log.content.adjudication_narrative}")
     
     # Build the human message
     human_msg = f"Turn {state.current_turn}. "
@@ -178,6 +167,7 @@ What action do you want to take?"""))
 Global Situation: {', '.join(state.global_narrative_markers) if state.global_narrative_markers else 'Situation developing'}
 
 Your Current Forces: {_format_forces(state, actor_name)}
+Your Relationships: {render_relationships(state.world, actor_name)}
 Your Current Effects: {_format_effects(state, actor_name)}
 
 What action do you want to take this turn? Remember, each turn represents {state.game_definition.turn_length}, so suggest an action that is achievable in that time frame. If you have a longer term plan, you can break it down into stages and propose them one at a time, using your scratch pad to save notes."""
@@ -187,12 +177,8 @@ What action do you want to take this turn? Remember, each turn represents {state
 
 def _format_forces(state: GameState, actor_name: str) -> str:
     """Helper to format forces for a specific actor"""
-    actor_state = next((a for a in state.actor_states if a.actor_name == actor_name), None)
-    if not actor_state or not actor_state.current_forces:
-        return "None"
-    
-    return ", ".join([f"{f.unit_name} at {f.location}" + (f" ({f.details})" if f.details else "") 
-                     for f in actor_state.current_forces])
+    units = state.world.actor_units(actor_name)
+    return format_units(units) if units else "None"
 
 
 def _format_effects(state: GameState, actor_name: str) -> str:
@@ -205,21 +191,40 @@ def _format_effects(state: GameState, actor_name: str) -> str:
 
 # --- NODE FUNCTIONS ---
 
-def update_actor_conversation_history(state: GameState) -> GameState:
+def update_actor_conversation_history(state: GameState) -> StateUpdate:
     """Node to update the current actor's conversation history"""
     
     current_actor_state = state.current_actor_state
     
     if not current_actor_state:
         print("Warning: No current actor state found for conversation history update")
-        return state
+        return {}
     
     # Update conversation history
     update_conversation_history(state, current_actor_state)
     
-    return state
+    return state.delta(actor_states=[current_actor_state])
 
-def player_deliberation(state: GameState) -> GameState:
+def request_argument(state: GameState, actor_state: ActorState, actor: Actor) -> ArgumentResponse:
+    """Ask the LLM to deliberate and return the actor's argument, based on their conversation history"""
+    
+    # Initialize LLM
+    llm = get_node_llm(state, "player_deliberation", temperature=0.7)
+    
+    # Create deliberation chain
+    deliberation_chain = DELIBERATION_PROMPT | llm.with_structured_output(ArgumentResponse)
+    
+    return call_llm(state, "player_deliberation", deliberation_chain, {
+        "game_name": state.game_definition.name,
+        "game_background": state.game_definition.background_briefing,
+        "turn_length": state.game_definition.turn_length,
+        "actor_name": actor.actor_name,
+        "actor_briefing": actor.actor_briefing,
+        "objectives": state.game_definition.fragments().actor_objectives[actor.actor_name],
+        "conversation_history": actor_state.conversation_history
+    })
+
+def player_deliberation(state: GameState) -> StateUpdate:
     """Node for AI player to deliberate and formulate an argument"""
     
     current_actor_state = state.current_actor_state
@@ -227,33 +232,19 @@ def player_deliberation(state: GameState) -> GameState:
     
     if not current_actor_state:
         print("Warning: No current actor state found for deliberation")
-        return state
+        return {}
     
     if not current_actor:
         print("Warning: No current actor definition found for deliberation")
-        return state
+        return {}
     
     # Don't set phase here - it was already set by the previous node
     
-    # Format objectives
-    objectives_str = "\n".join([f"- {obj}" for obj in current_actor.objectives])
-    
-    # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.7)
-    
-    # Create deliberation chain
-    deliberation_chain = DELIBERATION_PROMPT | llm.with_structured_output(ArgumentResponse)
-    
     try:
-        argument_response = deliberation_chain.invoke({
-            "game_name": state.game_definition.name,
-            "game_background": state.game_definition.background_briefing,
-            "turn_length": state.game_definition.turn_length,
-            "actor_name": current_actor.actor_name,
-            "actor_briefing": current_actor.actor_briefing,
-            "objectives": objectives_str,
-            "conversation_history": current_actor_state.conversation_history
-        })
+        # Use the argument drafted speculatively during the previous actor's adjudication, if it is still valid
+        argument_response = take_speculative_argument(state)
+        if argument_response is None:
+            argument_response = request_argument(state, current_actor_state, current_actor)
         
         # Add scratchpad notes
         if argument_response.scratchpad_notes.strip():
@@ -300,9 +291,10 @@ Reasons supporting this action:
         
         current_actor_state.conversation_history.append(("assistant", assistant_response))
         
-    except Exception as e:
+    except LLMCallError as e:
         print(f"Error in player deliberation: {e}")
         # Create a default argument to prevent the game from breaking
+        mark_degraded(state, "player_deliberation")
         argument = StandardArgument(
             argument_id=str(uuid.uuid4()),
             proposing_actor_name=current_actor.actor_name,
@@ -313,9 +305,9 @@ Reasons supporting this action:
         )
         current_actor_state.argument = argument
     
-    return state
+    return state.delta(actor_states=[current_actor_state])
 
-def validate_secret_argument(state: GameState) -> GameState:
+def validate_secret_argument(state: GameState) -> StateUpdate:
     """Node to validate if a secret argument is truly appropriate"""
     
     current_actor_state = state.current_actor_state
@@ -323,34 +315,33 @@ def validate_secret_argument(state: GameState) -> GameState:
     
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for secret validation")
-        return state
+        return {}
     
     if not current_actor:
         print("Warning: No current actor definition found for secret validation")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
     
     # Only validate if it's a secret argument
     if not isinstance(current_argument, SecretArgument):
-        return state
+        return {}
     
     # Prepare context
     game_context = f"""
-Game: {state.game_definition.name}
-Background: {state.game_definition.background_briefing}
+{state.game_definition.fragments().game_header}
 Current Turn: {state.current_turn}
 Game State: {state.game_state_summary}
 """
     
     # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.)
+    llm = get_node_llm(state, "validate_secret_argument", temperature=0.0)
     
     # Create validation chain
     validation_chain = SECRET_VALIDATION_PROMPT | llm.with_structured_output(SecretArgumentValidationResponse)
     
     try:
-        validation_response = validation_chain.invoke({
+        validation_response = call_llm(state, "validate_secret_argument", validation_chain, {
             "game_context": game_context,
             "actor_name": current_actor.actor_name,
             "action_description": current_argument.action_description,
@@ -382,15 +373,16 @@ Game State: {state.game_state_summary}
                 content=f"Secret argument converted to standard argument: {validation_response.reasoning}",
                 summary=f"Secret argument validation: {current_actor.actor_name}"
             )
-            state.game_log.append(conversion_log)
+            append_log_entry(state, conversion_log)
         
-    except Exception as e:
+    except LLMCallError as e:
         print(f"Error in secret argument validation: {e}")
         # If validation fails, default to keeping it as secret
+        mark_degraded(state, "validate_secret_argument")
     
-    return state
+    return state.delta(actor_states=[current_actor_state])
 
-def check_big_project(state: GameState) -> GameState:
+def check_big_project(state: GameState) -> StateUpdate:
     """Node to check if the argument is a big project that should be broken down"""
     
     current_actor_state = state.current_actor_state
@@ -398,29 +390,28 @@ def check_big_project(state: GameState) -> GameState:
     
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for big project check")
-        return state
+        return {}
     
     if not current_actor:
         print("Warning: No current actor definition found for big project check")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
     
     # Prepare context
     game_context = f"""
-Game: {state.game_definition.name}
-Background: {state.game_definition.background_briefing}
+{state.game_definition.fragments().game_header}
 Current Turn: {state.current_turn}
 """
     
     # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.3)
+    llm = get_node_llm(state, "check_big_project", temperature=0.3)
     
     # Create big project check chain
     big_project_chain = BIG_PROJECT_CHECK_PROMPT | llm.with_structured_output(BigProjectCheckResponse)
     
     try:
-        big_project_response = big_project_chain.invoke({
+        big_project_response = call_llm(state, "check_big_project", big_project_chain, {
             "game_context": game_context,
             "actor_name": current_actor.actor_name,
             "turn_length": state.game_definition.turn_length,
@@ -433,6 +424,7 @@ Current Turn: {state.current_turn}
             # Replace the current argument's action with the first stage action
             original_action = current_argument.action_description
             current_argument.action_description = big_project_response.first_stage_action
+            current_argument.is_big_project_stage = True
             
             # Inject the remaining plan into the scratchpad with appropriate framing
             if big_project_response.remaining_plan:
@@ -453,15 +445,16 @@ Current Turn: {state.current_turn}
                 content=f"Big project automatically broken down into first stage: {big_project_response.reasoning}. Action changed to: {big_project_response.first_stage_action}",
                 summary=f"Big project breakdown: {current_actor.actor_name}"
             )
-            state.game_log.append(breakdown_log)
+            append_log_entry(state, breakdown_log)
         
-    except Exception as e:
+    except LLMCallError as e:
         print(f"Error in big project check: {e}")
         # Continue without breaking down the project
+        mark_degraded(state, "check_big_project")
     
-    return state
+    return state.delta(actor_states=[current_actor_state])
 
-def finalize_argument(state: GameState) -> GameState:
+def finalize_argument(state: GameState) -> StateUpdate:
     """Node to finalize the argument and prepare for adjudication"""
     
     current_actor_state = state.current_actor_state
@@ -469,11 +462,11 @@ def finalize_argument(state: GameState) -> GameState:
     
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for argument finalization")
-        return state
+        return {}
     
     if not current_actor:
         print("Warning: No current actor definition found for argument finalization")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
     
@@ -483,7 +476,37 @@ def finalize_argument(state: GameState) -> GameState:
     # Set phase for what's coming next (adjudication subgraph)
     state.current_phase = GamePhase.ADJUDICATION
     
-    return state
+    return state.delta("current_phase", actor_states=[current_actor_state])
+
+def start_speculative_deliberation(state: GameState) -> StateUpdate:
+    """Node to start the next actor's deliberation in the background while the current argument is adjudicated"""
+    
+    if not state.settings.speculative_deliberation or len(state.turn_order) < 2:
+        return {}
+    
+    # No next actor if this is the last action of the final turn
+    is_last_player = state.active_player_queue_index == len(state.turn_order) - 1
+    if is_last_player and state.current_turn >= state.game_definition.game_length:
+        return {}
+    
+    # Draft against a snapshot positioned at the next actor's turn
+    snapshot = state.model_copy(deep=True)
+    snapshot.active_player_queue_index = (state.active_player_queue_index + 1) % len(state.turn_order)
+    if snapshot.active_player_queue_index == 0:
+        snapshot.current_turn += 1
+    
+    next_actor_state = snapshot.current_actor_state
+    next_actor = snapshot.current_actor_definition
+    if not next_actor_state or not next_actor:
+        return {}
+    
+    def deliberate() -> ArgumentResponse:
+        update_conversation_history(snapshot, next_actor_state)
+        return request_argument(snapshot, next_actor_state, next_actor)
+    
+    submit_speculation(state.game_id, next_actor.actor_name, snapshot, deliberate)
+    
+    return {}
 
 # --- CONDITIONAL EDGES ---
 
@@ -503,7 +526,7 @@ def create_argumentation_graph() -> StateGraph:
     """Create the argumentation workflow graph"""
     
     # Create the graph
-    workflow = StateGraph(GameState)
+    workflow = StateGraph(GameState, output_schema=SubgraphOutput)
     
     # Add nodes
     workflow.add_node("update_conversation_history", update_actor_conversation_history)
@@ -0,0 +1,147 @@
+from typing import Any, Dict, List, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+from pydantic import BaseModel, Field
+
+from .schemas import GameState, GameSettings, MatrixGame, AdjudicationMethod
+from .adjudication import apply_outcome
+from .main_game_graph import create_main_game_graph
+
+# Expected-outcome mode: instead of sampling each estimative-probability outcome,
+# the game pauses after adjudication and forks into a success branch (weight p) and
+# a failure branch (weight 1 - p). Both branches resume from the same checkpoint,
+# so everything before the fork is computed once. Branches whose weight falls below
+# a threshold are pruned.
+
+# --- RESULT MODELS ---
+
+class BranchPoint(BaseModel):
+    """One outcome taken at a fork."""
+    turn: int
+    actor_name: str
+    action_description: str
+    probability: float = Field(description="Estimated probability of success at this fork.")
+    is_successful: bool
+
+
+class OutcomeBranch(BaseModel):
+    """A fully played-out branch of the outcome tree."""
+    outcomes: List[BranchPoint] = Field(default_factory=list, description="Outcomes taken at each fork, in game order.")
+    weight: float = Field(description="Probability of this branch (product of the outcome probabilities along it).")
+    final_state: GameState
+
+
+class BranchingResult(BaseModel):
+    """The explored outcome tree of a game."""
+    leaves: List[OutcomeBranch] = Field(default_factory=list)
+    pruned_weight: float = Field(default=0.0, description="Probability mass of the branches that were pruned.")
+    forks: int = Field(default=0, description="Number of forks explored.")
+
+    @property
+    def explored_weight(self) -> float:
+        return sum(leaf.weight for leaf in self.leaves)
+
+    def expected_successes(self) -> Dict[str, float]:
+        """Expected number of successful forked arguments per actor, over the explored branches"""
+        total = self.explored_weight or 1.0
+        expected: Dict[str, float] = {}
+        for leaf in self.leaves:
+            for point in leaf.outcomes:
+                expected.setdefault(point.actor_name, 0.0)
+                if point.is_successful:
+                    expected[point.actor_name] += leaf.weight / total
+        return expected
+
+    def marker_probabilities(self) -> Dict[str, float]:
+        """Probability of each final global narrative marker, over the explored branches"""
+        total = self.explored_weight or 1.0
+        probabilities: Dict[str, float] = {}
+        for leaf in self.leaves:
+            for marker in set(leaf.final_state.global_narrative_markers):
+                probabilities[marker] = probabilities.get(marker, 0.0) + leaf.weight / total
+        return dict(sorted(probabilities.items(), key=lambda item: -item[1]))
+
+# --- HELPER FUNCTIONS ---
+
+def _undecided_argument(state: GameState):
+    """The current argument if it is waiting for the branching engine to pick its outcome"""
+    actor_state = state.current_actor_state
+    argument = actor_state.argument if actor_state else None
+    if (argument is None or argument.is_successful is not None
+            or argument.adjudication_method != AdjudicationMethod.ESTIMATIVE_PROBABILITY):
+        return None
+    return argument
+
+# --- BRANCHING API ---
+
+def explore_outcomes(
+    game_definition: MatrixGame,
+    settings: Optional[GameSettings] = None,
+    min_weight: float = 0.05,
+    max_leaves: int = 32,
+    checkpointer: Optional[Any] = None,
+) -> BranchingResult:
+    """
+    Play out a game as a tree of outcomes instead of a single sampled run.
+
+    Every estimative-probability adjudication forks the game into a success and a
+    failure branch, weighted by the estimated probability. Branches lighter than
+    min_weight, or beyond max_leaves, are pruned and their mass is reported as
+    pruned_weight. Branches share their prefix through checkpoints (in memory
+    unless a checkpointer is given). Speculative deliberation is disabled while
+    branching.
+    """
+    settings = (settings or GameSettings()).model_copy(update={"branching": True, "speculative_deliberation": False})
+    graph = create_main_game_graph(checkpointer=checkpointer or MemorySaver())
+    initial_state = GameState.from_matrix_game_setup(game_definition, settings)
+
+    thread = {
+        "configurable": {"thread_id": initial_state.game_id},
+        "recursion_limit": 600
+    }
+    graph.invoke(initial_state, config=thread, interrupt_after=["adjudication"])
+
+    result = BranchingResult()
+    # Depth-first, so at most one branch is in flight and the thread's latest checkpoint is always its own
+    stack = [(graph.get_state(thread).config, [], 1.0)]
+
+    while stack:
+        config, outcomes, weight = stack.pop()
+        snapshot = graph.get_state(config)
+        state = GameState.model_validate(snapshot.values)
+
+        if not snapshot.next:
+            result.leaves.append(OutcomeBranch(outcomes=outcomes, weight=weight, final_state=state))
+            continue
+
+        argument = _undecided_argument(state)
+        if argument is None:
+            # Paused after an adjudication that needs no fork (e.g. auto success): carry on
+            graph.invoke(None, config={**snapshot.config, "recursion_limit": 600}, interrupt_after=["adjudication"])
+            stack.append((graph.get_state(thread).config, outcomes, weight))
+            continue
+
+        result.forks += 1
+        probability = argument.final_probability
+        for is_successful, outcome_probability in ((False, 1.0 - probability), (True, probability)):
+            if outcome_probability <= 0.0:
+                continue
+            branch_weight = weight * outcome_probability
+            if branch_weight < min_weight or len(result.leaves) + len(stack) >= max_leaves:
+                result.pruned_weight += branch_weight
+                continue
+
+            branch_state = state.model_copy(deep=True)
+            apply_outcome(branch_state.current_actor_state.argument, is_successful)
+            branch_config = graph.update_state(snapshot.config, {"actor_states": [branch_state.current_actor_state]}, as_node="adjudication")
+
+            point = BranchPoint(
+                turn=state.current_turn,
+                actor_name=argument.proposing_actor_name,
+                action_description=argument.action_description,
+                probability=probability,
+                is_successful=is_successful
+            )
+            stack.append((branch_config, [*outcomes, point], branch_weight))
+
+    return result
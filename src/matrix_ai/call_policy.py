@@ -0,0 +1,353 @@
+import random
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, wait
+from contextvars import copy_context
+from threading import Lock, Thread
+from typing import Any, Deque, Dict, List, Optional, Set
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import ensure_config
+from langchain_core.tracers._streaming import _StreamingCallbackHandler
+
+from .schemas import CallPolicy, GameState
+
+# Unified policy for the nodes' LLM calls (GameSettings.call_policy): every attempt
+# runs under a timeout, failed attempts are retried after a jittered exponential
+# backoff, and a slow attempt can be hedged with a duplicate request. When all
+# attempts fail, call_llm raises LLMCallError; the node substitutes its default and
+# calls mark_degraded, so the next log entry carries an explicit degraded marker
+# instead of the fallback silently passing for a model answer.
+#
+# With adaptive hedging, the critical-path nodes (CallPolicy.hedge_nodes) send their
+# duplicate once an attempt outlives the node's observed p90 latency, so only the
+# slowest ~10% of calls are hedged. A process-wide budget caps the share of recent
+# calls that may send a hedge.
+
+# Every request of an attempt runs on a thread of its own, started at once with a
+# copy of the caller's context (so callbacks and graph streaming still see the node
+# the call belongs to). Nothing queues, so timeouts and hedge delays count from when
+# the attempt was sent. A thread cannot be cancelled: a request that timed out is
+# abandoned and its thread runs on until the backend answers. Such stuck requests
+# are counted (call_policy_stats()["stuck_requests"]), and once MAX_STUCK_REQUESTS
+# of them are running new requests fail at once, so the node retries and falls back
+# instead of piling more threads onto a hung backend. Only one request per attempt
+# streams its tokens (the primary, until it is abandoned): hedges and abandoned
+# requests run with their streaming callbacks gated off, so a node's text is never
+# streamed twice.
+MAX_STUCK_REQUESTS = 64
+
+# Jitter comes from its own generator so retries never consume the game's dice stream
+_jitter = random.Random()
+
+# Recent latencies per node, and whether each recent call sent a hedge (for the budget)
+LATENCY_WINDOW = 200
+BUDGET_WINDOW = 500
+
+_lock = Lock()
+_stats = {"calls": 0, "retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0, "hedges_over_budget": 0, "fallbacks": 0}
+_node_stats: Dict[str, Dict[str, int]] = {}
+_latencies: Dict[str, Deque[float]] = {}
+_recent_hedges: Deque[int] = deque(maxlen=BUDGET_WINDOW)
+_stuck_requests: Set["_Request"] = set()
+
+
+class LLMCallError(Exception):
+    """An LLM call failed on every attempt allowed by the call policy."""
+
+    def __init__(self, node: str, attempts: int, error: Exception):
+        super().__init__(f"{node}: LLM call failed after {attempts} attempt(s): {type(error).__name__}: {error}")
+        self.node = node
+        self.attempts = attempts
+        self.error = error
+
+
+def _count(name: str, node: Optional[str] = None, amount: int = 1) -> None:
+    with _lock:
+        _stats[name] += amount
+        if node is not None:
+            node_stats = _node_stats.setdefault(node, {"calls": 0, "retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0, "hedges_over_budget": 0, "fallbacks": 0})
+            node_stats[name] += amount
+
+
+def _quantile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _record_latency(node: str, seconds: float) -> None:
+    with _lock:
+        _latencies.setdefault(node, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def _hedge_delay(policy: CallPolicy, node: str) -> Optional[float]:
+    """Seconds after which a node's attempt is hedged: its latency quantile (adaptive), else the fixed delay"""
+    if policy.adaptive_hedging and node in policy.hedge_nodes:
+        with _lock:
+            latencies = list(_latencies.get(node, ()))
+        if len(latencies) >= policy.hedge_min_samples:
+            return _quantile(latencies, policy.hedge_quantile)
+    return policy.hedge_after_seconds
+
+
+def _within_hedge_budget(policy: CallPolicy) -> bool:
+    """Whether hedging the current attempt keeps the hedged share of recent attempts within the budget"""
+    with _lock:
+        return sum(_recent_hedges) + 1 <= policy.hedge_budget * (len(_recent_hedges) + 1)
+
+
+class _GatedStreamHandler(BaseCallbackHandler):
+    """Passes a streaming handler's model callbacks through only while its request may stream"""
+
+    run_inline = True
+
+    def __init__(self, handler: Any, request: "_Request"):
+        self.handler = handler
+        self.request = request
+
+    def on_chat_model_start(self, *args: Any, **kwargs: Any) -> Any:
+        if self.request.streaming:
+            return self.handler.on_chat_model_start(*args, **kwargs)
+
+    def on_llm_new_token(self, *args: Any, **kwargs: Any) -> Any:
+        if self.request.streaming:
+            return self.handler.on_llm_new_token(*args, **kwargs)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> Any:
+        if self.request.streaming:
+            return self.handler.on_llm_end(response, run_id=run_id, **kwargs)
+        # Let the handler forget the run without emitting its message
+        return self.handler.on_llm_error(CancelledError(), run_id=run_id, **kwargs)
+
+    def on_llm_error(self, *args: Any, **kwargs: Any) -> Any:
+        return self.handler.on_llm_error(*args, **kwargs)
+
+    def tap_output_iter(self, run_id: UUID, output: Any) -> Any:
+        return self.handler.tap_output_iter(run_id, output) if self.request.streaming else output
+
+    def tap_output_aiter(self, run_id: UUID, output: Any) -> Any:
+        return self.handler.tap_output_aiter(run_id, output) if self.request.streaming else output
+
+
+class _Request:
+    """One request of an attempt (the primary or a hedge), run on a thread of its own"""
+
+    def __init__(self, chain: Runnable, inputs: Dict[str, Any], streaming: bool):
+        self.chain = chain
+        self.inputs = inputs
+        self.streaming = streaming
+        self.done = False
+
+    def submit(self) -> Future:
+        """Start the request on a new thread; fails at once while too many abandoned requests are stuck"""
+        with _lock:
+            if len(_stuck_requests) >= MAX_STUCK_REQUESTS:
+                raise RuntimeError(f"{len(_stuck_requests)} abandoned LLM requests are still running; not sending more")
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        context = copy_context()
+
+        def run() -> None:
+            try:
+                future.set_result(context.run(self._run))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with _lock:
+                    self.done = True
+                    _stuck_requests.discard(self)
+
+        Thread(target=run, name="llm-call", daemon=True).start()
+        return future
+
+    def abandon(self) -> None:
+        """Stop streaming this request's tokens, and count it as stuck until its thread ends"""
+        self.streaming = False
+        with _lock:
+            if not self.done:
+                _stuck_requests.add(self)
+
+    def _config(self) -> RunnableConfig:
+        """The caller's config (copied into this thread) with its streaming handlers gated"""
+        config = ensure_config()
+        callbacks = config.get("callbacks")
+        gate = lambda handler: _GatedStreamHandler(handler, self) if isinstance(handler, _StreamingCallbackHandler) else handler
+        if isinstance(callbacks, BaseCallbackManager):
+            callbacks = callbacks.copy()
+            callbacks.handlers = [gate(handler) for handler in callbacks.handlers]
+            callbacks.inheritable_handlers = [gate(handler) for handler in callbacks.inheritable_handlers]
+        elif isinstance(callbacks, list):
+            callbacks = [gate(handler) for handler in callbacks]
+        return {**config, "callbacks": callbacks}
+
+    def _run(self) -> Any:
+        return self.chain.invoke(self.inputs, self._config())
+
+
+def _backoff(policy: CallPolicy, retry: int) -> float:
+    """Full-jitter delay before the given retry (1-based)"""
+    return _jitter.uniform(0, min(policy.max_backoff_seconds, policy.backoff_seconds * 2 ** (retry - 1)))
+
+
+def _attempt(chain: Runnable, inputs: Dict[str, Any], policy: CallPolicy, node: str) -> Any:
+    """One attempt: the request, plus a hedged duplicate if it is slow, under the timeout"""
+    started = time.monotonic()
+    hedge_delay = _hedge_delay(policy, node)
+
+    if policy.timeout_seconds is None and hedge_delay is None:
+        response = chain.invoke(inputs)
+        _record_latency(node, time.monotonic() - started)
+        with _lock:
+            _recent_hedges.append(0)
+        return response
+
+    requests: List[_Request] = []
+    try:
+        return _hedged_attempt(chain, inputs, policy, node, hedge_delay, requests)
+    finally:
+        with _lock:
+            _recent_hedges.append(1 if len(requests) > 1 else 0)
+
+
+def _hedged_attempt(chain: Runnable, inputs: Dict[str, Any], policy: CallPolicy, node: str, hedge_delay: Optional[float], requests: List[_Request]) -> Any:
+    """Run the request on its own thread, hedging it after hedge_delay; requests collects every request sent"""
+    started = time.monotonic()
+    primary = _Request(chain, inputs, streaming=True)
+    requests.append(primary)
+    futures: Dict[Future, _Request] = {primary.submit(): primary}
+
+    deadline = started + policy.timeout_seconds if policy.timeout_seconds is not None else None
+
+    pending = set(futures)
+    error: Optional[BaseException] = None
+    try:
+        if hedge_delay is not None and (deadline is None or started + hedge_delay < deadline):
+            done, _ = wait(futures, timeout=max(started + hedge_delay - time.monotonic(), 0))
+            if not done:
+                if _within_hedge_budget(policy):
+                    hedge = _Request(chain, inputs, streaming=False)
+                    futures[hedge.submit()] = hedge
+                    requests.append(hedge)
+                    pending = set(futures)
+                    _count("hedges", node)
+                else:
+                    _count("hedges_over_budget", node)
+
+        while pending:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            done, pending = wait(pending, timeout=max(remaining, 0) if remaining is not None else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # Abandoned requests finish in the background; their results are ignored
+                _count("timeouts", node)
+                _record_latency(node, policy.timeout_seconds)
+                raise TimeoutError(f"no response within {policy.timeout_seconds}s")
+            for future in done:
+                if future.exception() is None:
+                    if futures[future] is not primary:
+                        _count("hedge_wins", node)
+                    # The latency the caller saw (a hedge win is faster than its primary would have been)
+                    _record_latency(node, time.monotonic() - started)
+                    return future.result()
+                error = future.exception()
+        raise error
+    finally:
+        # Whatever is still running lost (or timed out): silence its stream and let it finish in the background
+        for future in pending:
+            futures[future].abandon()
+
+
+def call_llm(state: GameState, node: str, chain: Runnable, inputs: Dict[str, Any]) -> Any:
+    """
+    Invoke a node's chain under the game's call policy and return its response.
+
+    Raises LLMCallError once every attempt has failed, for the node to fall back on
+    (it should call mark_degraded). With on_failure='raise' a RuntimeError is raised
+    instead, which fails the node.
+    """
+    policy = state.settings.call_policy
+    _count("calls", node)
+    attempts = max(1, policy.max_attempts)
+    last_error: Optional[Exception] = None
+
+    for attempt in range(attempts):
+        if attempt:
+            _count("retries", node)
+            time.sleep(_backoff(policy, attempt))
+        try:
+            return _attempt(chain, inputs, policy, node)
+        except Exception as e:
+            last_error = e
+            print(f"LLM call for {node} failed (attempt {attempt + 1}/{attempts}): {type(e).__name__}: {e}")
+
+    if policy.on_failure == "raise":
+        raise RuntimeError(f"{node}: LLM call failed after {attempts} attempt(s)") from last_error
+    _count("fallbacks", node)
+    raise LLMCallError(node, attempts, last_error)
+
+
+def call_llm_batch(state: GameState, node: str, chain: Runnable, inputs: List[Dict[str, Any]]) -> List[Any]:
+    """
+    Run call_llm for several inputs in parallel. Each item gets the full policy; the
+    result list holds an LLMCallError in place of every item that failed.
+    """
+    per_item = RunnableLambda(lambda item: call_llm(state, node, chain, item))
+    results = per_item.batch(inputs, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, LLMCallError):
+            raise result
+    return results
+
+
+def mark_degraded(state: GameState, node: str) -> None:
+    """
+    Record that a node substituted a default for a failed LLM call. The log entry its
+    output goes into is marked degraded: the current argument's entry for the argument
+    nodes (log_store.ARGUMENT_NODES), otherwise the next entry, so a node that logs
+    nothing on its fallback should log an entry saying so.
+    """
+    if node not in state.pending_degraded_nodes:
+        state.pending_degraded_nodes.append(node)
+        state.mark_changed("pending_degraded_nodes")
+
+
+def call_policy_stats() -> Dict[str, int]:
+    """
+    Counts of calls, retries, timeouts, hedges sent, won and skipped over budget, and
+    fallbacks in this process, and how many abandoned requests are still running
+    """
+    with _lock:
+        return {**_stats, "stuck_requests": len(_stuck_requests)}
+
+
+def hedging_stats() -> Dict[str, Any]:
+    """
+    Hedging metrics in this process: per node, the call counts, how often a hedge was
+    sent and how often it answered first (win_rate), and the p50/p90/p99 of recent
+    latencies; overall, the share of recent calls that sent a hedge (budget_used).
+    """
+    with _lock:
+        node_stats = {node: dict(stats) for node, stats in _node_stats.items()}
+        latencies = {node: list(values) for node, values in _latencies.items()}
+        budget_used = sum(_recent_hedges) / len(_recent_hedges) if _recent_hedges else 0.0
+
+    nodes = {}
+    for node, stats in node_stats.items():
+        values = latencies.get(node, [])
+        nodes[node] = {
+            **stats,
+            "win_rate": round(stats["hedge_wins"] / stats["hedges"], 3) if stats["hedges"] else None,
+            **{f"p{int(q * 100)}_seconds": round(_quantile(values, q), 3) if values else None for q in (0.5, 0.9, 0.99)},
+        }
+    return {"budget_used": round(budget_used, 3), "nodes": nodes}
+
+
+def reset_call_policy_stats() -> None:
+    """Clear all counters and the observed latencies (hedge delays start over)"""
+    with _lock:
+        for name in _stats:
+            _stats[name] = 0
+        _node_stats.clear()
+        _latencies.clear()
+        _recent_hedges.clear()
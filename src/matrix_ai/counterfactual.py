@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from langgraph.types import StateSnapshot
+
+from .schemas import GameState
+from .adjudication import apply_outcome
+from .main_game_graph import create_main_game_graph
+
+# What-if analysis on checkpointed games: pick a point in a game's history and fork
+# continuations from it with a different seed or an edited argument. Only the
+# suffix after the fork point is recomputed. The game must have been run with a
+# checkpointer (e.g. run_matrix_game(..., checkpointer=SqliteSaver(...))); its
+# thread id is the game_id.
+
+# --- HISTORY ---
+
+def game_history(checkpointer: Any, game_id: str) -> List[StateSnapshot]:
+    """All checkpoints of a game's main graph, oldest first (including earlier forks)"""
+    graph = create_main_game_graph(checkpointer=checkpointer)
+    return list(reversed(list(graph.get_state_history({"configurable": {"thread_id": game_id}}))))
+
+
+def find_checkpoint(
+    checkpointer: Any,
+    game_id: str,
+    turn: int,
+    actor_name: Optional[str] = None,
+    before: str = "scenario_update",
+) -> StateSnapshot:
+    """
+    Find the checkpoint of a game right before the given main-graph node runs.
+
+    The default, before="scenario_update", is the point where the current actor's
+    argument has just been adjudicated. Use before="adjudication" to fork ahead
+    of adjudication, e.g. to edit the argument itself. If the game was forked
+    before, the most recent matching checkpoint is returned.
+    """
+    for snapshot in reversed(game_history(checkpointer, game_id)):
+        if before not in snapshot.next:
+            continue
+        state = GameState.model_validate(snapshot.values)
+        if state.current_turn != turn:
+            continue
+        if actor_name is None or (state.current_actor_state and state.current_actor_state.actor_name == actor_name):
+            return snapshot
+
+    actor_text = f", actor {actor_name}" if actor_name else ""
+    raise ValueError(f"No checkpoint before '{before}' found for turn {turn}{actor_text} in game {game_id}")
+
+# --- FORKING ---
+
+# Argument fields that are kept consistent with is_successful and cannot be edited directly
+_DERIVED_ARGUMENT_FIELDS = {"status"}
+
+def fork_game(
+    checkpointer: Any,
+    checkpoint: StateSnapshot,
+    seeds: Sequence[Optional[int]] = (None,),
+    argument_updates: Optional[Dict[str, Any]] = None,
+) -> List[GameState]:
+    """
+    Play out one continuation per seed from a checkpoint and return their final states.
+
+    A seed of None keeps the game's own seed, so with common random numbers the
+    continuation sees the same draws as the original run and only differs by the
+    edit. argument_updates sets fields on the current actor's argument (e.g.
+    {"action_description": ...} before adjudication, or {"is_successful": False}
+    before the scenario update; the argument's status follows the outcome). Forks run one after another on the game's own
+    thread, so they can themselves be found and forked again.
+    """
+    graph = create_main_game_graph(checkpointer=checkpointer)
+    if checkpoint.parent_config is None:
+        raise ValueError("Cannot fork from the input checkpoint; fork from a later checkpoint or start a new game")
+
+    # Writing the fork as the node that produced the checkpoint keeps the same node up next
+    as_node = graph.get_state(checkpoint.parent_config).next[0]
+    final_states = []
+
+    for seed in seeds:
+        state = GameState.model_validate(checkpoint.values)
+        settings = state.settings if seed is None else state.settings.model_copy(update={"seed": seed})
+        values: Dict[str, Any] = {"settings": settings}
+
+        if argument_updates:
+            actor_state = state.current_actor_state
+            if not actor_state or not actor_state.argument:
+                raise ValueError("The checkpoint has no current argument to edit")
+            for field, value in argument_updates.items():
+                if field in _DERIVED_ARGUMENT_FIELDS:
+                    raise ValueError(f"'{field}' follows from the outcome; set 'is_successful' instead")
+                if field == "is_successful":
+                    # Through apply_outcome, so the status stays consistent with the outcome
+                    if value != actor_state.argument.is_successful:
+                        apply_outcome(actor_state.argument, value)
+                else:
+                    setattr(actor_state.argument, field, value)
+            values["actor_states"] = state.actor_states
+
+        # Copy the checkpoint before updating it: the checkpoint still holds the writes of the
+        # node that ran from it in the original game, which a plain update would apply first
+        fork_config = graph.update_state(checkpoint.config, [(values, as_node)], as_node="__copy__")
+        final_state = graph.invoke(None, config={**fork_config, "recursion_limit": 600})
+        final_states.append(GameState.model_validate(final_state))
+
+    return final_states
@@ -0,0 +1,200 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency: pip install -e ".[analytics]"
+    pa = None
+
+from .schemas import GameState, LogEntry, SecretArgument
+from .farm import GameResult
+from .log_store import iter_game_log
+
+# --- RECORD SCHEMA ---
+
+# One row per log entry. Argument columns are null for non-argument entries.
+COLUMNS = [
+    ("run_id", "string"),
+    ("scenario", "string"),
+    ("entry_id", "string"),
+    ("timestamp", "string"),
+    ("turn", "int32"),
+    ("phase", "string"),
+    ("entry_type", "string"),
+    ("actor", "string"),
+    ("action", "string"),
+    ("method", "string"),
+    ("method_source", "string"),
+    ("heuristic_method", "string"),
+    ("status", "string"),
+    ("probability_estimates", "list<double>"),
+    ("final_probability", "double"),
+    ("is_successful", "bool"),
+    ("is_secret", "bool"),
+    ("is_triggered", "bool"),
+    ("is_revealed", "bool"),
+    ("summary", "string"),
+    ("degraded", "bool"),
+]
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("pyarrow is required for columnar export. Install it with: pip install -e \".[analytics]\"")
+
+
+def arrow_schema() -> "pa.Schema":
+    """The Arrow schema of flattened game log records"""
+    _require_pyarrow()
+    types = {
+        "string": pa.string(),
+        "int32": pa.int32(),
+        "double": pa.float64(),
+        "bool": pa.bool_(),
+        "list<double>": pa.list_(pa.float64()),
+    }
+    return pa.schema([(name, types[type_name]) for name, type_name in COLUMNS])
+
+# --- FLATTENING ---
+
+def flatten_log_entry(entry: LogEntry, run_id: str, scenario: str) -> Dict[str, Any]:
+    """Flatten one log entry into a columnar record"""
+    record = {name: None for name, _ in COLUMNS}
+    record.update({
+        "run_id": run_id,
+        "scenario": scenario,
+        "entry_id": entry.entry_id,
+        "timestamp": entry.timestamp,
+        "turn": entry.turn,
+        "phase": entry.phase.value,
+        "entry_type": entry.entry_type.value,
+        "actor": entry.actor_name,
+        "summary": entry.summary,
+        "degraded": entry.degraded,
+    })
+
+    if isinstance(entry.content, str):
+        record["action"] = entry.content
+        return record
+
+    argument = entry.content
+    record.update({
+        "actor": entry.actor_name or argument.proposing_actor_name,
+        "action": argument.action_description,
+        "method": argument.adjudication_method.value if argument.adjudication_method else None,
+        "method_source": argument.method_source,
+        "heuristic_method": argument.heuristic_method.value if argument.heuristic_method else None,
+        "status": argument.status.value,
+        "probability_estimates": list(argument.probability_estimates),
+        "final_probability": argument.final_probability,
+        "is_successful": argument.is_successful,
+        "is_secret": isinstance(argument, SecretArgument),
+    })
+    if isinstance(argument, SecretArgument):
+        record["is_triggered"] = argument.is_triggered
+        record["is_revealed"] = argument.is_revealed
+
+    return record
+
+
+def flatten_game_log(state: GameState, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Flatten a game's full log (including entries spilled to the log store) into columnar records"""
+    run_id = run_id or state.game_id
+    return [flatten_log_entry(entry, run_id, state.game_definition.name) for entry in iter_game_log(state)]
+
+
+def flatten_game_result(result: GameResult) -> List[Dict[str, Any]]:
+    """Flatten the argument records of a farm result into columnar records"""
+    records = []
+    for argument in result.arguments:
+        record = {name: None for name, _ in COLUMNS}
+        record.update({
+            "run_id": result.job_id,
+            "scenario": result.scenario_name,
+            "turn": argument.turn,
+            "entry_type": "Argument",
+            "actor": argument.actor_name,
+            "action": argument.action_description,
+            "method": argument.adjudication_method,
+            "method_source": argument.method_source,
+            "heuristic_method": argument.heuristic_method,
+            "probability_estimates": list(argument.probability_estimates),
+            "final_probability": argument.final_probability,
+            "is_successful": argument.is_successful,
+            "is_secret": argument.is_secret,
+            "degraded": bool(argument.degraded_nodes),
+        })
+        records.append(record)
+    return records
+
+# --- STREAMING WRITER ---
+
+class GameLogWriter:
+    """
+    Append flattened game logs to a Parquet or Arrow IPC file, one record batch per game.
+
+    The format is chosen from the file extension ('.parquet' or '.arrow'/'.feather'/'.ipc')
+    unless given explicitly. Use as a context manager so the file footer is written.
+    """
+
+    def __init__(self, path: str, file_format: Optional[str] = None):
+        _require_pyarrow()
+        self.path = path
+        self.schema = arrow_schema()
+        self.file_format = file_format or ("parquet" if Path(path).suffix == ".parquet" else "arrow")
+        self.rows_written = 0
+
+        if self.file_format == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema)
+        elif self.file_format == "arrow":
+            self._writer = ipc.new_file(path, self.schema)
+        else:
+            raise ValueError(f"Unknown file format: {self.file_format}")
+
+    def write_records(self, records: List[Dict[str, Any]]) -> None:
+        """Append a batch of flattened records"""
+        if not records:
+            return
+        self._writer.write_batch(pa.RecordBatch.from_pylist(records, schema=self.schema))
+        self.rows_written += len(records)
+
+    def write_game(self, state: GameState, run_id: Optional[str] = None) -> None:
+        """Append a finished (or in-progress) game's log"""
+        self.write_records(flatten_game_log(state, run_id))
+
+    def write_result(self, result: GameResult) -> None:
+        """Append a farm result's argument records"""
+        self.write_records(flatten_game_result(result))
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self) -> "GameLogWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_game_logs(path: str, columns: Optional[List[str]] = None, filters: Optional[List] = None) -> "pa.Table":
+    """
+    Load exported game logs as an Arrow table.
+
+    For Parquet files, columns and filters (e.g. [("entry_type", "=", "Argument")])
+    are pushed down to the reader so only the needed data is loaded.
+    """
+    _require_pyarrow()
+    if Path(path).suffix == ".parquet":
+        return pq.read_table(path, columns=columns, filters=filters)
+
+    with pa.memory_map(path, "r") as source:
+        table = ipc.open_file(source).read_all()
+    if filters:
+        for column, op, value in filters:
+            if op not in ("=", "=="):
+                raise ValueError("Only equality filters are supported for Arrow IPC files")
+            table = table.filter(pc.equal(table[column], value))
+    return table.select(columns) if columns else table
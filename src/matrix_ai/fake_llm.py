@@ -0,0 +1,161 @@
+import enum
+import hashlib
+import os
+import random
+import time
+import typing
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, get_buffer_string
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda, ensure_config
+from pydantic import BaseModel, Field
+
+# Deterministic stand-in for the chat model, for offline runs and benchmarks.
+# Select it with MATRIX_AI_LLM_BACKEND=fake. Each structured-output call sleeps for
+# a simulated latency (MATRIX_AI_FAKE_LATENCY seconds, default 0.05) and returns a
+# schema instance generated from a hash of the prompt, so the same prompt always
+# gets the same response.
+
+FAKE_LATENCY_ENV = "MATRIX_AI_FAKE_LATENCY"
+DEFAULT_FAKE_LATENCY = 0.05
+STREAM_CHUNK_CHARS = 12
+
+_lock = Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+_intervals: Dict[str, List[Tuple[float, float]]] = {}
+
+# --- RESPONSE GENERATION ---
+
+def _fake_value(annotation: Any, rng: random.Random, name: str) -> Any:
+    """Generate a plausible value for a field annotation"""
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is typing.Union:
+        return _fake_value(next(a for a in args if a is not type(None)), rng, name)
+    if origin is typing.Literal:
+        return args[0]
+    if origin in (list, typing.List):
+        # Ids the model would have to copy from the prompt are left empty
+        if name == "triggered_arguments":
+            return []
+        return [_fake_value(args[0], rng, name) for _ in range(2)]
+    if origin in (dict, typing.Dict):
+        return {}
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return rng.choice(list(annotation))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fake_response(annotation, rng.random())
+    if annotation is float:
+        return round(rng.random(), 2)
+    if annotation is bool:
+        return False
+    if annotation is int:
+        return rng.randint(0, 3)
+    return f"{name.replace('_', ' ')} {rng.randint(0, 999)}"
+
+
+def fake_response(schema: Type[BaseModel], seed: Any) -> BaseModel:
+    """Build a schema instance deterministically from a seed"""
+    rng = random.Random(seed)
+    values = {name: _fake_value(field.annotation, rng, name) for name, field in schema.model_fields.items()}
+    return schema.model_validate(values)
+
+# --- FAKE CHAT MODEL ---
+
+class FakeChatModel(BaseChatModel):
+    """
+    Drop-in replacement for ChatOpenAI supporting the with_structured_output calls the nodes make.
+
+    Like ChatOpenAI's json_schema mode, the response is a JSON document in the message
+    content. When a streaming callback is attached (e.g. LangGraph's "messages" stream
+    mode) it is emitted in small chunks, the first one after half the simulated latency.
+    """
+    model_name: str = "fake"
+    temperature: float = 0.0
+    latency: float = Field(default_factory=lambda: float(os.environ.get(FAKE_LATENCY_ENV, DEFAULT_FAKE_LATENCY)))
+
+    def __init__(self, model: str = "fake", temperature: float = 0.0, latency: Optional[float] = None, **kwargs):
+        if latency is not None:
+            kwargs["latency"] = latency
+        super().__init__(model_name=model, temperature=temperature, **kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs) -> Runnable:
+        parse = RunnableLambda(lambda message: schema.model_validate_json(message.content), name=f"Fake{schema.__name__}")
+        return self.bind(response_schema=schema) | parse
+
+    def _respond(self, messages: List[BaseMessage], schema: Optional[Type[BaseModel]]) -> str:
+        text = get_buffer_string(messages)
+        if schema is None:
+            return f"fake response {hashlib.md5(text.encode()).hexdigest()[:8]}"
+        return fake_response(schema, hashlib.md5(f"{self.model_name}:{text}".encode()).hexdigest()).model_dump_json()
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[CallbackManagerForLLMRun] = None, response_schema: Optional[Type[BaseModel]] = None, **kwargs) -> ChatResult:
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        content = self._respond(messages, response_schema)
+        _record_call(run_manager, started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[CallbackManagerForLLMRun] = None, response_schema: Optional[Type[BaseModel]] = None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency / 2)
+        content = self._respond(messages, response_schema)
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        for piece in pieces:
+            # The caller reports each chunk to the callbacks (and thus to the "messages" stream)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if self.latency:
+                time.sleep(self.latency / 2 / len(pieces))
+        _record_call(run_manager, started)
+
+
+def _record_call(run_manager: Optional[CallbackManagerForLLMRun], started: float) -> None:
+    """Add a finished call to the per-node stats"""
+    finished = time.perf_counter()
+    # Streaming calls get no run manager, but run inside the node's runnable config
+    metadata = run_manager.metadata if run_manager else ensure_config().get("metadata", {})
+    node = metadata.get("langgraph_node", "")
+    with _lock:
+        node_stats = _stats.setdefault(node, {"calls": 0, "seconds": 0.0})
+        node_stats["calls"] += 1
+        node_stats["seconds"] += finished - started
+        _intervals.setdefault(node, []).append((started, finished))
+
+
+def _busy_seconds(intervals: List[Tuple[float, float]]) -> float:
+    """Wall time covered by possibly overlapping (batched) calls"""
+    busy, covered_until = 0.0, float("-inf")
+    for start, end in sorted(intervals):
+        if end > covered_until:
+            busy += end - max(start, covered_until)
+            covered_until = end
+    return busy
+
+
+def fake_llm_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Fake model usage per graph node since the last reset: calls, total seconds in
+    calls, and busy_seconds (wall time during which at least one call was running).
+    """
+    with _lock:
+        return {
+            node: {**stats, "busy_seconds": _busy_seconds(_intervals.get(node, []))}
+            for node, stats in _stats.items()
+        }
+
+
+def reset_fake_llm_stats() -> None:
+    with _lock:
+        _stats.clear()
+        _intervals.clear()
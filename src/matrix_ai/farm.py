@@ -0,0 +1,197 @@
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from langchain_community.cache import SQLiteCache
+from langchain_community.callbacks import get_openai_callback
+from langchain_core.globals import set_llm_cache
+from pydantic import BaseModel, Field
+
+from .schemas import GameState, GameSettings, MatrixGame, LogEntryType, SecretArgument
+from .main_game_graph import create_main_game_graph
+from .log_store import iter_game_log
+from .scenario_compiler import load_scenario_file
+
+# --- JOB AND RESULT MODELS ---
+
+class GameJob(BaseModel):
+    """A single game to run on the farm."""
+    job_id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="Unique identifier of the job.")
+    scenario_path: str = Field(description="Path to the scenario JSON file.")
+    seed: Optional[int] = Field(default=None, description="Seed for the game's random stream (overrides settings['seed']).")
+    overrides: Dict[str, Any] = Field(default_factory=dict, description="MatrixGame fields to override (e.g., {'game_length': 4}).")
+    settings: Dict[str, Any] = Field(default_factory=dict, description="GameSettings fields to override for this run.")
+
+
+class ArgumentRecord(BaseModel):
+    """Compact record of one adjudicated argument."""
+    turn: int
+    actor_name: str
+    action_description: str
+    adjudication_method: Optional[str] = None
+    probability_estimates: List[float] = Field(default_factory=list)
+    final_probability: Optional[float] = None
+    is_successful: Optional[bool] = None
+    is_secret: bool = False
+    method_source: Optional[str] = None
+    heuristic_method: Optional[str] = None
+    method_features: Dict[str, float] = Field(default_factory=dict)
+    degraded_nodes: List[str] = Field(default_factory=list)
+
+
+class GameResult(BaseModel):
+    """Compact, serializable outcome and metrics of a farm job."""
+    job_id: str
+    scenario_name: str
+    seed: Optional[int] = None
+    status: str = Field(description="'completed' or 'failed'.")
+    error: Optional[str] = None
+    duration_seconds: float = 0.0
+    turns_played: int = 0
+    final_phase: Optional[str] = None
+    arguments: List[ArgumentRecord] = Field(default_factory=list)
+    global_narrative_markers: List[str] = Field(default_factory=list)
+    final_summary: str = ""
+    degraded_entries: int = Field(default=0, description="Log entries produced with at least one fallback after a failed LLM call.")
+    llm_requests: int = 0
+    total_tokens: int = 0
+    total_cost_usd: float = 0.0
+
+# --- WORKER ---
+
+# Compiled once per worker process and reused for every job the worker runs
+_worker_graph = None
+
+
+def _init_worker(cache_path: Optional[str] = None) -> None:
+    """Process pool initializer: compile the game graph once per worker and attach the shared response cache"""
+    global _worker_graph
+    _worker_graph = create_main_game_graph()
+    if cache_path:
+        set_llm_cache(SQLiteCache(database_path=cache_path))
+
+
+def load_matrix_game(scenario_path: str, overrides: Optional[Dict[str, Any]] = None) -> MatrixGame:
+    """Load a scenario (from its compiled artifact when up to date) and apply MatrixGame field overrides"""
+    return load_scenario_file(scenario_path, overrides)
+
+
+def _collect_arguments(state: GameState) -> List[ArgumentRecord]:
+    """Flatten the adjudicated arguments of a finished game into compact records"""
+    records = []
+    for log in iter_game_log(state):
+        if log.entry_type != LogEntryType.ARGUMENT or isinstance(log.content, str):
+            continue
+        argument = log.content
+        records.append(ArgumentRecord(
+            turn=log.turn,
+            actor_name=argument.proposing_actor_name,
+            action_description=argument.action_description,
+            adjudication_method=argument.adjudication_method.value if argument.adjudication_method else None,
+            probability_estimates=argument.probability_estimates,
+            final_probability=argument.final_probability,
+            is_successful=argument.is_successful,
+            is_secret=isinstance(argument, SecretArgument),
+            method_source=argument.method_source,
+            heuristic_method=argument.heuristic_method.value if argument.heuristic_method else None,
+            method_features=argument.method_features,
+            degraded_nodes=log.degraded_nodes
+        ))
+    return records
+
+
+def run_job(job: GameJob, graph=None) -> GameResult:
+    """
+    Run a single farm job in the current process and summarize it as a GameResult.
+
+    The job id is the graph thread id. If the graph was compiled with a checkpointer
+    that already holds this thread (a retry, or a worker restarted after a crash),
+    the game resumes from its last checkpoint instead of starting over, so only the
+    failed or unfinished node runs again.
+    """
+    graph = graph or _worker_graph or create_main_game_graph()
+    started = time.perf_counter()
+    scenario_name = Path(job.scenario_path).stem
+
+    try:
+        game_definition = load_matrix_game(job.scenario_path, job.overrides)
+        scenario_name = game_definition.name
+        settings = GameSettings.model_validate(job.settings)
+        if job.seed is not None:
+            settings.seed = job.seed
+
+        initial_state = GameState.from_matrix_game_setup(game_definition, settings)
+        config = {
+            "configurable": {"thread_id": job.job_id},
+            "recursion_limit": 600
+        }
+
+        snapshot = graph.get_state(config) if graph.checkpointer else None
+        with get_openai_callback() as usage:
+            if snapshot and snapshot.next:
+                final_state = graph.invoke(None, config=config)
+            elif snapshot and snapshot.values:
+                final_state = snapshot.values  # Finished before its result was recorded
+            else:
+                final_state = graph.invoke(initial_state, config=config)
+        final_state = GameState.model_validate(final_state) if isinstance(final_state, dict) else final_state
+
+        return GameResult(
+            job_id=job.job_id,
+            scenario_name=scenario_name,
+            status="completed",
+            duration_seconds=time.perf_counter() - started,
+            seed=final_state.settings.seed,
+            turns_played=final_state.current_turn,
+            final_phase=final_state.current_phase.value,
+            arguments=_collect_arguments(final_state),
+            global_narrative_markers=final_state.global_narrative_markers,
+            final_summary=final_state.game_state_summary,
+            degraded_entries=sum(1 for entry in iter_game_log(final_state) if entry.degraded),
+            llm_requests=usage.successful_requests,
+            total_tokens=usage.total_tokens,
+            total_cost_usd=usage.total_cost
+        )
+
+    except Exception as e:
+        return GameResult(
+            job_id=job.job_id,
+            scenario_name=scenario_name,
+            seed=job.seed,
+            status="failed",
+            error=f"{type(e).__name__}: {e}",
+            duration_seconds=time.perf_counter() - started
+        )
+
+
+def _run_job_serialized(job_json: str) -> str:
+    """Worker entry point: jobs and results cross the process boundary as JSON, not pickled state"""
+    return run_job(GameJob.model_validate_json(job_json)).model_dump_json()
+
+# --- FARM API ---
+
+def iter_game_farm(jobs: Iterable[GameJob], max_workers: Optional[int] = None, cache_path: Optional[str] = None) -> Iterator[GameResult]:
+    """
+    Run jobs across a process pool and yield results as they complete.
+
+    Each worker process compiles the game graph once and keeps its pooled LLM
+    clients warm across the jobs it runs. If cache_path is given, all workers
+    share an on-disk LLM response cache, so identical calls across jobs are only
+    paid for once.
+    """
+    if cache_path:
+        # Create the cache tables once up front so workers don't race to create them
+        SQLiteCache(database_path=cache_path)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(cache_path,)) as executor:
+        futures = [executor.submit(_run_job_serialized, job.model_dump_json()) for job in jobs]
+        for future in as_completed(futures):
+            yield GameResult.model_validate_json(future.result())
+
+
+def run_game_farm(jobs: List[GameJob], max_workers: Optional[int] = None, cache_path: Optional[str] = None) -> List[GameResult]:
+    """Run jobs across a process pool and return their results in job order"""
+    results = {result.job_id: result for result in iter_game_farm(jobs, max_workers, cache_path)}
+    return [results[job.job_id] for job in jobs]
@@ -0,0 +1,272 @@
+import contextlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # Optional dependency: pip install -e ".[queue]"
+    SqliteSaver = None
+
+from .farm import GameJob, GameResult, load_matrix_game, run_job
+from .main_game_graph import create_main_game_graph
+from .serialization import CompactSerializer
+
+# Durable job queue for long-running games. Jobs live in a SQLite file, so they
+# survive restarts. Any number of worker processes can pull from the same file.
+# Workers run each game with a SQLite checkpointer keyed by the job id. A claimed
+# job holds a lease that its worker renews while the game runs. If the worker dies,
+# the lease expires and the next worker to claim the job resumes the game from its
+# last checkpoint. A job that fails is retried (with backoff) from the checkpoint
+# of its failed node, up to max_attempts.
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        job TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        worker_id TEXT,
+        lease_expires REAL,
+        available_at REAL NOT NULL,
+        enqueued_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL,
+        error TEXT,
+        result TEXT
+    );
+    CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, available_at);
+"""
+
+
+def _require_sqlite_saver() -> None:
+    if SqliteSaver is None:
+        raise ImportError("langgraph-checkpoint-sqlite is required for queue workers. Install it with: pip install -e \".[queue]\"")
+
+# --- QUEUE ---
+
+class JobQueue:
+    """SQLite-backed queue of game jobs with leases, retries and results."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+
+    def enqueue(self, job: GameJob, max_attempts: int = 3) -> str:
+        """Add a job to the queue and return its id"""
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO jobs (job_id, job, status, max_attempts, available_at, enqueued_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job.job_id, job.model_dump_json(), max_attempts, now, now)
+            )
+        return job.job_id
+
+    def claim(self, worker_id: str, lease_seconds: float = 120.0) -> Optional[Tuple[GameJob, int]]:
+        """
+        Atomically take the next job and return it with its attempt number.
+
+        In-flight jobs whose lease expired (their worker died) or that belong to this
+        worker id (it restarted) are taken first, so interrupted games are resumed
+        before new ones start.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    """
+                    SELECT job_id, job, attempts FROM jobs
+                    WHERE (status = 'running' AND (lease_expires < ? OR worker_id = ?))
+                       OR (status = 'queued' AND available_at <= ?)
+                    ORDER BY status = 'queued', enqueued_at
+                    LIMIT 1
+                    """,
+                    (now, worker_id, now)
+                ).fetchone()
+                if row is None:
+                    self._connection.execute("COMMIT")
+                    return None
+
+                job_id, job_json, attempts = row
+                self._connection.execute(
+                    """
+                    UPDATE jobs SET status = 'running', attempts = ?, worker_id = ?, lease_expires = ?,
+                        started_at = COALESCE(started_at, ?)
+                    WHERE job_id = ?
+                    """,
+                    (attempts + 1, worker_id, now + lease_seconds, now, job_id)
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        return GameJob.model_validate_json(job_json), attempts + 1
+
+    def renew_lease(self, job_id: str, worker_id: str, lease_seconds: float = 120.0) -> bool:
+        """Extend a running job's lease; False if the job is no longer held by this worker"""
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: GameResult) -> None:
+        """Record a finished job's result"""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = 'completed', finished_at = ?, result = ?, error = NULL, lease_expires = NULL WHERE job_id = ? AND worker_id = ?",
+                (time.time(), result.model_dump_json(), job_id, worker_id)
+            )
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry_delay: float = 5.0) -> bool:
+        """
+        Record a failed attempt. The job is requeued with exponential backoff while it
+        has attempts left; returns True if it will be retried.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT attempts, max_attempts FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return False
+            attempts, max_attempts = row
+            retry = attempts < max_attempts
+            self._connection.execute(
+                """
+                UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_expires = NULL,
+                    finished_at = CASE WHEN ? THEN NULL ELSE ? END
+                WHERE job_id = ? AND worker_id = ?
+                """,
+                ("queued" if retry else "failed", error, now + retry_delay * 2 ** (attempts - 1), retry, now, job_id, worker_id)
+            )
+        return retry
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's queue record (status, attempts, timings, error)"""
+        with self._lock:
+            cursor = self._connection.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+            row = cursor.fetchone()
+            columns = [column[0] for column in cursor.description]
+        return {name: value for name, value in zip(columns, row) if name not in ("job", "result")} if row else None
+
+    def results(self, status: Optional[str] = None) -> List[GameResult]:
+        """Results of finished jobs in enqueue order (failed jobs without a result are skipped)"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT result FROM jobs WHERE result IS NOT NULL ORDER BY enqueued_at"
+            ).fetchall()
+        results = [GameResult.model_validate_json(result) for (result,) in rows]
+        return [r for r in results if status is None or r.status == status]
+
+    def stats(self, window_seconds: float = 600.0) -> Dict[str, Any]:
+        """
+        Queue depth and throughput: jobs per status, jobs ready to run, jobs waiting to
+        be retried, the age of the oldest ready job, and completions per minute and mean
+        job duration over the last window_seconds.
+        """
+        now = time.time()
+        with self._lock:
+            counts = dict(self._connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            ready, oldest = self._connection.execute(
+                "SELECT COUNT(*), MIN(enqueued_at) FROM jobs WHERE status = 'queued' AND available_at <= ?", (now,)
+            ).fetchone()
+            finished, mean_duration = self._connection.execute(
+                "SELECT COUNT(*), AVG(finished_at - started_at) FROM jobs WHERE status = 'completed' AND finished_at >= ?",
+                (now - window_seconds,)
+            ).fetchone()
+
+        return {
+            "queued": counts.get("queued", 0),
+            "ready": ready,
+            "waiting_retry": counts.get("queued", 0) - ready,
+            "running": counts.get("running", 0),
+            "completed": counts.get("completed", 0),
+            "failed": counts.get("failed", 0),
+            "oldest_ready_seconds": round(now - oldest, 1) if oldest else 0.0,
+            "completed_per_minute": round(finished * 60 / window_seconds, 3),
+            "mean_duration_seconds": round(mean_duration, 2) if mean_duration else None,
+        }
+
+    def close(self) -> None:
+        self._connection.close()
+
+# --- WORKERS ---
+
+def _renew_until(stop: threading.Event, queue: JobQueue, job_id: str, worker_id: str, lease_seconds: float) -> None:
+    """Keep renewing a job's lease until stop is set"""
+    while not stop.wait(lease_seconds / 3):
+        queue.renew_lease(job_id, worker_id, lease_seconds)
+
+
+def run_worker(
+    queue_path: str,
+    checkpoint_path: str,
+    worker_id: Optional[str] = None,
+    lease_seconds: float = 120.0,
+    poll_interval: float = 1.0,
+    retry_delay: float = 5.0,
+    stop_when_empty: bool = False,
+    keep_checkpoints: bool = False,
+    compact_checkpoints: bool = False,
+) -> int:
+    """
+    Pull jobs from the queue and run them until interrupted (or until the queue has
+    no ready or running jobs, with stop_when_empty). Returns the number of jobs
+    this worker finished.
+
+    Every game is checkpointed to checkpoint_path under its job id, which is what lets
+    a retry or a restarted worker resume it. A stable worker_id (the default is
+    host:pid) lets a restarted worker take back its own in-flight jobs without
+    waiting for their leases to expire. Checkpoints of completed games are deleted
+    unless keep_checkpoints is set. With compact_checkpoints, checkpoints are written
+    with the CompactSerializer, compressed with each job's scenario dictionary.
+    """
+    _require_sqlite_saver()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(queue_path)
+    serde = CompactSerializer() if compact_checkpoints else None
+    checkpointer = SqliteSaver(sqlite3.connect(checkpoint_path, timeout=30, check_same_thread=False), serde=serde)
+    graph = create_main_game_graph(checkpointer=checkpointer)
+    finished = 0
+
+    try:
+        while True:
+            claimed = queue.claim(worker_id, lease_seconds)
+            if claimed is None:
+                stats = queue.stats()
+                if stop_when_empty and stats["queued"] == 0 and stats["running"] == 0:
+                    return finished
+                time.sleep(poll_interval)
+                continue
+
+            job, attempt = claimed
+            if serde is not None:
+                # A scenario that fails to load is reported by run_job
+                with contextlib.suppress(Exception):
+                    serde.add_scenario(load_matrix_game(job.scenario_path, job.overrides))
+            stop = threading.Event()
+            renewer = threading.Thread(target=_renew_until, args=(stop, queue, job.job_id, worker_id, lease_seconds), daemon=True)
+            renewer.start()
+            try:
+                result = run_job(job, graph)
+            finally:
+                stop.set()
+                renewer.join()
+
+            if result.status == "completed":
+                queue.complete(job.job_id, worker_id, result)
+                if not keep_checkpoints:
+                    checkpointer.delete_thread(job.job_id)
+                finished += 1
+            elif not queue.fail(job.job_id, worker_id, result.error or "unknown error", retry_delay):
+                finished += 1
+    finally:
+        queue.close()
@@ -0,0 +1,81 @@
+import os
+from functools import lru_cache
+from typing import Optional
+
+from langchain_core.rate_limiters import BaseRateLimiter, InMemoryRateLimiter
+from langchain_openai import ChatOpenAI
+
+from .schemas import GameState
+from .routing import match_route
+from .fake_llm import FakeChatModel
+
+DEFAULT_MODEL = "gpt-4.1-mini"
+
+# 'openai' (default) or 'fake' for the deterministic offline model in fake_llm.py
+LLM_BACKEND_ENV = "MATRIX_AI_LLM_BACKEND"
+
+# Rate limiter shared by every pooled client (None = unlimited)
+_rate_limiter: Optional[BaseRateLimiter] = None
+
+# --- CLIENT POOL ---
+
+@lru_cache(maxsize=None)
+def get_llm(model: str = DEFAULT_MODEL, temperature: float = 0.0, base_url: Optional[str] = None) -> ChatOpenAI:
+    """
+    Return a shared chat model client for the given model, temperature and endpoint.
+
+    Clients are created once per process and reused by every node, so repeated
+    games in the same process (e.g. a game farm worker) keep their HTTP
+    connections warm instead of opening new ones for each call. The model name
+    'fake' always returns the offline stand-in.
+    """
+    if model == "fake" or os.environ.get(LLM_BACKEND_ENV, "openai") == "fake":
+        return FakeChatModel(model=model, temperature=temperature, rate_limiter=_rate_limiter)
+    return ChatOpenAI(model=model, temperature=temperature, base_url=base_url, rate_limiter=_rate_limiter)
+
+
+def clear_llm_pool() -> None:
+    """Drop all pooled clients (e.g. after changing API credentials or the backend)"""
+    get_llm.cache_clear()
+
+
+def set_rate_limit(requests_per_second: Optional[float], max_burst: int = 10) -> None:
+    """
+    Cap the model requests of all pooled clients in this process, shared across games.
+
+    Every client in the pool draws from one token bucket, so concurrent games cannot
+    together exceed the provider's rate limit. None removes the limit. The pool is
+    rebuilt so existing clients pick up the change.
+    """
+    global _rate_limiter
+    _rate_limiter = InMemoryRateLimiter(
+        requests_per_second=requests_per_second,
+        check_every_n_seconds=min(0.1, 1 / requests_per_second),
+        max_bucket_size=max_burst
+    ) if requests_per_second else None
+    clear_llm_pool()
+
+
+def get_node_llm(state: GameState, node: str, temperature: float) -> ChatOpenAI:
+    """
+    Return the pooled client for a node's call.
+
+    The model routing table (GameSettings.routing) is consulted first; per-node (or
+    '*') overrides from GameSettings.node_models are then applied on top.
+    """
+    settings = state.settings
+    model, base_url = DEFAULT_MODEL, None
+    
+    route = match_route(state, node)
+    if route:
+        model = route.model or model
+        temperature = route.temperature if route.temperature is not None else temperature
+        base_url = route.base_url
+    
+    override = settings.node_models.get(node) or settings.node_models.get("*")
+    if override and override.model:
+        model = override.model
+    if override and override.temperature is not None:
+        temperature = override.temperature
+    
+    return get_llm(model, temperature, base_url)
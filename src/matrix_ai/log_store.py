@@ -0,0 +1,138 @@
+import sqlite3
+from threading import Lock
+from typing import Dict, Iterator, List, Optional
+
+from .schemas import GameState, LogEntry, LogEntryType
+
+# Spill-to-disk game log. With GameSettings.log_store_path set, GameState.game_log
+# only keeps the most recent log_window entries; older entries are appended to a
+# SQLite file and read back lazily. Spilled entries are chained to their parent
+# entry rather than keyed by position, so games forked from a checkpoint (see
+# branching and counterfactual) each keep their own history in the same store.
+
+_stores: Dict[str, "GameLogStore"] = {}
+_stores_lock = Lock()
+
+# Nodes whose fallbacks go into the current argument: they are recorded on that
+# argument's log entry, not on an event logged while it is being resolved
+ARGUMENT_NODES = frozenset({
+    "player_deliberation", "validate_secret_argument", "check_big_project", "check_secret_triggers",
+    "gather_critic_feedback", "determine_adjudication_method", "estimate_probability", "panel_adjudication",
+    "create_narrative_and_update_world_state",
+})
+
+# --- STORE ---
+
+class GameLogStore:
+    """Append-only SQLite store of spilled game log entries."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS log_entries (
+                entry_id TEXT PRIMARY KEY,
+                parent_id TEXT,
+                game_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                turn INTEGER NOT NULL,
+                entry_type TEXT NOT NULL,
+                actor_name TEXT,
+                payload TEXT NOT NULL
+            )
+        """)
+        self._connection.commit()
+
+    def append(self, game_id: str, entries: List[LogEntry], parent_id: Optional[str], position: int) -> Optional[str]:
+        """Append entries after parent_id (the entry at position - 1) and return the new head id"""
+        rows = []
+        for entry in entries:
+            rows.append((
+                entry.entry_id, parent_id, game_id, position, entry.turn,
+                entry.entry_type.value, entry.actor_name, entry.model_dump_json()
+            ))
+            parent_id = entry.entry_id
+            position += 1
+
+        with self._lock:
+            # Entries are immutable, so re-spilling a shared prefix from another fork is a no-op
+            self._connection.executemany("INSERT OR IGNORE INTO log_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._connection.commit()
+        return parent_id
+
+    def iter_chain(self, head_id: str, start: int = 0) -> Iterator[LogEntry]:
+        """Lazily yield the entries of the chain ending at head_id, from position start onwards"""
+        query = """
+            WITH RECURSIVE chain(entry_id, parent_id, position) AS (
+                SELECT entry_id, parent_id, position FROM log_entries WHERE entry_id = ?
+                UNION ALL
+                SELECT e.entry_id, e.parent_id, e.position
+                FROM log_entries e JOIN chain c ON e.entry_id = c.parent_id
+                WHERE c.position > ?
+            )
+            SELECT l.payload FROM chain JOIN log_entries l ON l.entry_id = chain.entry_id
+            WHERE chain.position >= ? ORDER BY chain.position
+        """
+        with self._lock:
+            rows = self._connection.execute(query, (head_id, start, start)).fetchall()
+        for (payload,) in rows:
+            yield LogEntry.model_validate_json(payload)
+
+
+def get_log_store(path: str) -> GameLogStore:
+    """Return the process-wide store for a path, opening it on first use"""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = GameLogStore(path)
+        return _stores[path]
+
+# --- GAME LOG ACCESS ---
+
+def log_length(state: GameState) -> int:
+    """Total number of entries in the game log, spilled or not"""
+    return state.game_log_offset + len(state.game_log)
+
+
+def iter_game_log(state: GameState, start: int = 0) -> Iterator[LogEntry]:
+    """Yield the full game log from absolute position start, reading spilled entries lazily"""
+    if start < state.game_log_offset and state.spilled_log_head:
+        yield from get_log_store(state.settings.log_store_path).iter_chain(state.spilled_log_head, start)
+    yield from state.game_log[max(0, start - state.game_log_offset):]
+
+
+def recent_log_entries(state: GameState, count: int) -> List[LogEntry]:
+    """The last count entries of the game log"""
+    return list(iter_game_log(state, max(0, log_length(state) - count)))
+
+
+def append_log_entry(state: GameState, entry: LogEntry) -> None:
+    """Append an entry to the game log, index it, and spill the oldest entries if over the window"""
+    # Fallbacks taken since the previous entry went into producing this one; those of
+    # argument nodes wait for the argument's own entry
+    is_argument = entry.entry_type == LogEntryType.ARGUMENT
+    degraded = [node for node in state.pending_degraded_nodes if is_argument or node not in ARGUMENT_NODES]
+    if degraded:
+        entry.degraded = True
+        entry.degraded_nodes = list(dict.fromkeys(entry.degraded_nodes + degraded))
+        state.pending_degraded_nodes = [node for node in state.pending_degraded_nodes if node not in degraded]
+        state.mark_changed("pending_degraded_nodes")
+    if entry.entry_type == LogEntryType.ARGUMENT and hasattr(entry.content, "proposing_actor_name"):
+        state.actor_last_argument[entry.content.proposing_actor_name] = log_length(state)
+        state.mark_changed("actor_last_argument")
+    state.game_log.append(entry)
+
+    settings = state.settings
+    overflow = len(state.game_log) - settings.log_window
+    if settings.log_store_path and overflow > 0:
+        spilled = state.game_log[:overflow]
+        state.spilled_log_head = get_log_store(settings.log_store_path).append(
+            state.game_id, spilled, state.spilled_log_head, state.game_log_offset
+        )
+        state.game_log = state.game_log[overflow:]
+        state.game_log_offset += overflow
+        state.mark_changed("spilled_log_head", "game_log_offset")
+    else:
+        overflow = 0
+    state.record_log_append(entry, overflow)
@@ -1,17 +1,21 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, START, END
-import random
 import uuid
 from datetime import datetime
 
 from .schemas import (
-    GameState, GamePhase, LogEntry, LogEntryType, Actor,
-    GameOverCheckResponse, EndGameAssessmentResponse
+    GameState, GameSettings, GamePhase, LogEntry, LogEntryType, Actor,
+    GameOverCheckResponse, EndGameAssessmentResponse, StateUpdate
 )
-from .argumentation import create_argumentation_graph
+from .llm import get_node_llm
+from .call_policy import call_llm, mark_degraded, LLMCallError
+from .rng import game_rng
+from .log_store import append_log_entry, recent_log_entries
+from .argumentation import create_argumentation_graph, start_speculative_deliberation
 from .adjudication import create_adjudication_graph  
 from .scenario_update import create_scenario_update_graph
+from .speculation import discard_speculation
+from .relevance import related_actors, render_actor_status, render_markers, turn_activity
 
 # --- PROMPTS ---
 
@@ -32,7 +36,7 @@ Game Context:
 Current Turn: {current_turn}
 Maximum Turns: {max_turns}
 
-For each actor, consider their objectives and current status:
+Consider each actor's objectives and current status (effects are listed for the actors most involved this turn; for the others only their number is given):
 {actor_objectives_status}"""),
     ("human", """Current Game State:
 {game_state_summary}
@@ -72,16 +76,16 @@ Provide a comprehensive final assessment of the game outcome.""")
 
 # --- NODE FUNCTIONS ---
 
-def establish_turn_order(state: GameState) -> GameState:
+def establish_turn_order(state: GameState) -> StateUpdate:
     """Node to establish initial turn order (can be random or fixed)"""
     
     if not state.turn_order:
         # Create initial turn order based on actor definitions
         num_actors = len(state.game_definition.actors)
         state.turn_order = list(range(num_actors))
-        
-        # Could randomize here if desired
-        # random.shuffle(state.turn_order)
+    
+    if state.settings.randomize_turn_order:
+        game_rng(state, "turn_order").shuffle(state.turn_order)
     
     state.active_player_queue_index = 0
     
@@ -96,14 +100,14 @@ def establish_turn_order(state: GameState) -> GameState:
         content=f"Turn order established: {' -> '.join(turn_order_names)}",
         summary="Game started - turn order established"
     )
-    state.game_log.append(log_entry)
+    append_log_entry(state, log_entry)
     
     # Set phase for what's coming next (argumentation)
     state.current_phase = GamePhase.ARGUMENTATION
     
-    return state
+    return state.delta("turn_order", "active_player_queue_index", "current_phase")
 
-def advance_to_next_player(state: GameState) -> GameState:
+def advance_to_next_player(state: GameState) -> StateUpdate:
     """Node to advance to the next player's turn"""
     
     # Move to next player in turn order
@@ -123,14 +127,14 @@ def advance_to_next_player(state: GameState) -> GameState:
             content=f"Advanced to turn {state.current_turn}",
             summary=f"Turn {state.current_turn} started"
         )
-        state.game_log.append(log_entry)
+        append_log_entry(state, log_entry)
     
     # Set phase for what's coming next (argumentation by next player)
     state.current_phase = GamePhase.ARGUMENTATION
     
-    return state
+    return state.delta("active_player_queue_index", "current_turn", "current_phase")
 
-def check_game_over(state: GameState) -> GameState:
+def check_game_over(state: GameState) -> StateUpdate:
     """Node to check if game over conditions are met"""
     
     # Check if we're at the end of the final turn
@@ -151,52 +155,40 @@ def check_game_over(state: GameState) -> GameState:
             content=f"Game ended: Maximum turn limit of {state.game_definition.game_length} reached",
             summary="Game over - maximum turns reached"
         )
-        state.game_log.append(log_entry)
-        return state
+        append_log_entry(state, log_entry)
+        return state.delta("current_phase")
     
     # Only do AI-based game over check at the end of complete turns
     # (when the last player has finished their turn)
     if not is_last_player:
         # Not at end of turn yet, continue
-        return state
+        return {}
     
     # Second check: Use LLM to evaluate objective achievement and deadlock
     # This only runs at the end of complete turns (after last player)
     
     # Prepare context for game over check
     game_context = f"""
-Game: {state.game_definition.name}
-Background: {state.game_definition.background_briefing}
+{state.game_definition.fragments().game_header}
 Turn Length: {state.game_definition.turn_length}
 """
     
-    # Format actor objectives and status
-    actor_objectives_status = []
-    for i, actor_def in enumerate(state.game_definition.actors):
-        actor_state = state.actor_states[i]
-        objectives_str = "\n".join([f"  - {obj}" for obj in actor_def.objectives])
-        effects_str = "\n".join([f"  - {effect}" for effect in actor_state.effects])
-        
-        actor_status = f"""
-{actor_def.actor_name}:
-Objectives:
-{objectives_str}
-Current Status/Effects:
-{effects_str}
-"""
-        actor_objectives_status.append(actor_status)
-    
-    actor_objectives_status_str = "\n".join(actor_objectives_status)
-    global_markers_str = "\n".join(state.global_narrative_markers) if state.global_narrative_markers else "None"
+    # Every actor's objectives, but effects only of the actors most active this turn
+    # (and those related to them), so the prompt grows little with the cast
+    settings = state.settings
+    context = " ".join([state.game_state_summary, *state.global_narrative_markers])
+    actor_names = related_actors(state, turn_activity(state), context, settings.max_context_actors)
+    actor_objectives_status_str = render_actor_status(state, actor_names, context, settings.max_context_markers)
+    global_markers_str = render_markers(state.global_narrative_markers, actor_names, state.game_state_summary, settings.max_context_markers)
     
     # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.3)
+    llm = get_node_llm(state, "check_game_over", temperature=0.3)
     
     # Create game over check chain with structured output
     game_over_chain = GAME_OVER_CHECK_PROMPT | llm.with_structured_output(GameOverCheckResponse)
     
     try:
-        response = game_over_chain.invoke({
+        response = call_llm(state, "check_game_over", game_over_chain, {
             "game_context": game_context,
             "max_turns": state.game_definition.game_length,
             "current_turn": state.current_turn,
@@ -218,50 +210,59 @@ Current Status/Effects:
                 content=f"Game over conditions met: {response.reasoning}. Objectives achieved by: {', '.join(response.objectives_achieved) if response.objectives_achieved else 'None'}",
                 summary="Game over - objectives achieved or deadlock"
             )
-            state.game_log.append(log_entry)
+            append_log_entry(state, log_entry)
         
-    except Exception as e:
+    except LLMCallError as e:
         print(f"Error in game over check: {e}")
         # Fallback: continue game unless at turn limit
         # The turn limit was already checked above
+        mark_degraded(state, "check_game_over")
+        # The ruling to continue is this fallback's output; it carries the degraded flag
+        log_entry = LogEntry(
+            entry_id=str(uuid.uuid4()),
+            timestamp=datetime.now().isoformat(),
+            turn=state.current_turn,
+            phase=state.current_phase,
+            entry_type=LogEntryType.UMPIRE_RULING,
+            content="Game over check unavailable: the game continues",
+            summary="Game continues - game over check unavailable"
+        )
+        append_log_entry(state, log_entry)
     
-    return state
+    return state.delta("current_phase")
 
-def end_game_sequence(state: GameState) -> GameState:
+def end_game_sequence(state: GameState) -> StateUpdate:
     """Node to conduct final game assessment and reporting"""
     
     state.current_phase = GamePhase.FINAL_REPORTING
     
+    # Drop any speculative deliberation for a turn that will not be played
+    discard_speculation(state.game_id)
+    
     # Prepare context for final assessment
     game_context = f"""
-Game: {state.game_definition.name}
-Background: {state.game_definition.background_briefing}
+{state.game_definition.fragments().game_header}
 Game Length: {state.game_definition.game_length} turns
 Actual Duration: {state.current_turn} turns
 """
     
-    # Format actor objectives
-    actor_objectives = []
-    for actor_def in state.game_definition.actors:
-        objectives_str = "\n".join([f"  - {obj}" for obj in actor_def.objectives])
-        actor_objectives.append(f"{actor_def.actor_name}:\n{objectives_str}")
-    
-    actor_objectives_str = "\n\n".join(actor_objectives)
+    # Actor objectives (precomputed with the scenario)
+    actor_objectives_str = state.game_definition.fragments().all_actor_objectives
     
     # Create summary of game log
-    recent_entries = state.game_log[-20:] if len(state.game_log) > 20 else state.game_log
+    recent_entries = recent_log_entries(state, 20)
     game_log_summary = "\n".join([entry.summary for entry in recent_entries if entry.summary])
     
     global_markers_str = "\n".join(state.global_narrative_markers) if state.global_narrative_markers else "None"
     
     # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.5)
+    llm = get_node_llm(state, "end_game_sequence", temperature=0.5)
     
     # Create end game assessment chain with structured output
     assessment_chain = END_GAME_ASSESSMENT_PROMPT | llm.with_structured_output(EndGameAssessmentResponse)
     
     try:
-        final_assessment = assessment_chain.invoke({
+        final_assessment = call_llm(state, "end_game_sequence", assessment_chain, {
             "game_context": game_context,
             "actor_objectives": actor_objectives_str,
             "game_state_summary": state.game_state_summary,
@@ -307,11 +308,12 @@ NARRATIVE CONCLUSION:
             content=assessment_content,
             summary="Final game assessment completed"
         )
-        state.game_log.append(final_log)
+        append_log_entry(state, final_log)
         
-    except Exception as e:
+    except LLMCallError as e:
         print(f"Error in final assessment: {e}")
         # Create simple fallback assessment
+        mark_degraded(state, "end_game_sequence")
         final_log = LogEntry(
             entry_id=str(uuid.uuid4()),
             timestamp=datetime.now().isoformat(),
@@ -321,10 +323,10 @@ NARRATIVE CONCLUSION:
             content=f"Game concluded after {state.current_turn} turns. Final state: {state.game_state_summary}",
             summary="Game ended - basic assessment"
         )
-        state.game_log.append(final_log)
+        append_log_entry(state, final_log)
     
     state.current_phase = GamePhase.GAME_ENDED
-    return state
+    return state.delta("current_phase")
 
 # --- CONDITIONAL EDGES ---
 
@@ -337,7 +339,7 @@ def is_game_over(state: GameState) -> str:
 
 # --- GRAPH CONSTRUCTION ---
 
-def create_main_game_graph() -> StateGraph:
+def create_main_game_graph(checkpointer=None) -> StateGraph:
     """Create the main game workflow graph that combines all modules"""
     
     # Create the main graph
@@ -352,6 +354,7 @@ def create_main_game_graph() -> StateGraph:
     workflow.add_node("establish_turn_order", establish_turn_order)
     workflow.add_node("next_player_turn", advance_to_next_player)
     workflow.add_node("check_game_over", check_game_over)
+    workflow.add_node("start_speculative_deliberation", start_speculative_deliberation)
     workflow.add_node("end_game_sequence", end_game_sequence)
     
     # Add subgraph nodes
@@ -364,7 +367,9 @@ def create_main_game_graph() -> StateGraph:
     workflow.add_edge("establish_turn_order", "argumentation")
     
     # Main game loop: argumentation -> adjudication -> scenario_update -> check_game_over
-    workflow.add_edge("argumentation", "adjudication")
+    # (the next actor's speculative deliberation, if enabled, is started before adjudication)
+    workflow.add_edge("argumentation", "start_speculative_deliberation")
+    workflow.add_edge("start_speculative_deliberation", "adjudication")
     workflow.add_edge("adjudication", "scenario_update")
     workflow.add_edge("scenario_update", "check_game_over")
     
@@ -383,11 +388,11 @@ def create_main_game_graph() -> StateGraph:
     # End game
     workflow.add_edge("end_game_sequence", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 # --- HELPER FUNCTIONS ---
 
-def run_matrix_game(game_definition, max_turns=None, checkpointer=None):
+def run_matrix_game(game_definition, max_turns=None, checkpointer=None, settings=None, seed=None):
     """
     Helper function to run a complete matrix game
     
@@ -395,6 +400,8 @@ def run_matrix_game(game_definition, max_turns=None, checkpointer=None):
         game_definition: MatrixGame object defining the game setup
         max_turns: Optional override for maximum turns (uses game_definition.game_length if None)
         checkpointer: Optional checkpointer for persistence
+        settings: Optional GameSettings for this run (defaults are used if None)
+        seed: Optional seed for the game's random stream (overrides settings.seed)
     
     Returns:
         Final GameState after game completion
@@ -404,26 +411,27 @@ def run_matrix_game(game_definition, max_turns=None, checkpointer=None):
     if max_turns is not None:
         game_definition.game_length = max_turns
     
+    # Apply the seed override
+    if seed is not None:
+        settings = (settings or GameSettings()).model_copy(update={"seed": seed})
+    
     # Initialize game state
-    initial_state = GameState.from_matrix_game_setup(game_definition)
+    initial_state = GameState.from_matrix_game_setup(game_definition, settings)
     
-    # Create and compile the graph
-    graph = create_main_game_graph()
+    # Create and compile the graph (with the checkpointer, if any, so every step is persisted)
+    graph = create_main_game_graph(checkpointer=checkpointer)
     
     # Run the game with increased recursion limit
     config = {
-        "thread_id": str(uuid.uuid4()),
+        "configurable": {"thread_id": initial_state.game_id},
         "recursion_limit": 600
     }
     
-    if checkpointer:
-        final_state = graph.invoke(initial_state, config=config, checkpointer=checkpointer)
-    else:
-        final_state = graph.invoke(initial_state, config=config)
+    final_state = graph.invoke(initial_state, config=config)
     
     return final_state
 
-def stream_matrix_game(game_definition, max_turns=None, checkpointer=None, stream_mode="updates"):
+def stream_matrix_game(game_definition, max_turns=None, checkpointer=None, stream_mode="updates", settings=None, seed=None, subgraphs=False):
     """
     Helper function to stream a matrix game execution
     
@@ -432,6 +440,10 @@ def stream_matrix_game(game_definition, max_turns=None, checkpointer=None, strea
         max_turns: Optional override for maximum turns
         checkpointer: Optional checkpointer for persistence
         stream_mode: Streaming mode - "updates", "values", "messages", "custom", or "debug"
+        settings: Optional GameSettings for this run (defaults are used if None)
+        seed: Optional seed for the game's random stream (overrides settings.seed)
+        subgraphs: Also stream from inside the subgraphs (needed for "messages" from the
+            deliberation and narrative nodes); items are then prefixed with their namespace
     
     Yields:
         GameState updates as the game progresses
@@ -441,24 +453,24 @@ def stream_matrix_game(game_definition, max_turns=None, checkpointer=None, strea
     if max_turns is not None:
         game_definition.game_length = max_turns
     
+    # Apply the seed override
+    if seed is not None:
+        settings = (settings or GameSettings()).model_copy(update={"seed": seed})
+    
     # Initialize game state
-    initial_state = GameState.from_matrix_game_setup(game_definition)
+    initial_state = GameState.from_matrix_game_setup(game_definition, settings)
     
-    # Create and compile the graph
-    graph = create_main_game_graph()
+    # Create and compile the graph (with the checkpointer, if any, so every step is persisted)
+    graph = create_main_game_graph(checkpointer=checkpointer)
     
     # Stream the game with increased recursion limit
     config = {
-        "thread_id": str(uuid.uuid4()),
+        "configurable": {"thread_id": initial_state.game_id},
         "recursion_limit": 600
     }
     
-    if checkpointer:
-        for state in graph.stream(initial_state, config=config, checkpointer=checkpointer, stream_mode=stream_mode):
-            yield state
-    else:
-        for state in graph.stream(initial_state, config=config, stream_mode=stream_mode):
-            yield state
+    for state in graph.stream(initial_state, config=config, stream_mode=stream_mode, subgraphs=subgraphs):
+        yield state
 
 
 graph = create_main_game_graph()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Tuple
+
+from .schemas import GameSettings
+
+# --- HELPER FUNCTIONS ---
+
+def normalize_marker(marker: str) -> str:
+    """Lowercase a marker and strip punctuation and repeated whitespace for comparison"""
+    text = re.sub(r"[^\w\s]", " ", marker.lower())
+    return " ".join(text.split())
+
+
+def _is_duplicate(a: str, b: str, threshold: float) -> bool:
+    """Check whether two normalized markers are exact or fuzzy duplicates"""
+    if a == b:
+        return True
+    if threshold >= 1.0:
+        return False
+    return SequenceMatcher(None, a, b).ratio() >= threshold
+
+
+def dedupe_texts(texts: List[str], threshold: float) -> List[str]:
+    """Drop blank texts and exact or fuzzy duplicates of earlier ones, keeping the first wording"""
+    kept: List[str] = []
+    normalized: List[str] = []
+    for text in texts:
+        norm = normalize_marker(text)
+        if norm and not any(_is_duplicate(existing, norm, threshold) for existing in normalized):
+            kept.append(text.strip())
+            normalized.append(norm)
+    return kept
+
+
+def compact_markers(
+    markers: List[str],
+    marker_turns: Dict[str, int],
+    current_turn: int,
+    settings: GameSettings,
+) -> Tuple[List[str], Dict[str, int], List[str]]:
+    """
+    Merge duplicate markers, expire stale ones and cap the active set.
+
+    Markers are processed oldest first. A marker that duplicates an earlier one
+    replaces it (the newer wording wins) and is moved to the end of the list, so
+    the active list stays ordered by when each marker was last asserted. Markers
+    without an entry in marker_turns are treated as asserted in current_turn.
+
+    Returns:
+        (active markers, last-asserted turn per active marker, archived entries)
+    """
+    active: List[str] = []
+    normalized: List[str] = []
+    turns: Dict[str, int] = {}
+    archived: List[str] = []
+
+    for marker in markers:
+        text = marker.strip()
+        if not text:
+            continue
+
+        seen_turn = marker_turns.get(marker, current_turn)
+        norm = normalize_marker(text)
+
+        match = next(
+            (i for i, existing in enumerate(normalized)
+             if _is_duplicate(existing, norm, settings.marker_similarity_threshold)),
+            None
+        )
+
+        if match is not None:
+            previous = active.pop(match)
+            previous_norm = normalized.pop(match)
+            seen_turn = max(seen_turn, turns.pop(previous))
+            if previous_norm != norm:
+                archived.append(f"Turn {seen_turn}: {previous} (merged into: {text})")
+
+        active.append(text)
+        normalized.append(norm)
+        turns[text] = seen_turn
+
+    # Expire markers that have not been re-asserted recently
+    if settings.marker_expiry_turns is not None:
+        kept = []
+        for marker in active:
+            if current_turn - turns[marker] >= settings.marker_expiry_turns:
+                archived.append(f"Turn {turns[marker]}: {marker} (expired)")
+                del turns[marker]
+            else:
+                kept.append(marker)
+        active = kept
+
+    # Evict the least recently asserted markers above the cap
+    overflow = len(active) - settings.max_active_markers
+    if overflow > 0:
+        evicted = sorted(active, key=lambda m: turns[m])[:overflow]
+        for marker in evicted:
+            archived.append(f"Turn {turns[marker]}: {marker} (evicted)")
+            del turns[marker]
+        active = [m for m in active if m in turns]
+
+    return active, turns, archived
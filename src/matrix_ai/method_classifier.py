@@ -0,0 +1,166 @@
+import math
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .schemas import GameState, AdjudicationMethod, MethodClassifierModel
+
+# Heuristic adjudication-method classifier. A logistic model over a few argument
+# features gives P(Auto Success); confident predictions (above or below the model's
+# thresholds) decide the method without the LLM and ambiguous ones are escalated.
+# Features are stored on every argument (method_features) so a classifier can be
+# fitted from recorded games, and in 'shadow' mode the LLM keeps deciding while the
+# classifier's choice is recorded for agreement reporting.
+
+FEATURES = ("cons", "pros", "triggered_secrets", "big_project", "action_words")
+
+_lock = Lock()
+_stats = {"decided": 0, "escalated": 0, "shadow_agreed": 0, "shadow_disagreed": 0}
+
+# --- FEATURES AND PREDICTION ---
+
+def extract_features(argument: Any, state: GameState) -> Dict[str, float]:
+    """Features of an argument at method-determination time"""
+    return {
+        "cons": float(len(argument.cons)),
+        "pros": float(len(argument.pros)),
+        "triggered_secrets": float(len(state.triggered_secrets_this_turn)),
+        "big_project": 1.0 if argument.is_big_project_stage else 0.0,
+        "action_words": len(argument.action_description.split()) / 100,  # in hundreds of words
+    }
+
+
+def _logistic(weights: Dict[str, float], bias: float, features: Dict[str, float]) -> float:
+    z = bias + sum(weights.get(name, 0.0) * features.get(name, 0.0) for name in FEATURES)
+    return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+
+
+def predict_auto_success(model: MethodClassifierModel, features: Dict[str, float]) -> float:
+    """P(Auto Success) under the logistic model"""
+    return _logistic(model.weights, model.bias, features)
+
+
+def classify(model: MethodClassifierModel, features: Dict[str, float]) -> Optional[AdjudicationMethod]:
+    """The method for a confident case, or None to escalate to the LLM"""
+    p = predict_auto_success(model, features)
+    if p >= model.auto_success_threshold:
+        return AdjudicationMethod.AUTO_SUCCESS
+    if p <= model.estimative_threshold:
+        return AdjudicationMethod.ESTIMATIVE_PROBABILITY
+    return None
+
+
+def record_decision(heuristic_method: Optional[AdjudicationMethod], llm_method: Optional[AdjudicationMethod] = None) -> None:
+    """Count a classifier decision (and, in shadow mode, whether the LLM agreed)"""
+    with _lock:
+        if llm_method is None:
+            _stats["decided" if heuristic_method else "escalated"] += 1
+        elif heuristic_method is not None:
+            _stats["shadow_agreed" if heuristic_method == llm_method else "shadow_disagreed"] += 1
+
+
+def method_classifier_stats() -> Dict[str, int]:
+    """Counts of classifier decisions, escalations and shadow-mode agreements in this process"""
+    with _lock:
+        return dict(_stats)
+
+# --- FITTING FROM RECORDED LOGS ---
+
+def _training_examples(arguments: Sequence[Any]) -> List[Tuple[Dict[str, float], float]]:
+    """(features, 1.0 if the LLM chose Auto Success) for every LLM-decided argument with recorded features"""
+    return [
+        (argument.method_features, 1.0 if argument.adjudication_method == AdjudicationMethod.AUTO_SUCCESS else 0.0)
+        for argument in arguments
+        if argument.method_source == "llm" and argument.method_features
+    ]
+
+
+def calibrate_thresholds(model: MethodClassifierModel, arguments: Sequence[Any], target_agreement: float = 0.95) -> MethodClassifierModel:
+    """
+    Pick the widest thresholds whose confident decisions still agree with the LLM at
+    least target_agreement of the time on the given arguments.
+    """
+    scored = sorted((predict_auto_success(model, features), label) for features, label in _training_examples(arguments))
+    if not scored:
+        return model
+
+    def widest_threshold(ordered: List[Tuple[float, float]], wanted: float, default: float) -> float:
+        # Walk from the most confident end, only cutting between distinct scores so ties stay together
+        threshold, agreed = default, 0.0
+        for count, (p, label) in enumerate(ordered, start=1):
+            agreed += label == wanted
+            next_p = ordered[count][0] if count < len(ordered) else None
+            if next_p != p and agreed / count >= target_agreement:
+                threshold = p
+        return threshold
+
+    # 1.0 and 0.0 mean "never decide on its own" (P is strictly between them)
+    auto_threshold = widest_threshold(scored[::-1], 1.0, 1.0)
+    estimative_threshold = widest_threshold(scored, 0.0, 0.0)
+
+    return model.model_copy(update={
+        "auto_success_threshold": max(auto_threshold, 0.5),
+        "estimative_threshold": min(estimative_threshold, 0.5),
+    })
+
+
+def fit_method_classifier(
+    arguments: Sequence[Any],
+    epochs: int = 500,
+    learning_rate: float = 0.1,
+    l2: float = 0.01,
+    target_agreement: float = 0.95,
+) -> MethodClassifierModel:
+    """
+    Fit the logistic model to the LLM's method choices on recorded arguments.
+
+    arguments can be argument objects from game logs or farm ArgumentRecords. Only
+    arguments decided by the LLM with recorded features are used (run games with
+    method_classifier='shadow' to collect them). Thresholds are then calibrated
+    to target_agreement.
+    """
+    examples = _training_examples(arguments)
+    if not examples:
+        raise ValueError("No LLM-decided arguments with recorded features to fit the method classifier on")
+
+    weights = {name: 0.0 for name in FEATURES}
+    bias = 0.0
+    for _ in range(epochs):
+        bias_gradient = 0.0
+        gradients = {name: 0.0 for name in FEATURES}
+        for features, label in examples:
+            error = _logistic(weights, bias, features) - label
+            bias_gradient += error
+            for name in FEATURES:
+                gradients[name] += error * features.get(name, 0.0)
+        bias -= learning_rate * bias_gradient / len(examples)
+        for name in FEATURES:
+            weights[name] -= learning_rate * (gradients[name] / len(examples) + l2 * weights[name])
+
+    return calibrate_thresholds(MethodClassifierModel(weights=weights, bias=bias), arguments, target_agreement)
+
+
+def agreement_report(arguments: Sequence[Any], model: Optional[MethodClassifierModel] = None) -> Dict[str, float]:
+    """
+    How often the classifier agrees with the LLM on LLM-decided arguments.
+
+    Uses the classifier choice recorded during the game (shadow mode), or re-scores
+    the recorded features with model if one is given. Also reports the share of
+    arguments the classifier would decide on its own (coverage).
+    """
+    decided = agreed = total = 0
+    for argument in arguments:
+        if argument.method_source != "llm" or not argument.method_features:
+            continue
+        total += 1
+        choice = classify(model, argument.method_features) if model else argument.heuristic_method
+        if choice is None:
+            continue
+        decided += 1
+        agreed += choice == argument.adjudication_method
+
+    return {
+        "arguments": total,
+        "confident": decided,
+        "coverage": decided / total if total else float("nan"),
+        "agreement_rate": agreed / decided if decided else float("nan"),
+    }
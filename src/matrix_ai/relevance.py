@@ -0,0 +1,117 @@
+from typing import Iterable, List, Tuple
+
+from .markers import normalize_marker
+from .schemas import GameState, RelationshipStance
+
+# Relevance filtering of prompt context. Prompts that listed every actor's effects or
+# every global marker take only what concerns the actors involved in the call: the
+# acting actors, the actors the call's text names, those sharing a location with
+# them and those they have a non-neutral relationship with. The rest is summarized
+# in a count, so a prompt stays about the same size however many actors a scenario
+# has. Forces are filtered the same way by world.render_relevant_forces.
+
+# Words too common to make a marker relevant to an action on their own
+_STOPWORDS = frozenset("""
+    a an and are as at be been by for from has have in into is it its of on or that the
+    their there these this to was were will with which who against after before over
+""".split())
+
+
+def _keywords(text: str) -> set:
+    return {word for word in normalize_marker(text).split() if len(word) > 2 and word not in _STOPWORDS}
+
+
+def related_actors(state: GameState, acting: Iterable[str], context: str, limit: int) -> List[str]:
+    """
+    The actors a prompt about the acting actors should show, most relevant first and
+    at most limit of them (the acting actors always count against it first): actors
+    the context names, then actors with units at the acting actors' locations, then
+    actors the acting actors have a non-neutral relationship with.
+    """
+    context = context.lower()
+    actor_names = [actor.actor_name for actor in state.game_definition.actors]
+    selected = [name for name in dict.fromkeys(acting) if name in actor_names]
+
+    locations = {unit.location for name in selected for unit in state.world.actor_units(name)}
+    nearby = {other for location in locations for other, _ in state.world.units_at(location)}
+    related = {
+        other
+        for name in selected
+        for other, relationship in state.world.relationships.get(name, {}).items()
+        if relationship.stance != RelationshipStance.NEUTRAL
+    }
+
+    for candidates in (
+        [name for name in actor_names if name.lower() in context],
+        [name for name in actor_names if name in nearby],
+        [name for name in actor_names if name in related],
+    ):
+        selected.extend(name for name in candidates if name not in selected)
+    return selected[:max(limit, 1)]
+
+
+def relevant_markers(markers: List[str], actor_names: Iterable[str], context: str, limit: int) -> Tuple[List[str], int]:
+    """
+    The markers a prompt should show, in their original order, and how many were left
+    out. Markers naming one of the actors or sharing words with the context are kept
+    first, the most recently asserted (latest in the list) filling any room left.
+    """
+    if len(markers) <= limit:
+        return list(markers), 0
+
+    names = [name.lower() for name in actor_names]
+    keywords = _keywords(context)
+
+    def score(marker: str) -> int:
+        text = marker.lower()
+        return 2 * any(name in text for name in names) + len(keywords & _keywords(marker))
+
+    ranked = sorted(range(len(markers)), key=lambda i: (score(markers[i]), i), reverse=True)
+    kept = sorted(ranked[:max(limit, 0)])
+    return [markers[i] for i in kept], len(markers) - len(kept)
+
+
+def render_markers(markers: List[str], actor_names: Iterable[str], context: str, limit: int, separator: str = "\n") -> str:
+    """The relevant markers joined by separator, followed by a count of the omitted ones"""
+    shown, omitted = relevant_markers(markers, actor_names, context, limit)
+    if omitted:
+        shown.append(f"({omitted} other markers not shown)")
+    return separator.join(shown) if shown else "None"
+
+
+def render_actor_status(state: GameState, actor_names: List[str], context: str, max_effects: int) -> str:
+    """
+    Objectives of every actor and current effects of the given actors (umpire prompts).
+    Objectives are always shown, so a quiet actor that has met them is not missed; the
+    other actors' effects are summarized in a count.
+    """
+    objective_blocks = state.game_definition.fragments().actor_objective_blocks
+    effects = {actor_state.actor_name: actor_state.effects for actor_state in state.actor_states}
+
+    blocks = []
+    for name, objectives in objective_blocks.items():
+        if name in actor_names:
+            shown, omitted = relevant_markers(effects.get(name, []), [name], context, max_effects)
+            effects_str = "\n".join(f"  - {effect}" for effect in shown)
+            if omitted:
+                effects_str += f"\n  ({omitted} other effects not shown)"
+        else:
+            count = len(effects.get(name, []))
+            effects_str = f"  ({count} effects not shown)" if count else ""
+        blocks.append(f"""
+{name}:
+Objectives:
+{objectives}
+Current Status/Effects:
+{effects_str}
+""")
+    return "\n".join(blocks)
+
+
+def turn_activity(state: GameState) -> List[str]:
+    """Actors ordered by how many of their active effects were asserted this turn, most first; inactive actors are left out"""
+    counts = {
+        actor_state.actor_name: sum(1 for turn in actor_state.effect_turns.values() if turn >= state.current_turn)
+        for actor_state in state.actor_states
+    }
+    return sorted((name for name, count in counts.items() if count), key=lambda name: -counts[name])
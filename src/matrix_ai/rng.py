@@ -0,0 +1,41 @@
+import random
+
+from .schemas import GameState
+
+# Each game draws from its own random stream, derived from GameSettings.seed, so
+# concurrent games in one process never share or interleave a global RNG and any
+# run can be replayed from its seed.
+
+# --- HELPER FUNCTIONS ---
+
+def _draw_key(state: GameState, purpose: str) -> str:
+    """Key identifying the next draw: the decision point (CRN) or the draw count"""
+    settings = state.settings
+    if settings.common_random_numbers:
+        actor_state = state.current_actor_state
+        actor_name = actor_state.actor_name if actor_state else ""
+        return f"{settings.seed}:{purpose}:{state.current_turn}:{actor_name}"
+    return f"{settings.seed}:{state.rng_draws}"
+
+# --- PUBLIC API ---
+
+def draw_uniform(state: GameState, purpose: str) -> float:
+    """
+    Draw a uniform number in [0, 1) from the game's random stream.
+
+    With common random numbers, the draw only depends on the seed and the decision
+    point (purpose, turn and current actor), so runs that share a seed but differ in
+    other settings get the same draw at the same decision. With antithetic draws,
+    1 - u is returned instead.
+    """
+    u = random.Random(_draw_key(state, purpose)).random()
+    state.rng_draws += 1
+    state.mark_changed("rng_draws")
+    return 1.0 - u if state.settings.antithetic else u
+
+
+def game_rng(state: GameState, purpose: str) -> random.Random:
+    """A random.Random seeded from the game's stream, for shuffles and other multi-value draws"""
+    state.rng_draws += 1
+    state.mark_changed("rng_draws")
+    return random.Random(_draw_key(state, purpose))
@@ -0,0 +1,79 @@
+import json
+from typing import Callable, Dict, List, Optional
+
+from .schemas import GameState, RouteRule, SecretArgument, AdjudicationMethod
+
+# Declarative model routing. GameSettings.routing is an ordered list of rules; for each
+# LLM call the first rule whose node matches ('*' matches every node) and whose
+# conditions all hold picks the model, temperature and endpoint. Tables are plain JSON
+# (a list of RouteRule objects), so they can be retuned without code changes.
+
+# --- CONDITIONS ---
+
+def _pending_secrets(state: GameState) -> bool:
+    return any(
+        not secret.is_triggered
+        for actor_state in state.actor_states
+        for secret in actor_state.pending_secret_arguments
+    )
+
+
+def _low_probability_spread(state: GameState) -> bool:
+    actor_state = state.current_actor_state
+    estimates = actor_state.argument.probability_estimates if actor_state and actor_state.argument else []
+    return len(estimates) >= 2 and max(estimates) - min(estimates) <= state.settings.low_spread_threshold
+
+
+def _secret_argument(state: GameState) -> bool:
+    actor_state = state.current_actor_state
+    return bool(actor_state) and isinstance(actor_state.argument, SecretArgument)
+
+
+def _auto_success(state: GameState) -> bool:
+    actor_state = state.current_actor_state
+    argument = actor_state.argument if actor_state else None
+    return argument is not None and argument.adjudication_method == AdjudicationMethod.AUTO_SUCCESS
+
+
+CONDITIONS: Dict[str, Callable[[GameState], bool]] = {
+    "pending_secrets": _pending_secrets,
+    "low_probability_spread": _low_probability_spread,
+    "secret_argument": _secret_argument,
+    "auto_success": _auto_success,
+    "first_turn": lambda state: state.current_turn == 1,
+    "final_turn": lambda state: state.current_turn >= state.game_definition.game_length,
+}
+
+
+def _condition_name(condition: str) -> str:
+    return condition[len("not "):].strip() if condition.startswith("not ") else condition.strip()
+
+
+def condition_holds(condition: str, state: GameState) -> bool:
+    """Evaluate a condition name, optionally negated with a 'not ' prefix"""
+    name = _condition_name(condition)
+    if name not in CONDITIONS:
+        raise ValueError(f"Unknown routing condition: {name}")
+    result = CONDITIONS[name](state)
+    return not result if condition.startswith("not ") else result
+
+# --- ROUTING ---
+
+def match_route(state: GameState, node: str) -> Optional[RouteRule]:
+    """The first routing rule that applies to this node in the current state, if any"""
+    for rule in state.settings.routing:
+        if rule.node in (node, "*") and all(condition_holds(condition, state) for condition in rule.when):
+            return rule
+    return None
+
+
+def load_routing_table(path: str) -> List[RouteRule]:
+    """Load a routing table from a JSON file (a list of rules), checking every condition name"""
+    with open(path, 'r') as f:
+        rules = [RouteRule.model_validate(rule) for rule in json.load(f)]
+
+    for rule in rules:
+        for condition in rule.when:
+            if _condition_name(condition) not in CONDITIONS:
+                raise ValueError(f"Unknown routing condition in {path}: {condition}")
+    return rules
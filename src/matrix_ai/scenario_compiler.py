@@ -0,0 +1,105 @@
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from pydantic import ValidationError
+
+from .schemas import MatrixGame, ScenarioFragments
+
+# Scenario precompilation: a scenario JSON file is validated once and stored, together
+# with its static prompt fragments, in a compact artifact next to it
+# (<scenario>.compiled). The artifact holds three lines: a header keyed by a hash of the
+# source file (so editing the scenario triggers a recompile), the fragments, and the
+# validated game. Both are read back with pydantic-core's JSON parser, which measured
+# faster than parsing the JSON in Python and calling model_construct, so loading skips
+# the Python-side JSON parse and all fragment string building.
+
+COMPILED_SUFFIX = ".compiled"
+COMPILED_FORMAT_VERSION = 2
+
+# MatrixGame fields the fragments are built from
+_FRAGMENT_FIELDS = {"name", "background_briefing", "actors"}
+
+# --- HELPER FUNCTIONS ---
+
+def compiled_path(scenario_path: str) -> Path:
+    """Path of the compiled artifact for a scenario file"""
+    return Path(scenario_path).with_suffix(COMPILED_SUFFIX)
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _write_artifact(scenario_path: str, game: MatrixGame, digest: str) -> Path:
+    header = json.dumps({"format_version": COMPILED_FORMAT_VERSION, "source_sha256": digest})
+    path = compiled_path(scenario_path)
+    # Written to a temporary file and renamed into place, so workers loading the same
+    # scenario concurrently never read a half-written artifact
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join([header, game.fragments().model_dump_json(), game.model_dump_json()]))
+        os.chmod(tmp_path, 0o644)  # mkstemp creates the file owner-only
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+def _read_artifact(scenario_path: str, digest: str) -> Optional[MatrixGame]:
+    """The compiled game (with its fragments), if the artifact exists and was compiled from this exact source"""
+    path = compiled_path(scenario_path)
+    try:
+        header, fragments, game_json = path.read_bytes().split(b"\n", 2)
+        header = json.loads(header)
+        if header.get("format_version") != COMPILED_FORMAT_VERSION or header.get("source_sha256") != digest:
+            return None
+        game = MatrixGame.model_validate_json(game_json)
+        game._fragments = ScenarioFragments.model_validate_json(fragments)
+    except (OSError, ValueError, ValidationError, AttributeError):
+        # Missing, stale format or unreadable (e.g. truncated): treat as a cache miss
+        return None
+    return game
+
+# --- PUBLIC API ---
+
+def compile_scenario(scenario_path: str) -> Path:
+    """Validate a scenario file and write its compiled artifact; returns the artifact path"""
+    raw = Path(scenario_path).read_bytes()
+    game = MatrixGame.model_validate_json(raw)
+    return _write_artifact(scenario_path, game, _digest(raw))
+
+
+def load_scenario_file(scenario_path: str, overrides: Optional[Dict[str, Any]] = None, compile_missing: bool = True) -> MatrixGame:
+    """
+    Load a scenario, from its compiled artifact when that is up to date.
+
+    Otherwise the JSON is validated as usual and, if compile_missing, the artifact is
+    (re)written for next time. Overrides are validated on top of the loaded game; the
+    precomputed fragments are kept unless an override changes what they are built from.
+    """
+    raw = Path(scenario_path).read_bytes()
+    digest = _digest(raw)
+    game = _read_artifact(scenario_path, digest)
+
+    if game is None:
+        game = MatrixGame.model_validate_json(raw)
+        if compile_missing:
+            try:
+                _write_artifact(scenario_path, game, digest)
+            except OSError as e:
+                print(f"Warning: could not write compiled scenario: {e}")
+
+    if overrides:
+        fragments = None if _FRAGMENT_FIELDS & overrides.keys() else game.fragments()
+        game = MatrixGame.model_validate({**game.model_dump(), **overrides})
+        game._fragments = fragments
+
+    return game
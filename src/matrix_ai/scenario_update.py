@@ -1,4 +1,3 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, START, END
 import uuid
@@ -6,8 +5,15 @@ from datetime import datetime
 
 from .schemas import (
     GameState, LogEntry, LogEntryType, SecretArgument, ArgumentStatus,
-    GamePhase, CombinedNarrativeAndWorldStateResponse
+    GamePhase, CombinedNarrativeAndWorldStateResponse, StateUpdate, SubgraphOutput
 )
+from .llm import get_node_llm
+from .call_policy import call_llm, mark_degraded, LLMCallError
+from .markers import compact_markers
+from .relevance import related_actors, render_markers
+from .summary import apply_summary_patches
+from .world import render_relevant_forces, render_relationships, resolve_world_updates
+from .log_store import append_log_entry
 
 # --- PROMPTS ---
 
@@ -32,19 +38,17 @@ The narrative should be:
 
 For the WORLD STATE UPDATES, determine:
 1. New effects to add to the actor's personal effects list
-2. Updates to force units (location changes, status updates, etc.) - NOTE: You can update ANY actor's forces, not just the current actor's
+2. Updates to force units (location changes, status updates, etc.) - NOTE: You can update ANY actor's forces, not just the current actor's. Use the exact actor and unit names listed; to deploy a new unit, give its actor, a new unit name and its location
 3. New global narrative markers that affect the overall game state
-4. An updated game state summary incorporating these changes
+4. Patches to the game state summary for the sections this argument changes
+5. Changes in how pairs of actors stand towards each other (Allied, Friendly, Neutral, Tense or Hostile), only where this argument changed them
 
-For the game state summary, provide a comprehensive overview that includes:
-- The current overall situation and key developments
-- Major ongoing tensions, conflicts, or diplomatic situations
-- Recent significant events and their ongoing impact
-- The general strategic position of major actors
-- Any emerging trends or patterns in the game
-- The broader context, not just the most recent action
+The game state summary is kept as sections, one per topic or actor (the "Key: text" lines of the current summary). Do NOT rewrite the summary. Return only patches:
+- add: a new section for a topic or actor the summary does not cover yet
+- replace: the full new text of an existing section whose situation changed (use its exact key)
+- drop: a section that is resolved or no longer relevant
 
-The summary should give players a clear understanding of the current state of play and help them make informed decisions about their next moves.
+Each section should describe the current state of play for its topic or actor in one to three sentences: ongoing tensions, strategic positions and the lasting impact of recent events. Leave sections this argument does not affect untouched; most arguments change one or two sections.
 
 Consider:
 - The scope and scale of the action
@@ -58,7 +62,8 @@ Game Context:
 
 Current Actor: {actor_name}
 Turn: {current_turn}
-Current Game State Summary: {current_summary}
+Current Game State Summary (sections):
+{current_summary}
 Global Narrative Markers: {global_markers}
 Triggered Secret Arguments: {triggered_secrets}"""),
     ("human", """Argument Details:
@@ -70,16 +75,17 @@ Success: {is_successful}
 Final Probability: {final_probability}
 
 Current Actor Effects: {current_effects}
+Relationships of {actor_name}: {relationships}
 
-All Forces in Game:
-{all_forces}
+Relevant Forces (the actor's own, those at the same locations, and those the argument names):
+{forces}
 
 Create both the narrative description and world state updates for this argument's resolution.""")
 ])
 
 # --- NODE FUNCTIONS ---
 
-def create_narrative_and_update_world_state(state: GameState) -> GameState:
+def create_narrative_and_update_world_state(state: GameState) -> StateUpdate:
     """Combined node to create the adjudication narrative and update world state in a single LLM call"""
     
     current_actor_state = state.current_actor_state
@@ -87,19 +93,18 @@ def create_narrative_and_update_world_state(state: GameState) -> GameState:
     
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for narrative and world state update")
-        return state
+        return {}
     
     if not current_actor:
         print("Warning: No current actor definition found for narrative and world state update")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
+    world_diff = None
     
-    # Prepare context
+    # Prepare context (the summary sections are passed separately)
     game_context = f"""
-Game: {state.game_definition.name}
-Background: {state.game_definition.background_briefing}
-Current Situation: {state.game_state_summary}
+{state.game_definition.fragments().game_header}
 """
     
     # Get triggered secrets info
@@ -107,7 +112,7 @@ Current Situation: {state.game_state_summary}
     triggered_secrets_str = "\n".join(triggered_secrets) if triggered_secrets else "None"
     
     # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.6)  # Balanced temperature for both narrative and analysis
+    llm = get_node_llm(state, "create_narrative_and_update_world_state", temperature=0.6)  # Balanced temperature for both narrative and analysis
     
     # Create combined chain
     combined_chain = COMBINED_NARRATIVE_AND_WORLD_STATE_PROMPT | llm.with_structured_output(CombinedNarrativeAndWorldStateResponse)
@@ -121,29 +126,26 @@ Current Situation: {state.game_state_summary}
         else:
             action_description_for_summary = action_description
         
-        # Prepare all forces context for LLM
-        all_forces_info = []
-        for actor_state in state.actor_states:
-            actor_forces = [f"{f.unit_name} at {f.location}" + (f" ({f.details})" if f.details else "") 
-                           for f in actor_state.current_forces]
-            if actor_forces:
-                all_forces_info.append(f"{actor_state.actor_name}: {', '.join(actor_forces)}")
-        all_forces_str = "\n".join(all_forces_info) if all_forces_info else "No forces deployed"
+        # Only the part of the world this argument touches goes into the prompt
+        argument_text = " ".join([action_description, *current_argument.pros, *current_argument.cons, *triggered_secrets])
+        actor_names = related_actors(state, [current_actor.actor_name], argument_text, state.settings.max_context_actors)
+        forces_str = render_relevant_forces(state.world, current_actor.actor_name, argument_text, actor_names)
         
-        combined_response = combined_chain.invoke({
+        combined_response = call_llm(state, "create_narrative_and_update_world_state", combined_chain, {
             "game_context": game_context,
             "actor_name": current_actor.actor_name,
             "current_turn": state.current_turn,
             "current_summary": state.game_state_summary,
-            "global_markers": state.global_narrative_markers,
+            "global_markers": render_markers(state.global_narrative_markers, actor_names, argument_text, state.settings.max_context_markers, "; "),
             "action_description": action_description,  # Use full description for narrative
             "pros": current_argument.pros,
             "cons": current_argument.cons,
             "adjudication_method": current_argument.adjudication_method.value if current_argument.adjudication_method else "Unknown",
             "is_successful": current_argument.is_successful,
             "final_probability": current_argument.final_probability,
-            "current_effects": current_actor_state.effects,
-            "all_forces": all_forces_str,
+            "current_effects": render_markers(current_actor_state.effects, [], argument_text, state.settings.max_context_markers, "; "),
+            "relationships": render_relationships(state.world, current_actor.actor_name, actor_names),
+            "forces": forces_str,
             "triggered_secrets": triggered_secrets_str
         })
         
@@ -153,34 +155,19 @@ Current Situation: {state.game_state_summary}
         # Apply world state updates to actor state
         current_actor_state.effects.extend(combined_response.actor_effects)
         
-        # Update force units - search through ALL actors since one actor's actions can affect others
-        for force_update in combined_response.force_updates:
-            if force_update.unit_name and force_update.actor_name:
-                # Find the actor that owns this force
-                target_actor_state = None
-                for actor_state in state.actor_states:
-                    if actor_state.actor_name == force_update.actor_name:
-                        target_actor_state = actor_state
-                        break
-                
-                if target_actor_state:
-                    # Find and update the specific force unit
-                    for force in target_actor_state.current_forces:
-                        if force.unit_name == force_update.unit_name:
-                            # Update force fields
-                            if force_update.location:
-                                force.location = force_update.location
-                            if force_update.details:
-                                force.details = force_update.details
-                            break
+        # Update forces (of any actor, since one actor's actions can affect others) and relationships
+        world_diff = resolve_world_updates(state.world, combined_response.force_updates, combined_response.relationship_updates, state.current_turn)
+        state.world = state.world.applied(world_diff)
+        current_argument.world_changes = world_diff
         
         # Update global state
         state.global_narrative_markers.extend(combined_response.global_narrative_markers)
-        state.game_state_summary = combined_response.game_state_summary_update
+        apply_summary_patches(state, combined_response.summary_patches)
         
-    except Exception as e:
+    except LLMCallError as e:
         print(f"Error in combined narrative and world state update: {e}")
         # Apply minimal default updates
+        mark_degraded(state, "create_narrative_and_update_world_state")
         if current_argument.is_successful:
             if isinstance(current_argument, SecretArgument):
                 current_argument.adjudication_narrative = f"{current_actor.actor_name} successfully implemented a covert operation"
@@ -192,9 +179,33 @@ Current Situation: {state.game_state_summary}
             current_argument.adjudication_narrative = f"{current_actor.actor_name} attempted to {current_argument.action_description} but failed due to various challenges and constraints."
             current_actor_state.effects.append(f"Failed attempt: {current_argument.action_description}")
     
-    return state
+    # The world channel takes the diff rather than the whole store
+    world_update = {"world": world_diff} if world_diff is not None else {}
+    return state.delta("actor_states", "global_narrative_markers", "game_state_summary", "summary_sections", **world_update)
 
-def create_log_entry(state: GameState) -> GameState:
+def normalize_narrative_markers(state: GameState) -> StateUpdate:
+    """Node to merge duplicate effects and global markers, expire stale ones and cap the active sets"""
+    
+    for actor_state in state.actor_states:
+        actor_state.effects, actor_state.effect_turns, archived = compact_markers(
+            actor_state.effects,
+            actor_state.effect_turns,
+            state.current_turn,
+            state.settings
+        )
+        actor_state.archived_effects.extend(archived)
+    
+    state.global_narrative_markers, state.global_marker_turns, archived = compact_markers(
+        state.global_narrative_markers,
+        state.global_marker_turns,
+        state.current_turn,
+        state.settings
+    )
+    state.archived_global_narrative_markers.extend(archived)
+    
+    return state.delta("actor_states", "global_narrative_markers", "global_marker_turns", "archived_global_narrative_markers")
+
+def create_log_entry(state: GameState) -> StateUpdate:
     """Node to create log entries for the argument"""
     
     current_actor_state = state.current_actor_state
@@ -202,11 +213,11 @@ def create_log_entry(state: GameState) -> GameState:
     
     if not current_actor_state or not current_actor_state.argument:
         print("Warning: No current actor state or argument found for log entry creation")
-        return state
+        return {}
     
     if not current_actor:
         print("Warning: No current actor definition found for log entry creation")
-        return state
+        return {}
     
     current_argument = current_actor_state.argument
     
@@ -222,11 +233,11 @@ def create_log_entry(state: GameState) -> GameState:
         summary=f"{current_actor.actor_name}: {current_argument.action_description} - {'Success' if current_argument.is_successful else 'Failure'}"
     )
     
-    state.game_log.append(log_entry)
+    append_log_entry(state, log_entry)
     
-    return state
+    return state.delta()
 
-def update_game_phase(state: GameState) -> GameState:
+def update_game_phase(state: GameState) -> StateUpdate:
     """Node to update the game phase after scenario update"""
     
     current_actor_state = state.current_actor_state
@@ -260,7 +271,7 @@ def update_game_phase(state: GameState) -> GameState:
     # Set phase for what's coming next (game over check)
     state.current_phase = GamePhase.GAME_OVER_CHECK
     
-    return state
+    return state.delta("actor_states", "triggered_secrets_this_turn", "current_phase")
 
 # --- GRAPH CONSTRUCTION ---
 
@@ -268,16 +279,18 @@ def create_scenario_update_graph() -> StateGraph:
     """Create the scenario update workflow graph"""
     
     # Create the graph
-    workflow = StateGraph(GameState)
+    workflow = StateGraph(GameState, output_schema=SubgraphOutput)
     
     # Add nodes
     workflow.add_node("create_narrative_and_update_world_state", create_narrative_and_update_world_state)
+    workflow.add_node("normalize_narrative_markers", normalize_narrative_markers)
     workflow.add_node("create_log_entry", create_log_entry)
     workflow.add_node("update_game_phase", update_game_phase)
     
-    # Add edges - now we have one less node in the sequence
+    # Add edges
     workflow.add_edge(START, "create_narrative_and_update_world_state")
-    workflow.add_edge("create_narrative_and_update_world_state", "create_log_entry")
+    workflow.add_edge("create_narrative_and_update_world_state", "normalize_narrative_markers")
+    workflow.add_edge("normalize_narrative_markers", "create_log_entry")
     workflow.add_edge("create_log_entry", "update_game_phase")
     workflow.add_edge("update_game_phase", END)
     
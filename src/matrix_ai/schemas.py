@@ -1,6 +1,8 @@
-from typing import List, Optional, Literal, Union, Dict, Any, Tuple
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional, Literal, Union, Dict, Any, Set, Tuple
+from pydantic import BaseModel, Field, PrivateAttr, create_model, model_validator
 from enum import Enum
+import random
+import uuid
 
 # --- ENUMS for Game Mechanics ---
 
@@ -36,6 +38,13 @@ class AdjudicationMethod(str, Enum):
     ESTIMATIVE_PROBABILITY = "Estimative Probability"
     AUTO_SUCCESS = "Auto Success"
 
+class RelationshipStance(str, Enum):
+    ALLIED = "Allied"
+    FRIENDLY = "Friendly"
+    NEUTRAL = "Neutral"
+    TENSE = "Tense"
+    HOSTILE = "Hostile"
+
 # --- SETUP / DEFINITION MODELS ---
 
 class ForceUnit(BaseModel):
@@ -63,8 +72,107 @@ class MatrixGame(BaseModel):
     game_length: int = Field(description="The maximum number of turns the game can last")
     designer_notes: Optional[str] = Field(default=None, description="Optional insights about the game's design purpose, expected outcomes, or historical parallels.")
 
+    _fragments: Optional["ScenarioFragments"] = PrivateAttr(default=None)
+
+    def fragments(self) -> "ScenarioFragments":
+        """Static prompt fragments for this scenario, built once and cached on the instance"""
+        if self._fragments is None:
+            self._fragments = ScenarioFragments.from_matrix_game(self)
+        return self._fragments
+
+
+class ScenarioFragments(BaseModel):
+    """Prompt fragments that only depend on the scenario, precomputed once per game."""
+    game_header: str = Field(description="'Game: <name>' and 'Background: <briefing>' lines that open every umpire prompt context.")
+    actor_objectives: Dict[str, str] = Field(default_factory=dict, description="Per actor, objectives as '- objective' lines (player prompts).")
+    actor_objective_blocks: Dict[str, str] = Field(default_factory=dict, description="Per actor, objectives as indented '  - objective' lines (umpire prompts).")
+    all_actor_objectives: str = Field(default="", description="Every actor's name followed by its indented objectives, for the end game assessment.")
+
+    @classmethod
+    def from_matrix_game(cls, game: MatrixGame) -> "ScenarioFragments":
+        actor_objective_blocks = {
+            actor.actor_name: "\n".join([f"  - {obj}" for obj in actor.objectives])
+            for actor in game.actors
+        }
+        return cls(
+            game_header=f"Game: {game.name}\nBackground: {game.background_briefing}",
+            actor_objectives={
+                actor.actor_name: "\n".join([f"- {obj}" for obj in actor.objectives])
+                for actor in game.actors
+            },
+            actor_objective_blocks=actor_objective_blocks,
+            all_actor_objectives="\n\n".join([f"{name}:\n{block}" for name, block in actor_objective_blocks.items()])
+        )
+
+# --- RUNTIME SETTINGS ---
+
+class NodeModelSettings(BaseModel):
+    """Model overrides for the LLM calls made by one node."""
+    model: Optional[str] = Field(default=None, description="Chat model to use instead of the default (e.g., 'gpt-4.1').")
+    temperature: Optional[float] = Field(default=None, description="Sampling temperature to use instead of the node's default.")
+
+class RouteRule(BaseModel):
+    """One entry of the model routing table. The first rule whose node and conditions match decides the model for a call."""
+    node: str = Field(description="Node function name the rule applies to (e.g., 'check_secret_triggers'), or '*' for every node.")
+    when: List[str] = Field(default_factory=list, description="Conditions that must all hold (see matrix_ai.routing.CONDITIONS), e.g. ['not pending_secrets']. Empty means always.")
+    model: Optional[str] = Field(default=None, description="Chat model to use (e.g., 'gpt-4.1-nano'), or 'fake' for the offline stand-in.")
+    temperature: Optional[float] = Field(default=None, description="Sampling temperature to use instead of the node's default.")
+    base_url: Optional[str] = Field(default=None, description="OpenAI-compatible endpoint to send the call to (e.g., a local model server).")
+
+class MethodClassifierModel(BaseModel):
+    """Logistic model of P(Auto Success) used to choose the adjudication method of confident cases without the LLM."""
+    weights: Dict[str, float] = Field(default_factory=lambda: {"cons": -1.5, "pros": 0.2, "triggered_secrets": -1.0, "big_project": -1.5, "action_words": -1.0}, description="Weight per feature (see matrix_ai.method_classifier.FEATURES).")
+    bias: float = Field(default=2.0, description="Intercept of the logistic model.")
+    auto_success_threshold: float = Field(default=0.9, description="P(Auto Success) at or above which Auto Success is chosen without the LLM.")
+    estimative_threshold: float = Field(default=0.1, description="P(Auto Success) at or below which Estimative Probability is chosen without the LLM.")
+
+class CallPolicy(BaseModel):
+    """How LLM calls are retried, timed out and hedged before a node falls back to a default."""
+    timeout_seconds: Optional[float] = Field(default=120.0, description="Per-attempt timeout in seconds, counted from when the attempt is sent. None waits indefinitely.")
+    max_attempts: int = Field(default=3, description="Attempts per call (the first try plus retries) before giving up.")
+    backoff_seconds: float = Field(default=1.0, description="Base delay before a retry; the delay doubles per retry and is drawn uniformly between 0 and that bound (full jitter).")
+    max_backoff_seconds: float = Field(default=30.0, description="Upper bound of the backoff delay.")
+    hedge_after_seconds: Optional[float] = Field(default=None, description="Send a duplicate request if an attempt has not finished after this many seconds; the first response wins. None disables fixed-delay hedging.")
+    adaptive_hedging: bool = Field(default=False, description="Hedge the calls of hedge_nodes once they run longer than the node's observed p90 latency (falls back to hedge_after_seconds until enough latencies are observed).")
+    hedge_nodes: List[str] = Field(default_factory=lambda: ["player_deliberation", "gather_critic_feedback", "panel_adjudication", "create_narrative_and_update_world_state"], description="Critical-path nodes hedged adaptively.")
+    hedge_quantile: float = Field(default=0.9, description="Latency quantile after which an adaptive hedge is sent.")
+    hedge_min_samples: int = Field(default=20, description="Observed calls of a node needed before its latency quantile is trusted.")
+    hedge_budget: float = Field(default=0.1, description="Maximum fraction of recent calls that may send a hedge, capping the extra spend. Hedges beyond it are skipped.")
+    on_failure: Literal["fallback", "raise"] = Field(default="fallback", description="'fallback' lets the node substitute its default and marks the next log entry as degraded; 'raise' fails the node instead (e.g., so a job queue retries it).")
+
+class GameSettings(BaseModel):
+    """Engine settings for a single game run. Not part of the scenario definition."""
+    marker_similarity_threshold: float = Field(default=0.85, description="Similarity ratio (0.0 to 1.0) above which two effects or narrative markers are treated as duplicates and merged. 1.0 only merges exact (normalized) duplicates.")
+    marker_expiry_turns: Optional[int] = Field(default=4, description="Number of turns after which an effect or narrative marker that has not been re-asserted is archived. None disables expiry.")
+    max_active_markers: int = Field(default=12, description="Maximum number of active effects per actor and active global narrative markers. The least recently asserted markers are archived first.")
+    max_summary_sections: int = Field(default=12, description="Maximum number of sections in the game state summary. The least recently updated sections are dropped first.")
+    max_context_actors: int = Field(default=6, description="Maximum number of actors whose effects, forces and relationships an umpire prompt shows: the acting actors and those the action names or is related to. The others are summarized in a count.")
+    max_context_markers: int = Field(default=12, description="Maximum number of global narrative markers (and effects per actor) an umpire prompt shows, the ones related to the action first. The default equals max_active_markers, so no active marker is left out unless this is lowered.")
+    node_models: Dict[str, NodeModelSettings] = Field(default_factory=dict, description="Per-node model overrides keyed by node function name (e.g., 'player_deliberation'). The key '*' applies to every node without its own entry.")
+    routing: List[RouteRule] = Field(default_factory=list, description="Model routing table, evaluated in order for every LLM call. node_models overrides still apply on top of the matched rule.")
+    low_spread_threshold: float = Field(default=0.15, description="Range of the probability panel at or below which the 'low_probability_spread' routing condition holds.")
+    method_classifier: Literal["off", "shadow", "on"] = Field(default="off", description="Heuristic adjudication-method classifier: 'off', 'shadow' (the LLM decides, the classifier's choice is recorded for agreement reporting) or 'on' (confident cases skip the LLM).")
+    method_classifier_model: MethodClassifierModel = Field(default_factory=MethodClassifierModel, description="Weights and thresholds of the method classifier (see matrix_ai.method_classifier.fit_method_classifier).")
+    probability_panel_size: int = Field(default=3, description="Number of independent probability estimates gathered for each estimative adjudication.")
+    adjudication_mode: Literal["sequential", "panel"] = Field(default="sequential", description="'sequential' runs the critic, method and probability calls one after another; 'panel' asks each of probability_panel_size panelists for cons, a method vote and a probability in one call and aggregates the answers locally.")
+    seed: Optional[int] = Field(default=None, description="Seed for this game's random number stream. A random seed is chosen (and recorded here) if None.")
+    common_random_numbers: bool = Field(default=True, description="Derive each random draw from the seed and its decision point (turn, actor, purpose) rather than from the draw count, so paired runs with different settings see the same draw at the same decision.")
+    antithetic: bool = Field(default=False, description="Use 1 - u instead of u for every draw. Pair a run with its antithetic twin (same seed) to reduce variance.")
+    randomize_turn_order: bool = Field(default=False, description="Shuffle the turn order at the start of the game using the game's random stream.")
+    speculative_deliberation: bool = Field(default=False, description="Start the next actor's deliberation in the background while the current argument is adjudicated, and commit it if nothing it depends on changed.")
+    branching: bool = Field(default=False, description="Leave estimative-probability outcomes undecided instead of drawing them, so matrix_ai.branching can explore both outcomes weighted by their probability.")
+    log_store_path: Optional[str] = Field(default=None, description="SQLite file that older game log entries are spilled to, keeping memory flat in long games. None keeps the full log in memory.")
+    log_window: int = Field(default=50, description="Number of most recent game log entries kept in memory when a log store is used.")
+    call_policy: CallPolicy = Field(default_factory=CallPolicy, description="Timeout, retry and hedging policy for every LLM call.")
+
 # --- DYNAMIC / IN-GAME STATE MODELS ---
 
+class SummarySection(BaseModel):
+    """One section of the structured game state summary."""
+    key: str = Field(description="Topic or actor name the section covers (e.g., 'Trade negotiations', 'Russia').")
+    text: str = Field(description="Current state of play for this topic or actor.")
+    updated_turn: int = Field(default=0, description="Turn in which the section was last added or replaced.")
+
 class ForceUnitState(BaseModel):
     """
     Represents a force unit during active gameplay, inheriting its base definition
@@ -74,6 +182,108 @@ class ForceUnitState(BaseModel):
     location: str = Field(description="The unit's current location on the game map, which may change from its starting location.")
     details: Optional[str] = Field(None, description="Any specific notes about this unit.")
 
+class Relationship(BaseModel):
+    """Relationship between two actors, entered in the matrix under both of them."""
+    stance: RelationshipStance = Field(default=RelationshipStance.NEUTRAL, description="How the two actors currently stand towards each other.")
+    note: Optional[str] = Field(None, description="What the relationship rests on or what last changed it.")
+    updated_turn: int = Field(default=0, description="Turn in which the relationship last changed.")
+
+class ForceUpdate(BaseModel):
+    actor_name: str = Field(description="Name of the actor who owns this force unit")
+    unit_name: str = Field(description="Name of the unit to update")
+    location: Optional[str] = Field(None, description="New location for the unit")
+    details: Optional[str] = Field(None, description="Updated details about the unit")
+
+class RelationshipUpdate(BaseModel):
+    actor_name: str = Field(description="Name of one actor of the pair.")
+    other_actor_name: str = Field(description="Name of the other actor of the pair.")
+    stance: RelationshipStance = Field(description="New stance between the two actors.")
+    note: Optional[str] = Field(None, description="Short reason for the change (e.g., 'Signed a mutual defence pact').")
+
+class WorldDiff(BaseModel):
+    """Changes one action made to the world state, with names resolved to the store's actors and units."""
+    turn: int = Field(default=0, description="Turn in which the changes were made.")
+    force_updates: List[ForceUpdate] = Field(default_factory=list, description="Unit changes; a unit the actor does not have yet is deployed at the given location.")
+    relationship_updates: List[RelationshipUpdate] = Field(default_factory=list, description="Relationship changes between pairs of actors.")
+    rejected: List[str] = Field(default_factory=list, description="Requested updates that could not be applied (unknown actor, or unknown unit without a location), with the reason.")
+
+
+def _location_key(location: str) -> str:
+    return " ".join(location.lower().split())
+
+
+class WorldState(BaseModel):
+    """
+    Typed world-state store: every force unit keyed by actor and unit name, and the
+    relationship matrix between actors. Changes are applied as WorldDiffs, which copy
+    only the rows they touch.
+    """
+    forces: Dict[str, Dict[str, ForceUnitState]] = Field(default_factory=dict, description="Force units per actor, keyed by unit name.")
+    relationships: Dict[str, Dict[str, Relationship]] = Field(default_factory=dict, description="Relationship matrix: per actor, its relationship with each other actor. Pairs without an entry are neutral.")
+
+    # Units per normalized location, built on first use
+    _locations: Optional[Dict[str, List[Tuple[str, str]]]] = PrivateAttr(default=None)
+
+    @classmethod
+    def from_matrix_game(cls, game: MatrixGame) -> "WorldState":
+        """The starting forces of every actor, with no relationships recorded yet"""
+        forces: Dict[str, Dict[str, ForceUnitState]] = {}
+        for actor in game.actors:
+            units = forces.setdefault(actor.actor_name, {})
+            for unit_def in actor.starting_forces:
+                # Units are keyed by name, so a repeated name gets a numbered suffix
+                unit_name, copy = unit_def.unit_name, 2
+                while unit_name in units:
+                    unit_name, copy = f"{unit_def.unit_name} ({copy})", copy + 1
+                units[unit_name] = ForceUnitState(unit_name=unit_name, location=unit_def.starting_location, details=unit_def.details)
+        return cls(forces=forces)
+
+    def actor_units(self, actor_name: str) -> List[ForceUnitState]:
+        """An actor's units in deployment order"""
+        return list(self.forces.get(actor_name, {}).values())
+
+    def units_at(self, location: str) -> List[Tuple[str, ForceUnitState]]:
+        """(actor name, unit) pairs at a location, ignoring case and spacing"""
+        if self._locations is None:
+            index: Dict[str, List[Tuple[str, str]]] = {}
+            for actor_name, units in self.forces.items():
+                for unit in units.values():
+                    index.setdefault(_location_key(unit.location), []).append((actor_name, unit.unit_name))
+            self._locations = index
+        return [(actor_name, self.forces[actor_name][unit_name]) for actor_name, unit_name in self._locations.get(_location_key(location), [])]
+
+    def relationship(self, actor_name: str, other_actor_name: str) -> Relationship:
+        """The relationship between two actors (neutral if none was recorded)"""
+        return self.relationships.get(actor_name, {}).get(other_actor_name) or Relationship()
+
+    def applied(self, diff: WorldDiff) -> "WorldState":
+        """A new WorldState with the diff applied; rows the diff does not touch are shared with this one"""
+        forces = dict(self.forces)
+        copied: Set[str] = set()
+        for update in diff.force_updates:
+            if update.actor_name not in copied:
+                forces[update.actor_name] = dict(forces.get(update.actor_name, {}))
+                copied.add(update.actor_name)
+            units = forces[update.actor_name]
+            unit = units.get(update.unit_name)
+            if unit is None:
+                units[update.unit_name] = ForceUnitState(unit_name=update.unit_name, location=update.location or "Unknown", details=update.details)
+            else:
+                changes = {"location": update.location, "details": update.details}
+                units[update.unit_name] = unit.model_copy(update={name: value for name, value in changes.items() if value})
+
+        relationships = dict(self.relationships)
+        copied.clear()
+        for update in diff.relationship_updates:
+            relationship = Relationship(stance=update.stance, note=update.note, updated_turn=diff.turn)
+            for actor_name, other_actor_name in ((update.actor_name, update.other_actor_name), (update.other_actor_name, update.actor_name)):
+                if actor_name not in copied:
+                    relationships[actor_name] = dict(relationships.get(actor_name, {}))
+                    copied.add(actor_name)
+                relationships[actor_name][other_actor_name] = relationship
+
+        return WorldState.model_construct(forces=forces, relationships=relationships)
+
 # --- ARGUMENT MODELS ---
 
 class BaseArgument(BaseModel):
@@ -90,6 +300,11 @@ class BaseArgument(BaseModel):
     is_successful: Optional[bool] = Field(None, description="True if the argument succeeded, False if it failed, None if not yet adjudicated.")
     probability_estimates: List[float] = Field(default_factory=list, description="List of probability estimates from AI panel (0.0 to 1.0).")
     final_probability: Optional[float] = Field(None, description="Final aggregated probability of success (median of estimates).")
+    is_big_project_stage: bool = Field(default=False, description="True if this action is the first stage of a big project broken down by the umpire.")
+    method_source: Optional[str] = Field(None, description="What chose the adjudication method: 'heuristic', 'llm', 'panel' (majority vote of the adjudication panel) or 'fallback'.")
+    heuristic_method: Optional[AdjudicationMethod] = Field(None, description="Method the heuristic classifier chose confidently, None if it escalated to the LLM (or was off).")
+    method_features: Dict[str, float] = Field(default_factory=dict, description="Features the heuristic classifier saw, kept so classifiers can be fitted from recorded logs.")
+    world_changes: Optional[WorldDiff] = Field(default=None, description="World-state changes made when the argument was resolved, including requested updates that were rejected.")
 
 class StandardArgument(BaseArgument):
     pass
@@ -108,8 +323,9 @@ class ActorState(BaseModel):
     It contains the actor's static definition and tracks changing elements.
     """
     actor_name: str = Field(description="The name of the actor. Matches the name in the game_definition.")
-    current_forces: List[ForceUnitState] = Field(default_factory=list, description="The actor's forces currently in play with their dynamic states.")
     effects: List[str] = Field(default_factory=list, description="List of conditions, or narrative markers resulting from arguments (e.g., 'Police Reform Successful', 'National infrastructure upgraded') or other game events.")
+    effect_turns: Dict[str, int] = Field(default_factory=dict, description="Turn in which each active effect was last asserted, used for merging and expiry.")
+    archived_effects: List[str] = Field(default_factory=list, description="Effects that were merged, expired or evicted from the active list, kept for after-action review.")
     argument: Optional[ArgumentVariant] = Field(default=None, description="Argument proposed by this actor in the current turn, awaiting adjudication.")
     pending_secret_arguments: List[SecretArgument] = Field(default_factory=list, description="Secret arguments made by this actor that are awaiting their trigger conditions.")
     internal_scratchpad: List[str] = Field(default_factory=list, description="AI's internal notes, multi-turn plans, or deliberations for this actor. Not typically shown to other players.")
@@ -117,19 +333,23 @@ class ActorState(BaseModel):
     deliberation_attempts_this_turn: int = Field(default=0, description="Number of times this actor has restarted deliberation this turn to prevent infinite loops.")
     conversation_history: List[Tuple[str, str]] = Field(default_factory=list, description="Conversation history for this actor's deliberation prompts. Each tuple is (role, content) where role is 'human' or 'assistant'.")
 
+    # Forces read from a checkpoint written before GameState.world, until GameState moves them there
+    _legacy_forces: List[ForceUnitState] = PrivateAttr(default_factory=list)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _keep_legacy_forces(cls, data: Any, handler):
+        """Older checkpoints keep each actor's forces in current_forces; hold them for GameState to migrate"""
+        legacy = data.pop("current_forces", None) if isinstance(data, dict) else None
+        actor_state = handler(data)
+        if legacy:
+            actor_state._legacy_forces = [ForceUnitState.model_validate(unit) for unit in legacy]
+        return actor_state
+
     @classmethod
     def from_actor_setup(cls, actor_setup: Actor):
-        """Helper method to initialize ActorState from an Actor definition."""
-        active_forces = []
-        for unit_def in actor_setup.starting_forces:
-            active_forces.append(
-                ForceUnitState(
-                    unit_name=unit_def.unit_name,
-                    location=unit_def.starting_location, # Use starting_location here
-                    details=unit_def.details,
-                )
-            )
-        return cls(actor_name=actor_setup.actor_name, current_forces=active_forces)
+        """Helper method to initialize ActorState from an Actor definition (its forces live in GameState.world)."""
+        return cls(actor_name=actor_setup.actor_name)
 
 # --- LOGGING & EVENT MODELS ---
 
@@ -142,42 +362,160 @@ class LogEntry(BaseModel):
     actor_name: Optional[str] = Field(None, description="Actor associated with this log entry, if applicable.")
     content: Union[ArgumentVariant, str] = Field(description="The actual data of the log entry (e.g., an argument, game event, or a narrative string).")
     summary: Optional[str]
+    degraded: bool = Field(default=False, description="True if a node fell back to a default after its LLM call failed while producing this entry.")
+    degraded_nodes: List[str] = Field(default_factory=list, description="Nodes that fell back to a default while producing this entry (for an argument entry, while the argument was deliberated and resolved).")
 
 
 # --- GAME STATE MODEL (for state graph) ---
+# Nodes return only the channels they changed (see GameState.delta) instead of the
+# whole state, so each step writes and checkpoints just those channels. The game log
+# and the actor states have reducers; every other field is a plain last-value channel.
+
+# A node's partial state update, keyed by GameState field
+StateUpdate = Dict[str, Any]
+
+
+class GameLogUpdate(BaseModel):
+    """Incremental write to the game_log channel: append entries, then drop the oldest `spilled` in-memory entries."""
+    entries: List[LogEntry] = Field(default_factory=list, description="Entries appended by the node.")
+    spilled: int = Field(default=0, description="Number of entries moved from the start of the in-memory log to the log store.")
+
+
+def merge_game_log(current: List[LogEntry], update: Union[GameLogUpdate, List[LogEntry]]) -> List[LogEntry]:
+    """Reducer of the game_log channel. A GameLogUpdate is applied incrementally; a list (graph input, subgraph output, update_state) replaces the log."""
+    if isinstance(update, GameLogUpdate):
+        return (current + update.entries)[update.spilled:]
+    return list(update)
+
+
+def merge_actor_states(current: List["ActorState"], update: List["ActorState"]) -> List["ActorState"]:
+    """Reducer of the actor_states channel. Each actor in the update replaces the actor of the same name, so a node can return just the actors it changed."""
+    updated = {actor_state.actor_name: actor_state for actor_state in update}
+    merged = [updated.pop(actor_state.actor_name, actor_state) for actor_state in current]
+    return merged + list(updated.values())
+
+
+def merge_world(current: WorldState, update: Union[WorldDiff, WorldState]) -> WorldState:
+    """Reducer of the world channel. A WorldDiff is applied to the current world; a WorldState (graph input, subgraph output, update_state) replaces it."""
+    if isinstance(update, WorldDiff):
+        return current.applied(update)
+    return update
+
+# The game state summary is kept as sections (see matrix_ai.summary); the text that
+# the prompts read is rendered from them locally.
+
+INITIAL_SUMMARY_SECTION = "Situation"
+
+
+def render_summary(sections: List[SummarySection]) -> str:
+    """The game state summary as text, one 'Key: text' line per section"""
+    return "\n".join(f"{section.key}: {section.text}" for section in sections)
+
 
 class GameState(BaseModel):
     """
     Represents the overall state of the game at any point in time.
     """
     game_definition: MatrixGame # Reference to the static game setup
+    game_id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="Unique identifier of this game run.")
     current_turn: int = Field(default=1, description="The current turn number.")
     current_phase: GamePhase = Field(default=GamePhase.SETUP, description="The current phase of the turn or game.")
-    actor_states: List[ActorState] = Field(default_factory=list, description="The dynamic states of all actors in the game.")
+    actor_states: Annotated[List[ActorState], merge_actor_states] = Field(default_factory=list, description="The dynamic states of all actors in the game.")
+    world: Annotated[WorldState, merge_world] = Field(default_factory=WorldState, description="Typed world-state store: every actor's force units and the relationship matrix between actors.")
     active_player_queue_index: int = Field(default=0, description="Index of the actor IN THE TURN ORDER whose turn it is. Ranges from 0 to len(turn_order)-1.")
-    game_log: List[LogEntry] = Field(default_factory=list, description="A chronological record of key arguments, decisions, and outcomes for after-action review.")
-    game_state_summary: str = Field(default="", description="A brief narrative summary of the game state, including events that have occured in the game so far and their reprecussions.")
+    game_log: Annotated[List[LogEntry], merge_game_log] = Field(default_factory=list, description="A chronological record of key arguments, decisions, and outcomes for after-action review.")
+    game_log_offset: int = Field(default=0, description="Number of older game log entries spilled to the log store; game_log holds the entries after them.")
+    spilled_log_head: Optional[str] = Field(default=None, description="Entry id of the most recent spilled game log entry (the head of this game's chain in the log store).")
+    actor_last_argument: Dict[str, int] = Field(default_factory=dict, description="Absolute game log position of each actor's most recent argument entry.")
+    pending_degraded_nodes: List[str] = Field(default_factory=list, description="Nodes that fell back to a default whose log entry is still to come; see log_store.ARGUMENT_NODES.")
+    game_state_summary: str = Field(default="", description="A brief narrative summary of the game state, including events that have occured in the game so far and their reprecussions. Rendered from summary_sections.")
+    summary_sections: List[SummarySection] = Field(default_factory=list, description="The game state summary as sections keyed by topic or actor, patched after every argument instead of being rewritten.")
     global_narrative_markers: List[str] = Field(default_factory=list, description="Overall game state descriptors or ongoing world events not tied to a single actor, e.g., 'International sanctions regime in effect', 'Widespread humanitarian crisis'.")
+    global_marker_turns: Dict[str, int] = Field(default_factory=dict, description="Turn in which each active global narrative marker was last asserted, used for merging and expiry.")
+    archived_global_narrative_markers: List[str] = Field(default_factory=list, description="Global narrative markers that were merged, expired or evicted from the active list, kept for after-action review.")
     turn_order: List[int] = Field(default_factory=list, description="List of actor *indices from game_definition.actors* defining the current turn order. Can be modified or randomized.")
     triggered_secrets_this_turn: List[str] = Field(default_factory=list, description="List of secret arguments that were triggered during the current turn's adjudication, formatted as 'Actor: Action description'.")
+    rng_draws: int = Field(default=0, description="Number of random draws taken from this game's random stream so far.")
+    settings: GameSettings = Field(default_factory=GameSettings, description="Engine settings for this game run.")
+
+    # Channels written by shared helpers during the current node (see mark_changed and delta)
+    _changed: Set[str] = PrivateAttr(default_factory=set)
+    _log_update: Optional[GameLogUpdate] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _migrate_legacy_forces(self) -> "GameState":
+        """
+        A checkpoint written before the world store has an empty world and the forces
+        in each actor state: build the world from them, and mark it changed so the
+        next node's delta writes it to its channel.
+        """
+        if not self.world.forces and any(actor_state._legacy_forces for actor_state in self.actor_states):
+            forces: Dict[str, Dict[str, ForceUnitState]] = {}
+            for actor_state in self.actor_states:
+                units = forces.setdefault(actor_state.actor_name, {})
+                for unit in actor_state._legacy_forces:
+                    # Same numbered suffix for a repeated name as WorldState.from_matrix_game
+                    unit_name, copy = unit.unit_name, 2
+                    while unit_name in units:
+                        unit_name, copy = f"{unit.unit_name} ({copy})", copy + 1
+                    units[unit_name] = unit.model_copy(update={"unit_name": unit_name})
+            self.world = WorldState(forces=forces, relationships=self.world.relationships)
+            self.mark_changed("world")
+        return self
 
     @classmethod
-    def from_matrix_game_setup(cls, game_setup: MatrixGame):
+    def from_matrix_game_setup(cls, game_setup: MatrixGame, settings: Optional[GameSettings] = None):
         """Initializes the GameState from a MatrixGame setup."""
         actor_s = [ActorState.from_actor_setup(actor_def) for actor_def in game_setup.actors]
         initial_turn_order = list(range(len(game_setup.actors))) # Stores indices of actors from game_setup.actors
         
         initial_phase = GamePhase.SETUP
+        
+        # Record the seed so every run can be reproduced, even when none was given
+        settings = settings or GameSettings()
+        if settings.seed is None:
+            settings = settings.model_copy(update={"seed": random.SystemRandom().randrange(2**32)})
+    
+        # The introduction opens the summary as its first section
+        summary_sections = [SummarySection(key=INITIAL_SUMMARY_SECTION, text=game_setup.introduction)]
     
         return cls(
             game_definition=game_setup,
             actor_states=actor_s,
+            world=WorldState.from_matrix_game(game_setup),
             turn_order=initial_turn_order,
             current_turn=1,
             current_phase=initial_phase,
-            game_state_summary=game_setup.introduction,
+            game_state_summary=render_summary(summary_sections),
+            summary_sections=summary_sections,
+            settings=settings,
         )
 
+    def mark_changed(self, *fields: str) -> None:
+        """Record fields changed by a shared helper, so the node's delta includes them"""
+        self._changed.update(fields)
+
+    def record_log_append(self, entry: LogEntry, spilled: int = 0) -> None:
+        """Record a game log entry appended by this node (and how many old entries were spilled), for its delta"""
+        if self._log_update is None:
+            self._log_update = GameLogUpdate()
+        self._log_update.entries.append(entry)
+        self._log_update.spilled += spilled
+
+    def delta(self, *fields: str, **values: Any) -> StateUpdate:
+        """
+        The update a node returns: the named fields, the given values (e.g.
+        actor_states=[current_actor_state] when only one actor changed), and whatever
+        the shared helpers changed (log appends, degraded markers, random draws).
+        A field the helpers changed is sent whole even when a value is given for it.
+        Log appends are sent as a GameLogUpdate rather than the whole log.
+        """
+        update = {name: getattr(self, name) for name in sorted(self._changed.union(fields))}
+        update.update((name, value) for name, value in values.items() if name not in self._changed)
+        if self._log_update is not None:
+            update["game_log"] = self._log_update
+        return update
+
     @property
     def current_actor_state(self) -> Optional[ActorState]:
         """Convenience property to get the ActorState of the current actor based on turn_order and active_player_queue_index."""
@@ -202,6 +540,20 @@ class GameState(BaseModel):
                     return actor_def
         return None
     
+# Fields no node changes once the game has started. The phase subgraphs leave them out
+# of their output, so finishing a subgraph does not rewrite them in the parent graph.
+STATIC_STATE_FIELDS = ("game_definition", "game_id", "settings")
+
+SubgraphOutput = create_model(
+    "SubgraphOutput",
+    __doc__="Output schema of the phase subgraphs: every GameState field except the static ones.",
+    **{
+        name: (GameState.__annotations__[name], field)
+        for name, field in GameState.model_fields.items()
+        if name not in STATIC_STATE_FIELDS
+    }
+)
+    
 # --- STRUCTURED OUTPUT MODELS (for LLMs) ---
 
 class ArgumentResponse(BaseModel): # This is the structured output for LLMs making arguments
@@ -221,20 +573,26 @@ class EstProbabilityResponse(BaseModel):
     reasoning: str = Field(description="A brief explanation of your reasoning for the estimated probability of success for the argument.")
     success_probability: float = Field(description="The estimated probability of success for the argument. This should be a floating point number between 0 and 1.")
 
+class PanelAdjudicationResponse(BaseModel):
+    cons: List[str] = Field(description="Obstacles that could prevent successful execution of the action (Cons) - focus on resource limitations, opposition, technical barriers, unfavorable conditions, etc.")
+    method: AdjudicationMethod = Field(description="Your vote for the method of adjudication.")
+    reasoning: str = Field(description="A brief explanation of your reasoning for the estimated probability of success for the argument.")
+    success_probability: float = Field(description="The estimated probability of success for the argument. This should be a floating point number between 0 and 1.")
+
 class NarrativeResponse(BaseModel):
     adjudication_narrative: str = Field(description="A narrative account describing what happened - what the actor did (or failed to do) and the immediate consequences. If the action failed, explain that the actor tried to do this but failed because of specific reasons from the cons.")
 
-class ForceUpdate(BaseModel):
-    actor_name: str = Field(description="Name of the actor who owns this force unit")
-    unit_name: str = Field(description="Name of the unit to update")
-    location: Optional[str] = Field(None, description="New location for the unit")
-    details: Optional[str] = Field(None, description="Updated details about the unit")
+class SummaryPatch(BaseModel):
+    op: Literal["add", "replace", "drop"] = Field(description="'add' a section for a new topic or actor, 'replace' the text of an existing section, or 'drop' a section that is resolved or no longer relevant.")
+    key: str = Field(description="Key of the section, exactly as it appears in the current summary for 'replace' and 'drop'.")
+    text: str = Field(default="", description="Full new text of the section for 'add' and 'replace' (one to three sentences); empty for 'drop'.")
 
 class WorldStateUpdateResponse(BaseModel):
     actor_effects: List[str] = Field(default_factory=list, description="New effects to add to the actor's effects list (e.g., 'Successfully negotiated trade deal', 'Lost credibility with allies').")
     force_updates: List[ForceUpdate] = Field(default_factory=list, description="Updates to force units with specific fields that can be updated.")
     global_narrative_markers: List[str] = Field(default_factory=list, description="New global narrative markers to add (e.g., 'Economic sanctions imposed', 'Humanitarian crisis escalating').")
-    game_state_summary_update: str = Field(description="Updated summary of the current game state incorporating the results of this argument.")
+    summary_patches: List[SummaryPatch] = Field(default_factory=list, description="Patches to the sections of the game state summary that this argument changes; sections not mentioned are kept as they are.")
+    relationship_updates: List[RelationshipUpdate] = Field(default_factory=list, description="Changes in how pairs of actors stand towards each other as a result of this argument.")
 
 class CombinedNarrativeAndWorldStateResponse(BaseModel):
     """Combined response that includes both narrative and world state updates for performance optimization"""
@@ -242,7 +600,8 @@ class CombinedNarrativeAndWorldStateResponse(BaseModel):
     actor_effects: List[str] = Field(default_factory=list, description="New effects to add to the actor's effects list (e.g., 'Successfully negotiated trade deal', 'Lost credibility with allies').")
     force_updates: List[ForceUpdate] = Field(default_factory=list, description="Updates to force units with specific fields that can be updated.")
     global_narrative_markers: List[str] = Field(default_factory=list, description="New global narrative markers to add (e.g., 'Economic sanctions imposed', 'Humanitarian crisis escalating').")
-    game_state_summary_update: str = Field(description="Updated summary of the current game state incorporating the results of this argument.")
+    summary_patches: List[SummaryPatch] = Field(default_factory=list, description="Patches to the sections of the game state summary that this argument changes; sections not mentioned are kept as they are.")
+    relationship_updates: List[RelationshipUpdate] = Field(default_factory=list, description="Changes in how pairs of actors stand towards each other as a result of this argument.")
 
 class SecretArgumentValidationResponse(BaseModel):
     is_valid_secret: bool = Field(description="Whether this is truly a secret argument that should remain hidden until triggered.")
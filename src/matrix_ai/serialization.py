@@ -0,0 +1,279 @@
+import hashlib
+import importlib
+import threading
+import zlib
+from enum import Enum
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+
+import ormsgpack
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from pydantic import BaseModel
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency: pip install -e ".[compact]"
+    zstandard = None
+
+from .schemas import ActorState, ForceUnitState, MatrixGame, WorldState
+
+# Compact binary serializer for checkpoints. The default JsonPlusSerializer writes
+# every pydantic model as a msgpack extension carrying its module, class name and a
+# map of field names, so a checkpoint repeats the same class paths, field names and
+# actor, unit and location names many times over. CompactSerializer instead writes:
+#
+#   - models as [MODEL, type, value, ...], where the class path and field names are
+#     written the first time a type occurs in a payload and referenced by index after
+#   - short strings (names, locations, phases) once per payload, then by index
+#   - the result compressed with zstd, primed with a raw-content dictionary built
+#     from the scenario, so the briefings and names every game state repeats cost
+#     next to nothing even in the small per-channel writes
+#
+# Only models and enums from allowed modules (matrix_ai by default) are encoded this
+# way; anything else (messages, sends, interrupts) is embedded as a JsonPlus payload.
+# Reading falls back to JsonPlus too, so existing checkpoints stay readable.
+
+# Container tags: every msgpack array in a payload is tagged, so a plain int or str is never ambiguous
+_MODEL, _LIST, _TUPLE, _STR_REF, _ENUM, _PAIRS, _JSONPLUS = range(7)
+
+# Strings up to this length are interned; longer ones (narratives) are left to compression
+MAX_INTERNED_LENGTH = 160
+
+_NATIVE_TYPES = (bool, int, float, bytes)
+
+_jsonplus = JsonPlusSerializer()
+
+# --- ENCODING ---
+
+class _Encoder:
+    """Turns one object into a tree of msgpack-native values, interning types and strings as it goes"""
+
+    def __init__(self, allowed_modules: Tuple[str, ...]):
+        self.allowed_modules = allowed_modules
+        self.types: Dict[type, int] = {}
+        self.strings: Dict[str, int] = {}
+
+    def _allowed(self, cls: type) -> bool:
+        return cls.__module__.split(".")[0] in self.allowed_modules
+
+    def _type_ref(self, cls: type, fields: Optional[Sequence[str]] = None) -> Any:
+        index = self.types.get(cls)
+        if index is not None:
+            return index
+        self.types[cls] = len(self.types)
+        path = f"{cls.__module__}.{cls.__qualname__}"
+        return [path, list(fields)] if fields is not None else [path]
+
+    def encode(self, obj: Any) -> Any:
+        cls = type(obj)
+        if cls is str:
+            if not 0 < len(obj) <= MAX_INTERNED_LENGTH:
+                return obj
+            index = self.strings.get(obj)
+            if index is None:
+                self.strings[obj] = len(self.strings)
+                return obj
+            return [_STR_REF, index]
+        if obj is None or cls in _NATIVE_TYPES:
+            return obj
+        if cls is list:
+            return [_LIST, *map(self.encode, obj)]
+        if issubclass(cls, BaseModel) and self._allowed(cls):
+            fields = cls.model_fields
+            values = obj.__dict__
+            return [_MODEL, self._type_ref(cls, fields), *[self.encode(values.get(name)) for name in fields]]
+        if issubclass(cls, Enum) and self._allowed(cls):
+            return [_ENUM, self._type_ref(cls), self.encode(obj.value)]
+        if cls is tuple:
+            return [_TUPLE, *map(self.encode, obj)]
+        if cls is dict:
+            if all(type(key) is str for key in obj):
+                return {key: self.encode(value) for key, value in obj.items()}
+            return [_PAIRS, *[self.encode(item) for pair in obj.items() for item in pair]]
+        type_, data = _jsonplus.dumps_typed(obj)
+        return [_JSONPLUS, type_, data]
+
+
+class _Decoder:
+    """Rebuilds an object from the tree written by _Encoder, replaying its interning order"""
+
+    def __init__(self, allowed_modules: Tuple[str, ...]):
+        self.allowed_modules = allowed_modules
+        self.types: List[Tuple[type, Optional[List[str]]]] = []
+        self.strings: List[str] = []
+
+    def _resolve(self, ref: Any) -> Tuple[type, Optional[List[str]]]:
+        if type(ref) is int:
+            return self.types[ref]
+        path, *fields = ref
+        module, _, name = path.rpartition(".")
+        if module.split(".")[0] not in self.allowed_modules:
+            raise ValueError(f"Refusing to load {path}: module not allowed by the serializer")
+        cls = importlib.import_module(module)
+        for part in name.split("."):
+            cls = getattr(cls, part)
+        resolved = (cls, fields[0] if fields else None)
+        self.types.append(resolved)
+        return resolved
+
+    def decode(self, node: Any) -> Any:
+        cls = type(node)
+        if cls is str:
+            if 0 < len(node) <= MAX_INTERNED_LENGTH:
+                self.strings.append(node)
+            return node
+        if cls is dict:
+            return {key: self.decode(value) for key, value in node.items()}
+        if cls is not list:
+            return node
+
+        tag = node[0]
+        if tag == _STR_REF:
+            return self.strings[node[1]]
+        if tag == _LIST:
+            return list(map(self.decode, node[1:]))
+        if tag == _MODEL:
+            model, fields = self._resolve(node[1])
+            values = dict(zip(fields, map(self.decode, node[2:])))
+            if values.keys() <= model.model_fields.keys():
+                return model.model_construct(**values)
+            # Written before a field was removed: validate, so the model can migrate it
+            return model.model_validate(values)
+        if tag == _ENUM:
+            enum, _ = self._resolve(node[1])
+            return enum(self.decode(node[2]))
+        if tag == _TUPLE:
+            return tuple(map(self.decode, node[1:]))
+        if tag == _PAIRS:
+            items = list(map(self.decode, node[1:]))
+            return dict(zip(items[::2], items[1::2]))
+        if tag == _JSONPLUS:
+            return _jsonplus.loads_typed((node[1], node[2]))
+        raise ValueError(f"Unknown compact serialization tag: {tag}")
+
+# --- SCENARIO DICTIONARIES ---
+
+def scenario_dictionary(game: MatrixGame) -> bytes:
+    """
+    Raw-content zstd dictionary for a scenario: the compact encoding of its definition,
+    initial actor states and starting world. It only depends on the scenario, so a
+    restarted process rebuilds the same dictionary (and id) for games it resumes.
+    """
+    actor_states = [ActorState.from_actor_setup(actor) for actor in game.actors]
+    return ormsgpack.packb(_Encoder(("matrix_ai",)).encode([game, actor_states, WorldState.from_matrix_game(game)]))
+
+
+# ActorState fields as written before the world store, when each actor carried its forces
+_PRE_WORLD_ACTOR_FIELDS = [
+    "actor_name", "current_forces", "effects", "effect_turns", "archived_effects", "argument",
+    "pending_secret_arguments", "internal_scratchpad", "big_project_feedback",
+    "deliberation_attempts_this_turn", "conversation_history",
+]
+
+
+def _pre_world_scenario_dictionary(game: MatrixGame) -> bytes:
+    """
+    The dictionary checkpoints written before GameState.world were compressed with:
+    the definition and initial actor states, each with its starting forces.
+    """
+    encoder = _Encoder(("matrix_ai",))
+    tree = [_LIST, encoder.encode(game), [_LIST]]
+    for actor in game.actors:
+        values = dict(ActorState.from_actor_setup(actor).__dict__, current_forces=[
+            ForceUnitState(unit_name=unit.unit_name, location=unit.starting_location, details=unit.details)
+            for unit in actor.starting_forces
+        ])
+        tree[2].append([_MODEL, encoder._type_ref(ActorState, _PRE_WORLD_ACTOR_FIELDS), *[encoder.encode(values[name]) for name in _PRE_WORLD_ACTOR_FIELDS]])
+    return ormsgpack.packb(tree)
+
+
+def _dictionary_id(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
+
+# --- SERIALIZER ---
+
+class CompactSerializer(SerializerProtocol):
+    """
+    Checkpoint serializer writing compact, interned msgpack compressed with zstd.
+
+    Pass it to a checkpointer (MemorySaver(serde=...), SqliteSaver(conn, serde=...)).
+    With a game (or after add_scenario), payloads are compressed with that scenario's
+    dictionary; the dictionary id is part of the payload type, so a process reading
+    them back must register the same scenario first. Without zstandard installed,
+    payloads are compressed with zlib instead.
+    """
+
+    def __init__(
+        self,
+        game: Optional[MatrixGame] = None,
+        compression: Literal["zstd", "zlib", "none"] = "zstd",
+        level: int = 3,
+        min_compress_bytes: int = 64,
+        allowed_modules: Sequence[str] = ("matrix_ai",),
+    ):
+        self.compression = compression if compression != "zstd" or zstandard is not None else "zlib"
+        self.level = level
+        self.min_compress_bytes = min_compress_bytes
+        self.allowed_modules = tuple(allowed_modules)
+        self._dictionaries: Dict[str, Any] = {}
+        self._active_dictionary: Optional[str] = None
+        self._local = threading.local()
+        if game is not None:
+            self.add_scenario(game)
+
+    def add_scenario(self, game: MatrixGame) -> str:
+        """
+        Register a scenario's dictionary and compress with it from now on; returns its id.
+        The scenario's pre-world-store dictionary is registered too, for reading older checkpoints.
+        """
+        dictionary_id = None
+        for data in (_pre_world_scenario_dictionary(game), scenario_dictionary(game)):
+            dictionary_id = _dictionary_id(data)
+            if dictionary_id not in self._dictionaries and zstandard is not None:
+                self._dictionaries[dictionary_id] = zstandard.ZstdCompressionDict(data, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+        self._active_dictionary = dictionary_id if zstandard is not None else None
+        return dictionary_id
+
+    def _codec(self, kind: str, dictionary_id: Optional[str]) -> Any:
+        """Per-thread zstd compressor/decompressor (they are not thread-safe) for a dictionary"""
+        codecs = self._local.__dict__.setdefault("codecs", {})
+        key = (kind, dictionary_id)
+        if key not in codecs:
+            dictionary = self._dictionaries[dictionary_id] if dictionary_id else None
+            if kind == "compress":
+                codecs[key] = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary)
+            else:
+                codecs[key] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return codecs[key]
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if obj is None or isinstance(obj, (bytes, bytearray)):
+            return _jsonplus.dumps_typed(obj)
+
+        data = ormsgpack.packb(_Encoder(self.allowed_modules).encode(obj))
+        if self.compression == "none" or len(data) < self.min_compress_bytes:
+            return "compact", data
+        if self.compression == "zlib":
+            return "compact+zlib", zlib.compress(data, min(self.level, 9))
+
+        dictionary_id = self._active_dictionary
+        type_ = f"compact+zstd:{dictionary_id}" if dictionary_id else "compact+zstd"
+        return type_, self._codec("compress", dictionary_id).compress(data)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if not type_.startswith("compact"):
+            return _jsonplus.loads_typed(data)
+
+        _, _, codec = type_.partition("+")
+        if codec == "zlib":
+            payload = zlib.decompress(payload)
+        elif codec:
+            if zstandard is None:
+                raise ImportError("zstandard is required to read these checkpoints. Install it with: pip install -e \".[compact]\"")
+            _, _, dictionary_id = codec.partition(":")
+            if dictionary_id and dictionary_id not in self._dictionaries:
+                raise ValueError(f"Checkpoint was compressed with scenario dictionary {dictionary_id}; register its scenario with add_scenario first")
+            payload = self._codec("decompress", dictionary_id or None).decompress(payload)
+
+        return _Decoder(self.allowed_modules).decode(ormsgpack.unpackb(payload))
@@ -0,0 +1,410 @@
+import asyncio
+import bisect
+import contextlib
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .schemas import GameState, GameSettings
+from .main_game_graph import create_main_game_graph
+from .scenario_compiler import load_scenario_file
+from .streaming import FieldStreamer
+from .llm import set_rate_limit
+
+# Multi-game HTTP server. Clients start games with POST /games and follow them as
+# server-sent events on GET /games/<id>/events. At most max_games games run at once;
+# up to max_queued more wait in a FIFO queue and anything beyond that is refused
+# with 503, so load beyond capacity turns into fast rejections instead of slower
+# games for everyone. All games share one compiled graph, the pooled model clients
+# and (optionally) a process-wide request rate limit.
+#
+#   POST /games               {"scenario": "trade-dispute", "seed": 1, "settings": {...}, "overrides": {...}}
+#   GET  /games               all games and their status
+#   GET  /games/<id>          one game's status
+#   GET  /games/<id>/events   SSE progress stream (replays earlier events first)
+#   GET  /health              capacity and queue depth
+#
+# Finished games are kept for session_ttl_seconds (and at most max_finished_sessions
+# of them) so clients can still read their results. Streamed model text is only kept
+# in a bounded buffer of recent token events, and dropped once the game finishes.
+
+DEFAULT_SCENARIOS_DIR = Path(__file__).resolve().parents[2] / "scenarios"
+MAX_BODY_BYTES = 1_000_000
+
+
+@dataclass
+class GameSession:
+    """A game submitted to the server and the progress events it has produced so far."""
+    game_id: str
+    scenario: str
+    state: GameState
+    status: str = "queued"  # queued, running, completed, failed
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    max_text_events: int = 2000
+    events: List[Tuple[int, str, Dict[str, Any]]] = field(default_factory=list)
+    next_event_id: int = 0
+    text_events: int = 0
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def _append(self, event: str, data: Dict[str, Any]) -> None:
+        self.events.append((self.next_event_id, event, data))
+        self.next_event_id += 1
+        if event == "text":
+            self.text_events += 1
+            if self.text_events > 2 * self.max_text_events:
+                self._drop_text_events(keep=self.max_text_events)
+
+    def _drop_text_events(self, keep: int = 0) -> None:
+        """Drop all but the newest keep token events (in batches, so appending stays cheap)"""
+        drop = self.text_events - keep
+        kept = []
+        for item in self.events:
+            if item[1] == "text" and drop > 0:
+                drop -= 1
+                continue
+            kept.append(item)
+        self.events = kept
+        self.text_events = min(self.text_events, keep)
+
+    def events_after(self, last_id: int) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Events with an id greater than last_id (ids are increasing but may have gaps)"""
+        return self.events[bisect.bisect_right(self.events, last_id, key=lambda item: item[0]):]
+
+    async def publish(self, event: str, data: Dict[str, Any]) -> None:
+        async with self.changed:
+            self._append(event, data)
+            self.changed.notify_all()
+
+    async def finish(self, status: str, event: str, data: Dict[str, Any]) -> None:
+        """Publish the final event and mark the game finished in one step, so no listener misses it"""
+        async with self.changed:
+            self.status = status
+            self.finished_at = time.time()
+            # The streamed text is only of interest live; the narrative is in the final state
+            self._drop_text_events()
+            self._append(event, data)
+            self.changed.notify_all()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "game_id": self.game_id,
+            "scenario": self.scenario,
+            "status": self.status,
+            "error": self.error,
+            "seed": self.state.settings.seed,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "events": self.next_event_id,
+        }
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+# --- GAME SERVER ---
+
+class GameServer:
+    """asyncio HTTP server running many games with admission control."""
+
+    def __init__(
+        self,
+        max_games: int = 4,
+        max_queued: int = 16,
+        scenarios_dir: Optional[str] = None,
+        requests_per_second: Optional[float] = None,
+        base_settings: Optional[Dict[str, Any]] = None,
+        session_ttl_seconds: float = 3600.0,
+        max_finished_sessions: int = 64,
+    ):
+        self.max_games = max_games
+        self.max_queued = max_queued
+        self.session_ttl_seconds = session_ttl_seconds
+        self.max_finished_sessions = max_finished_sessions
+        self.scenarios_dir = Path(scenarios_dir) if scenarios_dir else DEFAULT_SCENARIOS_DIR
+        self.base_settings = base_settings or {}
+        self.sessions: Dict[str, GameSession] = {}
+        self.rejected = 0
+        self._graph = create_main_game_graph()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._server: Optional[asyncio.base_events.Server] = None
+        set_rate_limit(requests_per_second)
+
+    # --- Lifecycle ---
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_games)]
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        await self.start(host, port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    # --- Admission and execution ---
+
+    def _evict_sessions(self) -> None:
+        """Forget finished games older than the TTL, then the oldest beyond max_finished_sessions"""
+        now = time.time()
+        finished = sorted((s for s in self.sessions.values() if s.is_finished), key=lambda s: s.finished_at)
+        expired = [s for s in finished if now - s.finished_at > self.session_ttl_seconds]
+        kept = finished[len(expired):]
+        expired.extend(kept[:max(0, len(kept) - self.max_finished_sessions)])
+        for session in expired:
+            del self.sessions[session.game_id]
+
+    async def submit(self, request: Dict[str, Any]) -> GameSession:
+        """Validate a game start request and queue it, or refuse it when the queue is full"""
+        scenario = request.get("scenario")
+        if not isinstance(scenario, str) or "/" in scenario or "\\" in scenario:
+            raise HTTPError(400, "'scenario' must be the name of a bundled scenario")
+        scenario_path = self.scenarios_dir / f"{scenario}.json"
+        if not scenario_path.exists():
+            raise HTTPError(404, f"Unknown scenario: {scenario}")
+
+        if self._queue.full():
+            self.rejected += 1
+            raise HTTPError(503, "Server at capacity, retry later", {"Retry-After": "5"})
+
+        try:
+            # Loading may (re)compile the scenario artifact: keep the file I/O off the event loop
+            game_definition = await asyncio.to_thread(load_scenario_file, str(scenario_path), request.get("overrides") or None)
+            settings = GameSettings.model_validate({**self.base_settings, **(request.get("settings") or {})})
+            if request.get("seed") is not None:
+                settings.seed = int(request["seed"])
+        except (ValueError, TypeError) as e:
+            raise HTTPError(400, str(e))
+
+        # Other requests may have filled the queue while the scenario loaded
+        if self._queue.full():
+            self.rejected += 1
+            raise HTTPError(503, "Server at capacity, retry later", {"Retry-After": "5"})
+
+        state = GameState.from_matrix_game_setup(game_definition, settings)
+        session = GameSession(game_id=state.game_id, scenario=scenario, state=state)
+        session._append("queued", {"game_id": session.game_id, "position": self._queue.qsize() + 1})
+        self._evict_sessions()
+        self.sessions[session.game_id] = session
+        self._queue.put_nowait(session)
+        return session
+
+    async def _worker(self) -> None:
+        while True:
+            session = await self._queue.get()
+            try:
+                await self._run_game(session)
+            finally:
+                self._queue.task_done()
+
+    async def _run_game(self, session: GameSession) -> None:
+        session.status = "running"
+        session.started_at = time.time()
+        await session.publish("started", {"game_id": session.game_id, "seed": session.state.settings.seed})
+
+        config = {"configurable": {"thread_id": session.game_id}, "recursion_limit": 600}
+        streamer = FieldStreamer()
+        final_state = session.state
+        turn, actor, reported = 0, "", set()
+
+        try:
+            async for namespace, mode, payload in self._graph.astream(session.state, config=config, stream_mode=["values", "messages"], subgraphs=True):
+                if mode == "messages":
+                    for delta in streamer.feed(*payload):
+                        await session.publish("text", {"node": delta.node, "field": delta.field, "text": delta.text, "is_first": delta.is_first})
+                    continue
+                if namespace:
+                    continue
+
+                state = payload if isinstance(payload, GameState) else GameState.model_validate(payload)
+                final_state = state
+                if state.current_turn != turn:
+                    turn = state.current_turn
+                    await session.publish("turn", {"turn": turn})
+                if state.current_actor_definition and state.current_actor_definition.actor_name != actor:
+                    actor = state.current_actor_definition.actor_name
+                    await session.publish("actor", {"turn": turn, "actor": actor})
+                argument = state.current_actor_state.argument if state.current_actor_state else None
+                if argument and argument.is_successful is not None and (turn, actor, argument.action_description) not in reported:
+                    reported.add((turn, actor, argument.action_description))
+                    await session.publish("argument", {
+                        "turn": turn,
+                        "actor": actor,
+                        "action": argument.action_description,
+                        "is_successful": argument.is_successful
+                    })
+
+            session.state = final_state
+            await session.finish("completed", "completed", {
+                "turns": final_state.current_turn,
+                "phase": final_state.current_phase.value,
+                "summary": final_state.game_state_summary,
+                "global_narrative_markers": final_state.global_narrative_markers
+            })
+
+        except Exception as e:
+            session.error = f"{type(e).__name__}: {e}"
+            await session.finish("failed", "failed", {"error": session.error})
+
+    def stats(self) -> Dict[str, Any]:
+        self._evict_sessions()
+        statuses = [session.status for session in self.sessions.values()]
+        return {
+            "max_games": self.max_games,
+            "max_queued": self.max_queued,
+            "running": statuses.count("running"),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "completed": statuses.count("completed"),
+            "failed": statuses.count("failed"),
+            "rejected": self.rejected,
+        }
+
+    # --- HTTP ---
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, body = await self._read_request(reader)
+            await self._route(method, path, body, writer)
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": str(e)}, e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            # The response may already be under way (an event stream); then only the close remains
+            with contextlib.suppress(Exception):
+                await self._send_json(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise HTTPError(400, "Malformed request line")
+        method, path = request_line[0].upper(), request_line[1].split("?", 1)[0]
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length header")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length header")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, body
+
+    async def _route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["health"] and method == "GET":
+            await self._send_json(writer, 200, self.stats())
+        elif parts == ["games"] and method == "POST":
+            try:
+                request = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                raise HTTPError(400, "Request body must be JSON")
+            if not isinstance(request, dict):
+                raise HTTPError(400, "Request body must be a JSON object")
+            session = await self.submit(request)
+            await self._send_json(writer, 202, {**session.summary(), "events_url": f"/games/{session.game_id}/events"})
+        elif parts == ["games"] and method == "GET":
+            self._evict_sessions()
+            await self._send_json(writer, 200, [session.summary() for session in self.sessions.values()])
+        elif len(parts) in (2, 3) and parts[0] == "games" and method == "GET":
+            session = self.sessions.get(parts[1])
+            if session is None:
+                raise HTTPError(404, f"Unknown game: {parts[1]}")
+            if len(parts) == 2:
+                await self._send_json(writer, 200, session.summary())
+            elif parts[2] == "events":
+                await self._stream_events(session, writer)
+            else:
+                raise HTTPError(404, f"Not found: {path}")
+        elif parts and parts[0] in ("games", "health"):
+            raise HTTPError(405, f"{method} not allowed on {path}")
+        else:
+            raise HTTPError(404, f"Not found: {path}")
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode()
+        head = {"Content-Type": "application/json", "Content-Length": str(len(body)), "Connection": "close", **(headers or {})}
+        writer.write(_status_line(status) + _header_block(head) + body)
+        await writer.drain()
+
+    async def _stream_events(self, session: GameSession, writer: asyncio.StreamWriter) -> None:
+        """Send the game's events as SSE, replaying earlier ones, until the game finishes"""
+        writer.write(_status_line(200) + _header_block({"Content-Type": "text/event-stream", "Cache-Control": "no-cache", "Connection": "close"}))
+        await writer.drain()
+
+        last_id = -1
+        while True:
+            async with session.changed:
+                await session.changed.wait_for(lambda: session.next_event_id - 1 > last_id or session.is_finished)
+                pending = session.events_after(last_id)
+                finished = session.is_finished
+            for event_id, event, data in pending:
+                writer.write(f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                last_id = event_id
+            # Slow clients hold back only their own stream: drain waits on this socket alone
+            await writer.drain()
+            if finished and last_id == session.next_event_id - 1:
+                return
+
+
+def _status_line(status: int) -> bytes:
+    return f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n".encode()
+
+
+def _header_block(headers: Dict[str, str]) -> bytes:
+    return "".join(f"{name}: {value}\r\n" for name, value in headers.items()).encode() + b"\r\n"
+
+
+def run_server(host: str = "127.0.0.1", port: int = 8000, **kwargs) -> None:
+    """Run a GameServer until interrupted (kwargs are passed to GameServer)"""
+    async def main():
+        server = GameServer(**kwargs)
+        try:
+            await server.serve_forever(host, port)
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
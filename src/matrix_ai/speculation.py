@@ -0,0 +1,148 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Set
+
+from .schemas import GameState, ArgumentResponse, LogEntryType
+from .log_store import iter_game_log, log_length
+
+# Speculative deliberation: while the current actor's argument is being adjudicated,
+# the next actor in turn order deliberates in the background against a snapshot of
+# the state. When the next actor's turn arrives, the draft is committed only if
+# nothing it depends on changed in the meantime.
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative-deliberation")
+_lock = Lock()
+_pending: Dict[str, "Speculation"] = {}
+_stats = {"started": 0, "committed": 0, "discarded": 0, "failed": 0}
+
+
+@dataclass
+class Speculation:
+    """A background deliberation for the next actor, drafted against a state snapshot."""
+    actor_name: str
+    turn: int
+    snapshot: GameState
+    future: Future
+
+
+# --- HELPER FUNCTIONS ---
+
+def _dependency_terms(snapshot: GameState, actor_name: str, response: ArgumentResponse) -> Set[str]:
+    """Names the speculative argument depends on: the actor, its units and any actor it refers to"""
+    terms = {actor_name.lower()}
+
+    terms.update(unit.unit_name.lower() for unit in snapshot.world.actor_units(actor_name))
+
+    argument_text = " ".join([response.action_description, *response.pros]).lower()
+    for other in snapshot.actor_states:
+        if other.actor_name.lower() in argument_text:
+            terms.add(other.actor_name.lower())
+
+    return terms
+
+
+def _changes_since(snapshot: GameState, state: GameState) -> List[str]:
+    """Collect the text of everything that happened between the snapshot and the current state"""
+    changes = []
+
+    for log in iter_game_log(state, log_length(snapshot)):
+        if log.entry_type == LogEntryType.ARGUMENT and hasattr(log.content, "adjudication_narrative"):
+            changes.append(log.content.adjudication_narrative or log.content.action_description)
+        elif isinstance(log.content, str):
+            changes.append(log.content)
+
+    changes.extend(m for m in state.global_narrative_markers if m not in snapshot.global_narrative_markers)
+    changes.extend(state.triggered_secrets_this_turn)
+
+    return changes
+
+
+def _is_still_valid(speculation: Speculation, state: GameState, response: ArgumentResponse) -> bool:
+    """Check whether the events since the snapshot leave the speculative argument untouched"""
+    actor_name = speculation.actor_name
+    before = next((a for a in speculation.snapshot.actor_states if a.actor_name == actor_name), None)
+    after = next((a for a in state.actor_states if a.actor_name == actor_name), None)
+    if before is None or after is None:
+        return False
+
+    # Direct changes to the actor's own position always invalidate the draft
+    if before.effects != after.effects:
+        return False
+    if speculation.snapshot.world.forces.get(actor_name) != state.world.forces.get(actor_name):
+        return False
+    if speculation.snapshot.world.relationships.get(actor_name) != state.world.relationships.get(actor_name):
+        return False
+    if any(secret.is_triggered for secret in after.pending_secret_arguments):
+        return False
+
+    terms = _dependency_terms(speculation.snapshot, actor_name, response)
+    for change in _changes_since(speculation.snapshot, state):
+        text = change.lower()
+        if any(term in text for term in terms):
+            return False
+
+    return True
+
+# --- PUBLIC API ---
+
+def submit_speculation(game_id: str, actor_name: str, snapshot: GameState, deliberate: Callable[[], ArgumentResponse]) -> None:
+    """Start a background deliberation for the next actor, replacing any earlier draft for this game"""
+    future = _executor.submit(deliberate)
+    with _lock:
+        previous = _pending.pop(game_id, None)
+        _pending[game_id] = Speculation(actor_name=actor_name, turn=snapshot.current_turn, snapshot=snapshot, future=future)
+        _stats["started"] += 1
+    if previous:
+        previous.future.cancel()
+
+
+def take_speculative_argument(state: GameState) -> Optional[ArgumentResponse]:
+    """
+    Return the speculative argument for the current actor if it is still valid.
+
+    Waits for the background deliberation if it has not finished yet. Returns None
+    (and discards the draft) when there is no draft for this actor and turn, when
+    the deliberation failed, or when the events since the snapshot touched anything
+    the draft depends on.
+    """
+    with _lock:
+        speculation = _pending.pop(state.game_id, None)
+
+    current_actor_state = state.current_actor_state
+    if speculation is None or current_actor_state is None:
+        return None
+
+    if speculation.actor_name != current_actor_state.actor_name or speculation.turn != state.current_turn:
+        speculation.future.cancel()
+        with _lock:
+            _stats["discarded"] += 1
+        return None
+
+    try:
+        response = speculation.future.result()
+    except Exception as e:
+        print(f"Error in speculative deliberation: {e}")
+        with _lock:
+            _stats["failed"] += 1
+        return None
+
+    is_valid = _is_still_valid(speculation, state, response)
+    with _lock:
+        _stats["committed" if is_valid else "discarded"] += 1
+
+    return response if is_valid else None
+
+
+def discard_speculation(game_id: str) -> None:
+    """Drop any pending speculative deliberation for a game"""
+    with _lock:
+        speculation = _pending.pop(game_id, None)
+    if speculation:
+        speculation.future.cancel()
+
+
+def speculation_stats() -> Dict[str, int]:
+    """Counts of speculative deliberations started, committed, discarded and failed in this process"""
+    with _lock:
+        return dict(_stats)
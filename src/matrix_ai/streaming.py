@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.utils.json import parse_partial_json
+
+# Token-level streaming of the long-form fields of structured responses. The nodes
+# call the model through with_structured_output, so the tokens arriving on
+# LangGraph's "messages" stream mode are fragments of a JSON document (message
+# content in json_schema mode, tool call arguments in function calling mode).
+# FieldStreamer re-parses the partial document as it grows and hands out the new
+# text of the fields worth showing while the call is still running.
+
+# Long-form fields streamed per graph node
+STREAMED_FIELDS: Dict[str, Sequence[str]] = {
+    "player_deliberation": ("action_description",),
+    "create_narrative_and_update_world_state": ("adjudication_narrative",),
+    "end_game_sequence": ("game_outcome_summary", "narrative_conclusion"),
+}
+
+
+class FieldDelta(NamedTuple):
+    """New text of one streamed field."""
+    node: str
+    field: str
+    text: str
+    is_first: bool  # First text of this field in this call
+
+
+class FieldStreamer:
+    """Turn "messages" stream chunks into incremental text of the long-form response fields."""
+
+    def __init__(self, fields: Optional[Dict[str, Sequence[str]]] = None):
+        self.fields = STREAMED_FIELDS if fields is None else fields
+        self._buffers: Dict[str, str] = {}
+        self._emitted: Dict[tuple, int] = {}
+
+    def feed(self, chunk: Any, metadata: Dict[str, Any]) -> List[FieldDelta]:
+        """Consume one (chunk, metadata) item of the "messages" stream mode"""
+        node = metadata.get("langgraph_node", "")
+        fields = self.fields.get(node)
+        if not fields or not isinstance(chunk, AIMessageChunk):
+            return []
+
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        text += "".join(tool_call.get("args") or "" for tool_call in chunk.tool_call_chunks)
+        if not text:
+            return []
+
+        key = chunk.id or node
+        buffer = self._buffers.get(key, "") + text
+        self._buffers[key] = buffer
+
+        parsed = parse_partial_json(buffer)
+        if not isinstance(parsed, dict):
+            return []
+
+        deltas = []
+        for field in fields:
+            value = parsed.get(field)
+            if not isinstance(value, str):
+                continue
+            emitted = self._emitted.get((key, field), 0)
+            if len(value) > emitted:
+                deltas.append(FieldDelta(node, field, value[emitted:], emitted == 0))
+                self._emitted[(key, field)] = len(value)
+        return deltas
@@ -0,0 +1,56 @@
+from typing import List, Optional
+
+from .schemas import INITIAL_SUMMARY_SECTION, GameState, SummaryPatch, SummarySection, render_summary
+
+# Incremental game state summary. Rather than rewriting the whole summary after every
+# argument (output that grows with the game), the narrative node returns patches that
+# add, replace or drop single sections keyed by topic or actor. The sections live in
+# GameState.summary_sections and game_state_summary is re-rendered from them here.
+
+
+def _normalize_key(key: str) -> str:
+    return " ".join(key.lower().split())
+
+
+def _find_section(sections: List[SummarySection], key: str) -> Optional[int]:
+    """Index of the section with this key (ignoring case and spacing), if any"""
+    normalized = _normalize_key(key)
+    return next((i for i, section in enumerate(sections) if _normalize_key(section.key) == normalized), None)
+
+
+def apply_summary_patches(state: GameState, patches: List[SummaryPatch]) -> None:
+    """
+    Apply summary patches to the state's sections and re-render game_state_summary.
+
+    An 'add' for an existing key replaces that section and a 'replace' for an unknown
+    key adds it, since the model does not always pick the right operation. Patches
+    without a key or text, and drops of unknown keys, are ignored. Beyond
+    max_summary_sections, the least recently updated sections are dropped.
+    """
+    sections = state.summary_sections
+    if not sections and state.game_state_summary:
+        # State from before the summary was sectioned
+        sections.append(SummarySection(key=INITIAL_SUMMARY_SECTION, text=state.game_state_summary))
+
+    for patch in patches:
+        key = patch.key.strip()
+        if not key:
+            continue
+        index = _find_section(sections, key)
+        if patch.op == "drop":
+            if index is not None:
+                del sections[index]
+        elif patch.text.strip():
+            section = SummarySection(key=key, text=patch.text.strip(), updated_turn=state.current_turn)
+            if index is None:
+                sections.append(section)
+            else:
+                sections[index] = section.model_copy(update={"key": sections[index].key})
+
+    excess = len(sections) - max(1, state.settings.max_summary_sections)
+    if excess > 0:
+        # Stable sort, so among sections updated in the same turn the earlier ones go first
+        evicted = {id(section) for section in sorted(sections, key=lambda section: section.updated_turn)[:excess]}
+        sections[:] = [section for section in sections if id(section) not in evicted]
+
+    state.game_state_summary = render_summary(sections)
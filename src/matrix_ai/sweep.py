@@ -0,0 +1,218 @@
+import copy
+import csv
+import itertools
+import random
+import statistics
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from .schemas import GameSettings, MatrixGame
+from .farm import GameJob, GameResult, iter_game_farm
+from .export import GameLogWriter
+
+# Parameter names accepted by a sweep:
+#   game.<field>              MatrixGame field (e.g. game.game_length)
+#   settings.<field>          GameSettings field (e.g. settings.probability_panel_size)
+#   model.<node>.<field>      per-node model override, <node> may be '*' for all nodes
+#   <field>                   shorthand for a MatrixGame or GameSettings field
+#   temperature / model       shorthand for model.*.temperature / model.*.model
+_SHORTHANDS = {
+    "temperature": "model.*.temperature",
+    "model": "model.*.model",
+    "panel_size": "settings.probability_panel_size",
+}
+
+# --- SWEEP SPEC ---
+
+class SweepSpec(BaseModel):
+    """A parameter sweep over one scenario."""
+    scenario_path: str = Field(description="Path to the scenario JSON file.")
+    parameters: Dict[str, List[Any]] = Field(description="Values to sweep per parameter, e.g. {'game_length': [4, 8, 12], 'temperature': [0.3, 0.6, 0.9]}.")
+    design: Literal["grid", "random"] = Field(default="grid", description="'grid' runs every combination, 'random' samples `samples` combinations.")
+    samples: int = Field(default=10, description="Number of points drawn for a random design.")
+    repeats: int = Field(default=1, description="Number of runs (with different seeds) per design point.")
+    seed: int = Field(default=0, description="Seed for the random design and the per-run seeds.")
+    settings: Dict[str, Any] = Field(default_factory=dict, description="GameSettings fields applied to every run (e.g., a model routing table); swept settings override them.")
+    pairing: Literal["independent", "common", "antithetic"] = Field(default="common", description="How runs are seeded across the ensemble: 'independent' gives every run its own seed; 'common' reuses the same seed for repeat i of every design point (common random numbers), so differences between points are not masked by dice noise; 'antithetic' additionally runs each of those seeds with antithetic draws, doubling the runs per point.")
+
+
+def parse_values(text: str) -> List[Any]:
+    """
+    Parse a CLI value spec into a list of values.
+
+    Supports comma lists ('gpt-4.1,gpt-4.1-mini', '1,3,5'), integer ranges
+    ('4..12', '4..12:2' or '10..2:-2') and float ranges ('0.3..0.9:0.3'). Both
+    ends of a range are included; the step must not be zero.
+    """
+    if ".." in text:
+        bounds, _, step_text = text.partition(":")
+        start_text, end_text = bounds.split("..")
+        if all(part.lstrip("-").isdigit() for part in (start_text, end_text, step_text or "1")):
+            start, end, step = int(start_text), int(end_text), int(step_text or 1)
+            if step == 0:
+                raise ValueError(f"Range step must not be zero: {text}")
+            # Include the end value whichever way the range runs
+            return list(range(start, end + (1 if step > 0 else -1), step))
+        start, end = float(start_text), float(end_text)
+        step = float(step_text) if step_text else (end - start) / 4
+        if start == end:
+            return [start]
+        if step == 0:
+            raise ValueError(f"Range step must not be zero: {text}")
+        count = int(round((end - start) / step)) + 1
+        return [round(start + i * step, 6) for i in range(count)]
+
+    values = []
+    for item in text.split(","):
+        item = item.strip()
+        for cast in (int, float):
+            try:
+                values.append(cast(item))
+                break
+            except ValueError:
+                continue
+        else:
+            values.append(item)
+    return values
+
+# --- EXPANSION ---
+
+def _resolve_parameter(name: str) -> Tuple[str, ...]:
+    """Turn a parameter name into a (namespace, ...) path"""
+    name = _SHORTHANDS.get(name, name)
+    parts = tuple(name.split("."))
+
+    if parts[0] in ("game", "settings") and len(parts) == 2:
+        return parts
+    if parts[0] == "model" and len(parts) == 3:
+        return parts
+    if len(parts) == 1:
+        if name in MatrixGame.model_fields:
+            return ("game", name)
+        if name in GameSettings.model_fields:
+            return ("settings", name)
+
+    raise ValueError(f"Unknown sweep parameter: {name}")
+
+
+def expand_design(spec: SweepSpec) -> List[Dict[str, Any]]:
+    """Expand a sweep spec into its design points (one dict of parameter values per point)"""
+    names = list(spec.parameters)
+    for name in names:
+        _resolve_parameter(name)
+
+    if spec.design == "grid":
+        combinations = itertools.product(*(spec.parameters[name] for name in names))
+        return [dict(zip(names, values)) for values in combinations]
+
+    rng = random.Random(spec.seed)
+    return [{name: rng.choice(spec.parameters[name]) for name in names} for _ in range(spec.samples)]
+
+
+def build_job(scenario_path: str, point: Dict[str, Any], seed: Optional[int], base_settings: Optional[Dict[str, Any]] = None) -> GameJob:
+    """Translate a design point into a farm job"""
+    overrides: Dict[str, Any] = {}
+    # Deep copy: points write into nested settings (node_models), which jobs must not share
+    settings: Dict[str, Any] = copy.deepcopy(base_settings or {})
+
+    for name, value in point.items():
+        path = _resolve_parameter(name)
+        if path[0] == "game":
+            overrides[path[1]] = value
+        elif path[0] == "settings":
+            settings[path[1]] = value
+        else:
+            _, node, field = path
+            settings.setdefault("node_models", {}).setdefault(node, {})[field] = value
+
+    return GameJob(scenario_path=scenario_path, seed=seed, overrides=overrides, settings=settings)
+
+# --- RESULTS ---
+
+def result_row(point: Dict[str, Any], result: GameResult) -> Dict[str, Any]:
+    """One tidy results-table row: the design point followed by the run's outcome metrics"""
+    probabilities = [a.final_probability for a in result.arguments if a.final_probability is not None]
+    successes = [a.is_successful for a in result.arguments if a.is_successful is not None]
+
+    return {
+        **point,
+        "job_id": result.job_id,
+        "seed": result.seed,
+        "status": result.status,
+        "error": result.error or "",
+        "turns_played": result.turns_played,
+        "arguments": len(result.arguments),
+        "success_rate": round(sum(successes) / len(successes), 4) if successes else None,
+        "mean_final_probability": round(statistics.mean(probabilities), 4) if probabilities else None,
+        "degraded_entries": result.degraded_entries,
+        "duration_seconds": round(result.duration_seconds, 3),
+        "llm_requests": result.llm_requests,
+        "total_tokens": result.total_tokens,
+        "total_cost_usd": round(result.total_cost_usd, 6),
+    }
+
+
+def write_results_table(rows: List[Dict[str, Any]], path: str) -> None:
+    """Write sweep rows to a CSV file"""
+    if not rows:
+        return
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+# --- SWEEP API ---
+
+def run_sweep(
+    spec: SweepSpec,
+    max_workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    output_path: Optional[str] = None,
+    log_path: Optional[str] = None,
+    on_result: Optional[Callable[[Dict[str, Any], GameResult], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run every design point of a sweep on the game farm and return a tidy results table.
+
+    At most max_workers games run at once. All runs share the LLM response cache at
+    cache_path (if given). on_result is called with each design point and result as
+    runs complete. Rows are returned in design order and optionally written to
+    output_path as CSV. If log_path is given, every run's argument records are
+    streamed to a Parquet or Arrow IPC file as runs complete.
+    """
+    rng = random.Random(spec.seed)
+    shared_seeds = [rng.randrange(2**31) for _ in range(spec.repeats)]
+    jobs: List[GameJob] = []
+    points: Dict[str, Dict[str, Any]] = {}
+
+    for point in expand_design(spec):
+        for repeat in range(spec.repeats):
+            seed = rng.randrange(2**31) if spec.pairing == "independent" else shared_seeds[repeat]
+            antithetic_draws = [False, True] if spec.pairing == "antithetic" else [False]
+            for antithetic in antithetic_draws:
+                job = build_job(spec.scenario_path, point, seed, spec.settings)
+                job.settings["antithetic"] = antithetic
+                jobs.append(job)
+                points[job.job_id] = {**point, "repeat": repeat, "antithetic": antithetic}
+
+    results = {}
+    log_writer = GameLogWriter(log_path) if log_path else None
+    try:
+        for result in iter_game_farm(jobs, max_workers=max_workers, cache_path=cache_path):
+            results[result.job_id] = result
+            if log_writer:
+                log_writer.write_result(result)
+            if on_result:
+                on_result(points[result.job_id], result)
+    finally:
+        if log_writer:
+            log_writer.close()
+
+    rows = [result_row(points[job.job_id], results[job.job_id]) for job in jobs]
+
+    if output_path:
+        write_results_table(rows, output_path)
+
+    return rows
@@ -0,0 +1,126 @@
+from typing import Iterable, List, Optional
+
+from .schemas import ForceUnitState, ForceUpdate, RelationshipUpdate, WorldDiff, WorldState
+
+# Updates and prompt views of the typed world-state store (GameState.world). The
+# narrative node's force and relationship updates name actors and units as the model
+# wrote them; they are resolved against the store into a WorldDiff, which is applied
+# to the state and recorded on the argument. Updates that cannot be resolved are
+# kept in the diff as rejected rather than dropped. Prompts render only the part of
+# the world that concerns the acting actor.
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def _resolve_actor(world: WorldState, actor_name: str) -> Optional[str]:
+    """The store's name for an actor, matched exactly or ignoring case and spacing"""
+    if actor_name in world.forces:
+        return actor_name
+    normalized = _normalize(actor_name)
+    return next((name for name in world.forces if _normalize(name) == normalized), None)
+
+
+def _resolve_unit(world: WorldState, actor_name: str, unit_name: str) -> Optional[str]:
+    """The store's name for one of an actor's units, matched exactly or ignoring case and spacing"""
+    units = world.forces.get(actor_name, {})
+    if unit_name in units:
+        return unit_name
+    normalized = _normalize(unit_name)
+    return next((name for name in units if _normalize(name) == normalized), None)
+
+
+def resolve_world_updates(world: WorldState, force_updates: List[ForceUpdate], relationship_updates: List[RelationshipUpdate], turn: int) -> WorldDiff:
+    """
+    Resolve the model's updates against the store into a WorldDiff.
+
+    An update for a unit the actor does not have deploys it if a location is given;
+    otherwise it is rejected, as are updates naming an unknown actor and relationships
+    of an actor with itself. Updates that change nothing are skipped.
+    """
+    diff = WorldDiff(turn=turn)
+
+    for update in force_updates:
+        if not update.location and not update.details:
+            continue
+        actor_name = _resolve_actor(world, update.actor_name)
+        if actor_name is None:
+            diff.rejected.append(f"Force update for unknown actor '{update.actor_name}' (unit '{update.unit_name}')")
+            continue
+        unit_name = _resolve_unit(world, actor_name, update.unit_name)
+        if unit_name is None and not update.location:
+            diff.rejected.append(f"Force update for unknown unit '{update.unit_name}' of {actor_name} without a location to deploy it at")
+            continue
+        diff.force_updates.append(update.model_copy(update={"actor_name": actor_name, "unit_name": unit_name or update.unit_name.strip()}))
+
+    for update in relationship_updates:
+        actor_name = _resolve_actor(world, update.actor_name)
+        other_actor_name = _resolve_actor(world, update.other_actor_name)
+        if actor_name is None or other_actor_name is None:
+            unknown = update.actor_name if actor_name is None else update.other_actor_name
+            diff.rejected.append(f"Relationship update for unknown actor '{unknown}'")
+        elif actor_name == other_actor_name:
+            diff.rejected.append(f"Relationship update of {actor_name} with itself")
+        else:
+            diff.relationship_updates.append(update.model_copy(update={"actor_name": actor_name, "other_actor_name": other_actor_name}))
+
+    return diff
+
+# --- PROMPT VIEWS ---
+
+def format_units(units: List[ForceUnitState]) -> str:
+    """Units as 'name at location (details)', comma separated"""
+    return ", ".join(f"{unit.unit_name} at {unit.location}" + (f" ({unit.details})" if unit.details else "") for unit in units)
+
+
+def render_relevant_forces(world: WorldState, actor_name: str, context: str, actor_names: Optional[Iterable[str]] = None) -> str:
+    """
+    The forces that matter to an action, one line per actor: all of the acting actor's
+    units, the units sharing a location with them, and every unit of an actor (or any
+    unit or location) the context text names. With actor_names, only those actors'
+    units are considered. The rest is summarized in a count.
+    """
+    context = context.lower()
+    considered = set(world.forces if actor_names is None else actor_names) | {actor_name}
+    own_locations = {unit.location for unit in world.actor_units(actor_name)}
+    nearby = {(other, unit.unit_name) for location in own_locations for other, unit in world.units_at(location)}
+
+    lines = []
+    omitted_units = 0
+    omitted_actors = set()
+    for other, units in world.forces.items():
+        named = other == actor_name or other.lower() in context
+        shown = [
+            unit for unit in units.values()
+            if named or (other, unit.unit_name) in nearby or unit.unit_name.lower() in context or unit.location.lower() in context
+        ] if other in considered else []
+        if shown:
+            lines.append(f"{other}: {format_units(shown)}")
+        if len(shown) < len(units):
+            omitted_units += len(units) - len(shown)
+            omitted_actors.add(other)
+
+    if omitted_units:
+        lines.append(f"({omitted_units} other units of {len(omitted_actors)} actors not shown)")
+    return "\n".join(lines) if lines else "No forces deployed"
+
+
+def render_relationships(world: WorldState, actor_name: str, others: Optional[Iterable[str]] = None) -> str:
+    """
+    An actor's recorded relationships as 'Other: Stance (note)'; unlisted actors are
+    neutral. With others, only the relationships with those actors are shown and the
+    rest are counted.
+    """
+    relationships = world.relationships.get(actor_name, {})
+    if not relationships:
+        return "None recorded (all neutral)"
+    others = set(relationships if others is None else others)
+    lines = [
+        f"{other}: {relationship.stance.value}" + (f" ({relationship.note})" if relationship.note else "")
+        for other, relationship in relationships.items() if other in others
+    ]
+    omitted = len(relationships) - len(lines)
+    if omitted:
+        lines.append(f"({omitted} other relationships not shown)")
+    return "; ".join(lines)
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+import pytest
+
+from matrix_ai.farm import load_matrix_game
+
+SCENARIOS = Path(__file__).parent.parent / "scenarios"
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(monkeypatch):
+    """Every test plays against the deterministic offline model, with no simulated latency"""
+    monkeypatch.setenv("MATRIX_AI_LLM_BACKEND", "fake")
+    monkeypatch.setenv("MATRIX_AI_FAKE_LATENCY", "0")
+
+
+@pytest.fixture
+def load_scenario():
+    """Load a bundled scenario by name, with a short game length by default"""
+    def load(name: str, game_length: int = 2):
+        return load_matrix_game(str(SCENARIOS / f"{name}.json"), {"game_length": game_length})
+    return load
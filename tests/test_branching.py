@@ -0,0 +1,25 @@
+import pytest
+
+from matrix_ai import GameSettings
+from matrix_ai.branching import explore_outcomes
+from matrix_ai.log_store import iter_game_log
+from matrix_ai.schemas import LogEntryType
+
+
+def test_branches_cover_the_outcome_tree(load_scenario):
+    result = explore_outcomes(load_scenario("trade-dispute", game_length=1), GameSettings(seed=3), min_weight=0.05, max_leaves=8)
+
+    assert result.forks >= 1 and result.leaves
+    assert result.explored_weight + result.pruned_weight == pytest.approx(1.0)
+
+    for leaf in result.leaves:
+        outcomes = {
+            (entry.turn, entry.actor_name): entry.content.is_successful
+            for entry in iter_game_log(leaf.final_state) if entry.entry_type == LogEntryType.ARGUMENT
+        }
+        for point in leaf.outcomes:
+            assert outcomes[(point.turn, point.actor_name)] is point.is_successful
+
+    # No two leaves took the same outcomes
+    assert len({tuple(point.is_successful for point in leaf.outcomes) for leaf in result.leaves}) == len(result.leaves)
+    assert all(0.0 <= value <= 1.0 for value in result.expected_successes().values())
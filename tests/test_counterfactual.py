@@ -0,0 +1,63 @@
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+
+from matrix_ai import GameSettings, GameState
+from matrix_ai.counterfactual import find_checkpoint, fork_game
+from matrix_ai.log_store import iter_game_log
+from matrix_ai.main_game_graph import run_matrix_game
+from matrix_ai.schemas import ArgumentStatus, LogEntryType
+
+ACTOR = "Small Island States Alliance"
+
+
+def _arguments(state: GameState, turn: int):
+    return [entry for entry in iter_game_log(state) if entry.turn == turn and entry.entry_type == LogEntryType.ARGUMENT]
+
+
+def _play(load_scenario):
+    checkpointer = MemorySaver()
+    game = load_scenario("climate-summit")
+    final = GameState.model_validate(run_matrix_game(game, settings=GameSettings(seed=1), checkpointer=checkpointer))
+    return checkpointer, final
+
+
+def test_fork_without_edits_replays_the_game(load_scenario):
+    checkpointer, final = _play(load_scenario)
+    checkpoint = find_checkpoint(checkpointer, final.game_id, turn=1, actor_name=ACTOR)
+
+    fork, = fork_game(checkpointer, checkpoint)
+
+    assert [entry.summary for entry in iter_game_log(fork)] == [entry.summary for entry in iter_game_log(final)]
+    assert fork.world == final.world
+
+
+def test_fork_with_changed_outcome_replaces_the_original_outcome(load_scenario):
+    checkpointer, final = _play(load_scenario)
+    checkpoint = find_checkpoint(checkpointer, final.game_id, turn=1, actor_name=ACTOR)
+    before = GameState.model_validate(checkpoint.values)
+    original = GameState.model_validate(find_checkpoint(checkpointer, final.game_id, turn=1, actor_name=ACTOR, before="check_game_over").values)
+    assert before.current_actor_state.argument.is_successful
+
+    fork, = fork_game(checkpointer, checkpoint, argument_updates={"is_successful": False})
+
+    # One entry per actor for the turn, the edited one with the new outcome only
+    arguments = _arguments(fork, 1)
+    assert sorted(entry.actor_name for entry in arguments) == sorted(entry.actor_name for entry in _arguments(final, 1))
+    edited, = [entry.content for entry in arguments if entry.actor_name == ACTOR]
+    assert edited.is_successful is False
+    assert edited.status == ArgumentStatus.ADJUDICATED_FAILURE
+
+    # Right after its scenario update, the fork holds only its own changes on top of the checkpoint
+    updated = GameState.model_validate(find_checkpoint(checkpointer, final.game_id, turn=1, actor_name=ACTOR, before="check_game_over").values)
+    assert updated.world == before.world.applied(edited.world_changes)
+    original_markers = set(original.global_narrative_markers) - set(before.global_narrative_markers)
+    assert original_markers
+    assert not original_markers & set(updated.global_narrative_markers)
+
+
+def test_fork_rejects_derived_fields(load_scenario):
+    checkpointer, final = _play(load_scenario)
+    checkpoint = find_checkpoint(checkpointer, final.game_id, turn=1, actor_name=ACTOR)
+
+    with pytest.raises(ValueError, match="is_successful"):
+        fork_game(checkpointer, checkpoint, argument_updates={"status": ArgumentStatus.ADJUDICATED_FAILURE})
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from matrix_ai import GameSettings, GameState
+from matrix_ai.log_store import GameLogStore, iter_game_log, log_length, recent_log_entries
+from matrix_ai.main_game_graph import run_matrix_game
+from matrix_ai.schemas import GamePhase, LogEntry, LogEntryType
+
+
+def _entry(summary: str) -> LogEntry:
+    return LogEntry(entry_id=summary, timestamp=datetime.now().isoformat(), turn=1, phase=GamePhase.STATE_UPDATE,
+                    entry_type=LogEntryType.GAME_EVENT, content=summary, summary=summary)
+
+
+def test_forks_keep_their_own_chain(tmp_path):
+    store = GameLogStore(str(tmp_path / "log.db"))
+    head = store.append("game", [_entry("a"), _entry("b")], None, 0)
+    left = store.append("game", [_entry("c")], head, 2)
+    right = store.append("game", [_entry("d")], head, 2)
+    # Re-spilling the shared prefix (as a fork does) changes nothing
+    assert store.append("game", [_entry("a"), _entry("b")], None, 0) == head
+
+    assert [entry.summary for entry in store.iter_chain(left)] == ["a", "b", "c"]
+    assert [entry.summary for entry in store.iter_chain(right)] == ["a", "b", "d"]
+    assert [entry.summary for entry in store.iter_chain(left, start=1)] == ["b", "c"]
+
+
+def test_spilled_game_reads_back_the_full_log(load_scenario, tmp_path):
+    def play(**settings):
+        game = load_scenario("trade-dispute", game_length=3)
+        return GameState.model_validate(run_matrix_game(game, settings=GameSettings(seed=4, **settings)))
+
+    in_memory = play()
+    spilled = play(log_store_path=str(tmp_path / "log.db"), log_window=3)
+
+    assert len(spilled.game_log) <= 3 and spilled.game_log_offset > 0
+    assert log_length(spilled) == log_length(in_memory)
+    assert [entry.summary for entry in iter_game_log(spilled)] == [entry.summary for entry in iter_game_log(in_memory)]
+    assert [entry.summary for entry in recent_log_entries(spilled, 5)] == [entry.summary for entry in in_memory.game_log[-5:]]
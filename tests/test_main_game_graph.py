@@ -0,0 +1,43 @@
+import json
+import re
+
+import pytest
+
+from matrix_ai import GameSettings, GameState
+from matrix_ai.main_game_graph import run_matrix_game
+
+
+def _normalized(state: GameState) -> str:
+    """The state as JSON with the per-run ids and timestamps masked"""
+    data = state.model_dump(mode="json")
+    data.pop("game_id")
+    text = json.dumps(data, sort_keys=True)
+    text = re.sub(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", "ID", text)
+    return re.sub(r"\d{4}-\d\d-\d\dT[\d:.]+", "TS", text)
+
+
+def _full_state_delta(self, *fields, **values):
+    """What every node returned before partial updates: the whole state"""
+    return {name: getattr(self, name) for name in GameState.model_fields}
+
+
+@pytest.mark.parametrize("scenario, settings", [
+    ("trade-dispute", {}),
+    ("race-to-agi", {"adjudication_mode": "panel"}),
+    ("attack-on-taiwan", {"log_window": 4}),
+])
+def test_partial_updates_match_full_state_updates(load_scenario, monkeypatch, tmp_path, scenario, settings):
+    if "log_window" in settings:
+        settings = {**settings, "log_store_path": str(tmp_path / "log.db")}
+
+    def play():
+        game = load_scenario(scenario, game_length=3)
+        return GameState.model_validate(run_matrix_game(game, settings=GameSettings(seed=11, **settings)))
+
+    partial = play()
+    with monkeypatch.context() as patch:
+        patch.setattr(GameState, "delta", _full_state_delta)
+        full = play()
+
+    assert partial.current_turn == 3 and partial.game_log
+    assert _normalized(partial) == _normalized(full)
@@ -0,0 +1,34 @@
+from matrix_ai.markers import compact_markers, dedupe_texts, normalize_marker
+from matrix_ai.schemas import GameSettings
+
+
+def test_normalize_marker_ignores_case_punctuation_and_spacing():
+    assert normalize_marker("  Trade  War -- Escalating! ") == "trade war escalating"
+
+
+def test_dedupe_texts_keeps_first_wording():
+    assert dedupe_texts(["Sanctions imposed", "sanctions imposed.", " ", "Ceasefire holds"], 1.0) == ["Sanctions imposed", "Ceasefire holds"]
+
+
+def test_duplicates_merge_into_the_newer_wording():
+    settings = GameSettings(marker_similarity_threshold=0.85)
+    markers = ["Naval blockade in effect", "Ceasefire holds", "Naval blockade now in effect"]
+    turns = {"Naval blockade in effect": 1, "Ceasefire holds": 2, "Naval blockade now in effect": 3}
+
+    active, active_turns, archived = compact_markers(markers, turns, 3, settings)
+
+    assert active == ["Ceasefire holds", "Naval blockade now in effect"]
+    assert active_turns["Naval blockade now in effect"] == 3
+    assert archived == ["Turn 3: Naval blockade in effect (merged into: Naval blockade now in effect)"]
+
+
+def test_stale_markers_expire_and_excess_markers_are_evicted_oldest_first():
+    settings = GameSettings(marker_expiry_turns=3, max_active_markers=2)
+    markers = ["Old crisis", "Market panic", "Troops mobilised", "Talks resume"]
+    turns = {"Old crisis": 1, "Market panic": 3, "Troops mobilised": 4, "Talks resume": 5}
+
+    active, active_turns, archived = compact_markers(markers, turns, 5, settings)
+
+    assert active == ["Troops mobilised", "Talks resume"]
+    assert set(active_turns) == set(active)
+    assert archived == ["Turn 1: Old crisis (expired)", "Turn 3: Market panic (evicted)"]
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from matrix_ai import GameState
+from matrix_ai.schemas import (
+    ActorState, ForceUpdate, GameLogUpdate, GamePhase, LogEntry, LogEntryType, RelationshipStance,
+    RelationshipUpdate, WorldDiff, WorldState, merge_actor_states, merge_game_log, merge_world,
+)
+
+
+def _entry(summary: str) -> LogEntry:
+    return LogEntry(entry_id=summary, timestamp=datetime.now().isoformat(), turn=1, phase=GamePhase.STATE_UPDATE,
+                    entry_type=LogEntryType.GAME_EVENT, content=summary, summary=summary)
+
+
+def _summaries(log):
+    return [entry.summary for entry in log]
+
+
+def test_game_log_update_appends_and_spills():
+    current = [_entry("a"), _entry("b")]
+    assert _summaries(merge_game_log(current, GameLogUpdate(entries=[_entry("c")]))) == ["a", "b", "c"]
+    assert _summaries(merge_game_log(current, GameLogUpdate(entries=[_entry("c"), _entry("d")], spilled=3))) == ["d"]
+    assert _summaries(current) == ["a", "b"]
+
+
+def test_game_log_list_replaces():
+    assert _summaries(merge_game_log([_entry("a"), _entry("b")], [_entry("x")])) == ["x"]
+
+
+def test_actor_states_replace_by_name_and_keep_order():
+    current = [ActorState(actor_name=name) for name in ("A", "B", "C")]
+    changed = ActorState(actor_name="B", effects=["Blockade in place"])
+
+    merged = merge_actor_states(current, [changed])
+    assert [actor_state.actor_name for actor_state in merged] == ["A", "B", "C"]
+    assert merged[1] is changed
+    assert merged[0] is current[0] and merged[2] is current[2]
+
+    assert [actor_state.actor_name for actor_state in merge_actor_states(current, [ActorState(actor_name="D")])] == ["A", "B", "C", "D"]
+
+
+def test_world_diff_is_applied():
+    world = WorldState.model_validate({
+        "forces": {
+            "A": {"Fleet": {"unit_name": "Fleet", "location": "North Sea"}},
+            "B": {"Army": {"unit_name": "Army", "location": "Capital"}},
+        },
+    })
+    diff = WorldDiff(
+        turn=2,
+        force_updates=[ForceUpdate(actor_name="A", unit_name="Fleet", location="Strait")],
+        relationship_updates=[RelationshipUpdate(actor_name="A", other_actor_name="B", stance=RelationshipStance.HOSTILE)],
+    )
+
+    merged = merge_world(world, diff)
+    assert merged.forces["A"]["Fleet"].location == "Strait"
+    assert merged.relationship("B", "A").stance == RelationshipStance.HOSTILE
+    assert merged.relationship("A", "B").updated_turn == 2
+    # Rows the diff does not touch are shared, and the original is left as it was
+    assert merged.forces["B"] is world.forces["B"]
+    assert world.forces["A"]["Fleet"].location == "North Sea"
+
+
+def test_world_state_replaces():
+    replacement = WorldState(forces={"C": {}})
+    assert merge_world(WorldState(forces={"A": {}}), replacement) is replacement
+
+
+def test_delta_sends_named_fields_helper_changes_and_log_appends(load_scenario):
+    state = GameState.from_matrix_game_setup(load_scenario("trade-dispute"))
+    state.mark_changed("rng_draws")
+    state.record_log_append(_entry("a"))
+
+    update = state.delta("current_phase", actor_states=[state.actor_states[0]])
+    assert set(update) == {"current_phase", "rng_draws", "actor_states", "game_log"}
+    assert update["actor_states"] == [state.actor_states[0]]
+    assert isinstance(update["game_log"], GameLogUpdate)
+
+
+def test_delta_sends_a_field_changed_by_a_helper_whole(load_scenario):
+    state = GameState.from_matrix_game_setup(load_scenario("trade-dispute"))
+    state.mark_changed("world")
+    assert state.delta(world=WorldDiff())["world"] is state.world
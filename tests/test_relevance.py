@@ -0,0 +1,52 @@
+import pytest
+
+from matrix_ai import GameState
+from matrix_ai.relevance import related_actors, relevant_markers, render_actor_status, render_markers
+from matrix_ai.schemas import RelationshipStance, RelationshipUpdate, WorldDiff
+
+
+@pytest.fixture
+def state(load_scenario):
+    return GameState.from_matrix_game_setup(load_scenario("attack-on-taiwan"))
+
+
+def test_related_actors_puts_acting_then_named_then_related_actors(state):
+    names = [actor.actor_name for actor in state.game_definition.actors]
+    acting, named, related = names[0], names[-1], names[1]
+    state.world = state.world.applied(WorldDiff(relationship_updates=[
+        RelationshipUpdate(actor_name=acting, other_actor_name=related, stance=RelationshipStance.TENSE),
+    ]))
+    # Move every unit apart, so location does not relate anyone
+    state.world = state.world.model_copy(update={"forces": {
+        actor: {name: unit.model_copy(update={"location": f"{actor} {name}"}) for name, unit in units.items()}
+        for actor, units in state.world.forces.items()
+    }})
+
+    assert related_actors(state, [acting], f"A note sent to {named}", limit=10) == [acting, named, related]
+    assert related_actors(state, [acting], f"A note sent to {named}", limit=2) == [acting, named]
+
+
+def test_relevant_markers_prefer_named_and_matching_markers_in_original_order():
+    markers = ["Oil prices spike", "Taiwan strait closed", "Celebrity scandal", "USA deploys carrier"]
+
+    shown, omitted = relevant_markers(markers, ["USA"], "Shipping through the strait", limit=2)
+
+    assert shown == ["Taiwan strait closed", "USA deploys carrier"]
+    assert omitted == 2
+    assert render_markers(markers, ["USA"], "Shipping through the strait", 2, "; ") == "Taiwan strait closed; USA deploys carrier; (2 other markers not shown)"
+    assert relevant_markers(markers, [], "", limit=10) == (markers, 0)
+
+
+def test_actor_status_shows_every_objective_and_only_the_given_actors_effects(state):
+    shown_actor, quiet_actor = state.actor_states[0], state.actor_states[1]
+    shown_actor.effects = ["Blockade declared", "Reserves called up", "Cyber attack launched"]
+    quiet_actor.effects = ["Quietly rearming"]
+
+    text = render_actor_status(state, [shown_actor.actor_name], "blockade", max_effects=2)
+
+    for actor in state.game_definition.actors:
+        assert actor.actor_name in text
+        for objective in actor.objectives:
+            assert objective in text
+    assert "Blockade declared" in text and "(1 other effects not shown)" in text
+    assert "Quietly rearming" not in text and "(1 effects not shown)" in text
@@ -0,0 +1,51 @@
+import ormsgpack
+import pytest
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from matrix_ai import GameSettings, GameState
+from matrix_ai.main_game_graph import run_matrix_game
+from matrix_ai.schemas import ActorState
+from matrix_ai.serialization import _LIST, _MODEL, _PRE_WORLD_ACTOR_FIELDS, CompactSerializer, _Encoder
+
+
+@pytest.fixture
+def final_state(load_scenario):
+    return GameState.model_validate(run_matrix_game(load_scenario("attack-on-taiwan"), settings=GameSettings(seed=2)))
+
+
+def test_round_trip_is_lossless_and_smaller(final_state):
+    serializer = CompactSerializer(final_state.game_definition)
+
+    type_, payload = serializer.dumps_typed(final_state)
+    restored = serializer.loads_typed((type_, payload))
+
+    assert type_.startswith("compact+zstd:")
+    assert restored.model_dump() == final_state.model_dump()
+    assert len(payload) < len(JsonPlusSerializer().dumps_typed(final_state)[1]) / 4
+
+
+def test_reading_needs_the_scenario_dictionary(final_state):
+    payload = CompactSerializer(final_state.game_definition).dumps_typed(final_state)
+    with pytest.raises(ValueError, match="add_scenario"):
+        CompactSerializer().loads_typed(payload)
+    # Plain JsonPlus payloads are still read
+    assert CompactSerializer().loads_typed(JsonPlusSerializer().dumps_typed({"turn": 3})) == {"turn": 3}
+
+
+def test_actor_forces_from_before_the_world_store_are_migrated(load_scenario):
+    game = load_scenario("attack-on-taiwan")
+    actor = game.actors[0]
+    forces = [{"unit_name": unit.unit_name, "location": "Moved", "details": None} for unit in actor.starting_forces]
+
+    # An actor state as written before GameState.world, with its forces in current_forces
+    encoder = _Encoder(("matrix_ai",))
+    values = dict(ActorState(actor_name=actor.actor_name).__dict__, current_forces=forces)
+    tree = [_MODEL, encoder._type_ref(ActorState, _PRE_WORLD_ACTOR_FIELDS), *[encoder.encode(values[name]) for name in _PRE_WORLD_ACTOR_FIELDS]]
+    actor_state = CompactSerializer().loads_typed(("compact", ormsgpack.packb([_LIST, tree])))[0]
+
+    state = GameState.model_validate({"game_definition": game, "actor_states": [actor_state]})
+
+    units = state.world.actor_units(actor.actor_name)
+    assert len(units) == len(actor.starting_forces) > 0
+    assert {unit.location for unit in units} == {"Moved"}
+    assert "world" in state.delta()
@@ -0,0 +1,59 @@
+import pytest
+
+from matrix_ai.sweep import SweepSpec, build_job, expand_design, parse_values, run_sweep
+
+from conftest import SCENARIOS
+
+
+@pytest.mark.parametrize("text, values", [
+    ("gpt-4.1,gpt-4.1-mini", ["gpt-4.1", "gpt-4.1-mini"]),
+    ("1,3,5", [1, 3, 5]),
+    ("4..8", [4, 5, 6, 7, 8]),
+    ("4..12:4", [4, 8, 12]),
+    ("10..2:-4", [10, 6, 2]),
+    ("0.3..0.9:0.3", [0.3, 0.6, 0.9]),
+])
+def test_parse_values(text, values):
+    assert parse_values(text) == values
+
+
+def test_parse_values_rejects_a_zero_step():
+    with pytest.raises(ValueError, match="zero"):
+        parse_values("1..5:0")
+
+
+def test_expand_design():
+    spec = SweepSpec(scenario_path="s.json", parameters={"game_length": [2, 4], "temperature": [0.1, 0.5, 0.9]})
+    assert len(expand_design(spec)) == 6
+    random_spec = spec.model_copy(update={"design": "random", "samples": 4})
+    assert len(expand_design(random_spec)) == 4
+    with pytest.raises(ValueError, match="Unknown sweep parameter"):
+        expand_design(SweepSpec(scenario_path="s.json", parameters={"no_such_field": [1]}))
+
+
+def test_jobs_do_not_share_base_settings():
+    base = {"node_models": {"*": {"model": "fake"}}}
+    first = build_job("s.json", {"model.player_deliberation.temperature": 0.1, "game_length": 3}, 1, base)
+    second = build_job("s.json", {"model.player_deliberation.temperature": 0.9}, 1, base)
+
+    assert first.overrides == {"game_length": 3}
+    assert first.settings["node_models"]["player_deliberation"] == {"temperature": 0.1}
+    assert second.settings["node_models"]["player_deliberation"] == {"temperature": 0.9}
+    assert base == {"node_models": {"*": {"model": "fake"}}}
+
+
+def test_run_sweep_returns_one_row_per_run(tmp_path):
+    spec = SweepSpec(
+        scenario_path=str(SCENARIOS / "trade-dispute.json"),
+        parameters={"game_length": [1, 2]},
+        repeats=2,
+    )
+
+    rows = run_sweep(spec, max_workers=2, output_path=str(tmp_path / "sweep.csv"))
+
+    assert [(row["game_length"], row["repeat"]) for row in rows] == [(1, 0), (1, 1), (2, 0), (2, 1)]
+    assert all(row["status"] == "completed" for row in rows)
+    assert [row["turns_played"] for row in rows] == [1, 1, 2, 2]
+    # Common random numbers: repeat i of every point uses the same seed
+    assert rows[0]["seed"] == rows[2]["seed"] != rows[1]["seed"]
+    assert (tmp_path / "sweep.csv").read_text().count("\n") == 5